@@ -0,0 +1,212 @@
+# ======================================================
+# 🌐 API JSON de solo lectura – Verificación geográfica UCC
+# ======================================================
+# Uso: python app/api.py [--port 8600]
+#
+# Expone los indicadores de los dashboards para otros sistemas:
+#   GET /api/version                                       versión del almacén, periodos y UT
+#   GET /api/validacion?periodo=&ut=&distrito=             visitas válidas / no válidas (dashboard2)
+#   GET /api/gestores?periodo=&ut=&distrito=&nivel=        ranking de gestores por nivel de riesgo
+#   GET /api/distritos?periodo=&ut=                        % no válidas por distrito
+#   GET /api/tendencia_mensual                             % fuera de rango por mes (dashboard1)
+#   GET /api/departamentos                                 % hogares problemáticos por departamento
+#
+# Las respuestas se guardan en memoria por (versión del almacén, consulta) y
+# llevan ETag: un cliente con If-None-Match recibe 304 sin recalcular nada.
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yaml
+import tornado.ioloop
+import tornado.web
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from scripts.consultas import MotorConsultas
+from scripts.riesgo import leer_niveles, clasificar_riesgo
+
+with open(BASE_DIR / "pipeline" / "config.yaml", "r", encoding="utf-8") as f:
+    CONFIG = yaml.safe_load(f)
+
+NIVELES_RIESGO, LIMITES_RIESGO, MIN_VISITAS = leer_niveles(CONFIG)
+RUTA_PROCESADOS = BASE_DIR / "data" / "processed"
+RUTA_VISITAS = BASE_DIR / CONFIG.get("visit_store", {}).get("out_dir", "data/processed/visitas")
+
+
+def registros(df):
+    """DataFrame → lista de dicts JSON (NaN → null)."""
+    return json.loads(df.to_json(orient="records", force_ascii=False))
+
+
+# ======================================================
+# 🧮 INDICADORES (una función por endpoint; corren en el pool de hilos)
+# ======================================================
+def ind_version(motor, args):
+    return {
+        "periodos": motor.consultar("periodos")["PERIODO"].tolist(),
+        "uts": motor.consultar("uts")["UT"].tolist(),
+        "niveles_riesgo": dict(zip(NIVELES_RIESGO, map(float, LIMITES_RIESGO))),
+        "min_visitas": MIN_VISITAS,
+    }
+
+
+def ind_validacion(motor, args):
+    fila = registros(motor.consultar("validacion", periodo=args["periodo"], ut=args["ut"], distrito=args["distrito"]))
+    return fila[0]
+
+
+def ind_gestores(motor, args):
+    ranking = motor.consultar(
+        "ranking_gestores", periodo=args["periodo"], ut=args["ut"], distrito=args["distrito"], min_visitas=MIN_VISITAS
+    )
+    ranking["NIVEL"] = clasificar_riesgo(ranking["PCT_NO_VALIDAS"], NIVELES_RIESGO, LIMITES_RIESGO).astype(str)
+    por_nivel = ranking["NIVEL"].value_counts().reindex(NIVELES_RIESGO, fill_value=0)
+    if args["nivel"]:
+        ranking = ranking[ranking["NIVEL"] == args["nivel"]]
+    return {"por_nivel": {k: int(v) for k, v in por_nivel.items()}, "gestores": registros(ranking)}
+
+
+def ind_distritos(motor, args):
+    return registros(motor.consultar("distritos", periodo=args["periodo"], ut=args["ut"]))
+
+
+def ind_tendencia_mensual(motor, args):
+    return registros(motor.consultar("resumen_mensual"))
+
+
+def ind_departamentos(motor, args):
+    return registros(motor.consultar("hogares_problematicos_depto").sort_values("PctHogaresProblematicos", ascending=False))
+
+
+# endpoint → (función, parámetros admitidos, parámetros obligatorios)
+INDICADORES = {
+    "version": (ind_version, (), ()),
+    "validacion": (ind_validacion, ("periodo", "ut", "distrito"), ("periodo",)),
+    "gestores": (ind_gestores, ("periodo", "ut", "distrito", "nivel"), ("periodo",)),
+    "distritos": (ind_distritos, ("periodo", "ut"), ("periodo",)),
+    "tendencia_mensual": (ind_tendencia_mensual, (), ()),
+    "departamentos": (ind_departamentos, (), ()),
+}
+
+
+# ======================================================
+# 🗄️ CACHÉ DE RESPUESTAS POR VERSIÓN
+# ======================================================
+class CacheRespuestas:
+    """Respuestas JSON por (versión, endpoint, parámetros), con LRU y sin cálculos duplicados.
+
+    Si llegan varias peticiones iguales mientras se calcula una, todas esperan
+    el mismo resultado. Al cambiar la versión del almacén se descarta todo.
+    """
+
+    def __init__(self, max_entradas=256, hilos=4):
+        self.max_entradas = max_entradas
+        self.pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="api-sql")
+        self.version = None
+        self.motor = None
+        self.respuestas = OrderedDict()  # clave → (etag, cuerpo)
+        self.en_curso = {}  # clave → Future
+
+    def version_actual(self):
+        return os.path.getmtime(RUTA_VISITAS) if RUTA_VISITAS.is_dir() else None
+
+    def etag(self, clave, version):
+        return '"' + hashlib.sha1(repr((version, clave)).encode()).hexdigest()[:20] + '"'
+
+    def revisar_version(self):
+        version = self.version_actual()
+        if version != self.version:
+            self.version = version
+            self.motor = MotorConsultas(RUTA_PROCESADOS) if version is not None else None
+            self.respuestas.clear()
+        return self.motor is not None and self.motor.disponible()
+
+    async def obtener(self, clave, funcion, args):
+        if clave in self.respuestas:
+            self.respuestas.move_to_end(clave)
+            return self.respuestas[clave]
+        motor, version = self.motor, self.version
+        if clave not in self.en_curso:
+            self.en_curso[clave] = asyncio.get_running_loop().run_in_executor(
+                self.pool, lambda: json.dumps(
+                    {"version": version, "datos": funcion(motor, args)}, ensure_ascii=False
+                ).encode("utf-8")
+            )
+        try:
+            cuerpo = await asyncio.shield(self.en_curso[clave])
+        finally:
+            self.en_curso.pop(clave, None)
+        respuesta = (self.etag(clave, version), cuerpo)
+        if self.version == version:  # no guardar lo calculado con un almacén ya reemplazado
+            self.respuestas[clave] = respuesta
+            while len(self.respuestas) > self.max_entradas:
+                self.respuestas.popitem(last=False)
+        return respuesta
+
+
+class IndicadorHandler(tornado.web.RequestHandler):
+    def initialize(self, cache):
+        self.cache = cache
+
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.set_header("Cache-Control", "no-cache")  # revalidar siempre con ETag
+
+    def error_json(self, estado, mensaje):
+        self.set_status(estado)
+        self.finish(json.dumps({"error": mensaje}, ensure_ascii=False))
+
+    async def get(self, nombre):
+        if nombre not in INDICADORES:
+            return self.error_json(404, f"Endpoint desconocido: {nombre}")
+        funcion, admitidos, obligatorios = INDICADORES[nombre]
+        args = {p: (self.get_query_argument(p, "").strip() or None) for p in admitidos}
+        faltan = [p for p in obligatorios if args[p] is None]
+        if faltan:
+            return self.error_json(400, f"Falta el parámetro: {', '.join(faltan)}")
+        if args.get("nivel") and args["nivel"] not in NIVELES_RIESGO:
+            return self.error_json(400, f"Nivel desconocido; use uno de: {', '.join(NIVELES_RIESGO)}")
+        if not self.cache.revisar_version():
+            return self.error_json(503, "Almacén de visitas no disponible: ejecute el ETL.")
+
+        clave = (nombre, tuple(sorted(args.items())))
+        etag = self.cache.etag(clave, self.cache.version)
+        if etag in self.request.headers.get("If-None-Match", ""):
+            self.set_status(304)
+            return self.finish()
+        etag, cuerpo = await self.cache.obtener(clave, funcion, args)
+        self.set_header("ETag", etag)
+        self.finish(cuerpo)
+
+    def compute_etag(self):
+        return None  # el ETag lo pone `get` (versión + consulta), no el hash del cuerpo
+
+
+def crear_app(cache=None):
+    cfg = CONFIG.get("api", {})
+    cache = cache or CacheRespuestas(cfg.get("cache_entries", 256), cfg.get("threads", 4))
+    return tornado.web.Application([(r"/api/(\w+)", IndicadorHandler, {"cache": cache})])
+
+
+def main():
+    cfg = CONFIG.get("api", {})
+    parser = argparse.ArgumentParser(description="API JSON de solo lectura con los indicadores de verificación.")
+    parser.add_argument("--port", type=int, default=cfg.get("port", 8600))
+    parser.add_argument("--address", default=cfg.get("address", "127.0.0.1"))
+    args = parser.parse_args()
+    crear_app().listen(args.port, address=args.address)
+    print(f"🌐 API en http://{args.address}:{args.port}/api/version")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,23 @@
 # ======================================================
 
 import pandas as pd
-import matplotlib.pyplot as plt
 import streamlit as st
-import geopandas as gpd
-import folium
-from branca.colormap import linear
-from streamlit_folium import st_folium
 import io
+import os
+import sys
+import json
 import base64
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.estadisticas import AlmacenEstadisticas
+from scripts.consultas import MotorConsultas
+from scripts.periodos import leer_periodos
+from scripts.exclusiones import MOTIVOS_DASHBOARD, etiquetas_motivo, leer_resumen_exclusiones
+# folium, branca, streamlit_folium, pydeck y matplotlib (scripts.graficos) se importan con `importar`
+# dentro de la sección que los usa (medido en TIEMPOS_IMPORTACION)
+from scripts.diferido import importar
+from scripts.perfil_render import PerfilRender
 
 # ======================
 # CONFIGURACIÓN DE PÁGINA
@@ -20,30 +29,114 @@ st.set_page_config(page_title="Dashboard de Visitas", layout="wide")
 # ======================
 # CARGA DE DATOS
 # ======================
-@st.cache_data
-def cargar_datos():
-    df = pd.read_pickle("data/df_distancia.pkl")
-    gdf = gpd.read_file("data/peru_departamental_simple.geojson")
-    return df, gdf
-
-df_distancia, gdf = cargar_datos()
+with open(os.path.join("pipeline", "config.yaml"), "r", encoding="utf-8") as f:
+    CONFIG = yaml.safe_load(f)
+
+# Perfil opcional (UCC_PERFIL=1 o ?perfil=1): tiempos por sección y aciertos de caché
+perfil = PerfilRender("dashboard1", CONFIG)
+perfil.seccion("Carga de datos")
+
+# Las agregaciones son consultas SQL (DuckDB) sobre el almacén Parquet de
+# visitas que escribe el ETL: no se carga la base completa en pandas.
+RUTA_PROCESADOS = os.path.join("data", "processed")
+RUTA_VISITAS = CONFIG.get("visit_store", {}).get("out_dir", os.path.join(RUTA_PROCESADOS, "visitas"))
+
+@perfil.cache(st.cache_resource)
+def cargar_motor(version):
+    """Motor SQL en proceso; `version` (mtime del almacén de visitas) invalida la caché."""
+    return MotorConsultas(RUTA_PROCESADOS)
+
+if not os.path.isdir(RUTA_VISITAS):
+    st.error("⚠️ No se encontró el almacén de visitas. Ejecute el ETL (pipeline/etl_pipeline.py).")
+    perfil.cerrar()
+    st.stop()
+VERSION_DATOS = os.path.getmtime(RUTA_VISITAS)
+
+# persist="disk": la caché sobrevive reinicios y la llena scripts/precalentar.py;
+# `version` separa cada publicación del ETL.
+@perfil.cache(st.cache_data(persist="disk", show_spinner=False))
+def consultar(nombre, version, **parametros):
+    return cargar_motor(version).consultar(nombre, **parametros)
+
+@perfil.cache(st.cache_data)
+def cargar_limites():
+    """Límites departamentales como dict GeoJSON (folium lo acepta tal cual, sin geopandas)."""
+    with open(os.path.join("data", "peru_departamental_simple.geojson"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@perfil.cache(st.cache_data)
+def cargar_resumen_exclusiones():
+    """Exclusiones del ETL, solo con los motivos que este dashboard descarta."""
+    return leer_resumen_exclusiones(CONFIG["audit"].get("out_dir", "audit"), MOTIVOS_DASHBOARD["dashboard1"])
+
+@perfil.cache(st.cache_data)
+def cargar_grilla():
+    ruta = os.path.join("data", "processed", "grilla_visitas.parquet")
+    if not os.path.exists(ruta):
+        return pd.DataFrame()
+    return pd.read_parquet(ruta)
+
+RUTA_ESTADISTICAS = os.path.join("data", "processed", "estadisticas")
+
+@perfil.cache(st.cache_resource)
+def cargar_almacen(version):
+    """Almacén de estadísticas por gestor y hogar; `version` (mtime de la carpeta) invalida la caché."""
+    return AlmacenEstadisticas(RUTA_ESTADISTICAS)
+
+def almacen_actual():
+    ruta = os.path.join(RUTA_ESTADISTICAS, "gestores")
+    return cargar_almacen(os.path.getmtime(ruta) if os.path.exists(ruta) else 0)
+
+ETIQUETAS_MOTIVO = etiquetas_motivo(CONFIG)
+UMBRAL_ATIPICO_KM = CONFIG["territorial_rules"].get("outlier_km", 50)
+
+ORDEN_PERIODOS = [nombre for nombre, _, _ in leer_periodos(CONFIG)]
+UT_PRIORIZADAS = CONFIG.get("priority_uts", {})
+NOMBRES_MES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio",
+               "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+def nombre_mes(mes):
+    """'2025-09' → 'Septiembre 2025'."""
+    anio, num = mes.split("-")
+    return f"{NOMBRES_MES[int(num) - 1]} {anio}"
+
+def periodos_con_datos(version):
+    """Periodos operativos (columna PERIODO del ETL) con visitas, en orden cronológico."""
+    return consultar("periodos", version)["PERIODO"].tolist()
 
 # ======================================================
 # FUNCIÓN UNIFICADA
 # ======================================================
-@st.cache_data
-def calcular_resumen_mensual(df):
-    df = df.copy()
-    df['VALIDA_BASE'] = df['VALIDA_BASE'].str.upper().str.strip()
-    df['MES'] = df['MES'].astype(str)
-    df_filtrado = df[df['DISTANCIA_KM'] <= 50]
-    resumen = df_filtrado.groupby(['MES', 'VALIDA_BASE']).size().unstack(fill_value=0)
-    resumen_pct = resumen.div(resumen.sum(axis=1), axis=0) * 100
-    return resumen_pct
+def calcular_resumen_mensual(version):
+    return consultar("resumen_mensual", version).set_index("MES")
+
+# ======================================================
+# 🖼️ GRÁFICOS (PNG en caché por versión de datos y filtro)
+# ======================================================
+# Cada gráfico se dibuja una sola vez por clave; la figura se libera al
+# serializarla (scripts/graficos.py), así la memoria del servidor no crece.
+@perfil.cache(st.cache_data(show_spinner=False))
+def grafico_tendencia_mensual(version):
+    resumen_pct = calcular_resumen_mensual(version)
+    return importar("scripts.graficos").tendencia_mensual(
+        list(resumen_pct.index), resumen_pct['INCONSISTENTE'].tolist()
+    )
+
+@perfil.cache(st.cache_data(show_spinner=False))
+def grafico_ut_priorizadas(version, mes, uts):
+    resumen_ut_pct = consultar("ut_priorizadas", version, mes=mes, uts=list(uts))
+    return importar("scripts.graficos").barras_ut(
+        resumen_ut_pct['UT'].tolist(), resumen_ut_pct['VALIDA'].to_numpy(), resumen_ut_pct['INCONSISTENTE'].to_numpy()
+    )
+
+@perfil.cache(st.cache_data(show_spinner=False, max_entries=500))
+def grafico_tendencia_gestor(periodos, pct):
+    return importar("scripts.graficos").tendencia_gestor(list(periodos), list(pct))
 
 # ======================================================
 # ENCABEZADO
 # ======================================================
+perfil.seccion("Encabezado")
 st.markdown(
     """
     <h1 style="text-align:center;">Análisis Georreferenciado de Visitas Domiciliarias del Programa JUNTOS</h1>
@@ -58,18 +151,22 @@ st.markdown(
 # ======================================================
 # PESTAÑAS PRINCIPALES
 # ======================================================
-tabs = st.tabs([
+SECCIONES = [
     "📈 Resumen General",
     "🏙️ UT Priorizadas",
     "🗺️ Mapeo de Hogares",
     "👤 Gestor Local"
-])
+]
+# st.tabs ejecuta todas las pestañas en cada interacción; con este selector solo
+# corre la sección elegida y sus librerías (mapas, gráficos) se cargan al abrirla.
+seccion = st.radio("Sección", SECCIONES, horizontal=True, key="seccion", label_visibility="collapsed")
+perfil.seccion(seccion)
 
 # ======================================================
 # 📈 TAB 1 – RESUMEN GENERAL
 # ======================================================
-with tabs[0]:
-    resumen_pct = calcular_resumen_mensual(df_distancia)
+if seccion == SECCIONES[0]:
+    resumen_pct = calcular_resumen_mensual(VERSION_DATOS)
 
     def safe_get_pct(df, mes): 
         return df.loc[mes, 'INCONSISTENTE'] if mes in df.index else 0
@@ -132,15 +229,25 @@ with tabs[0]:
         )
 
     st.markdown(
-        """
+        f"""
         <p style='font-size:12px;color:gray; text-align:center; margin-top:15px;'>
-        *Nota: Se excluyen del análisis los registros con distancias mayores a 50 km por considerarse valores atípicos.  
+        *Nota: Se excluyen del análisis los registros con coordenadas inválidas (vacías, 0,0 o fuera de Perú) y con distancias mayores a {UMBRAL_ATIPICO_KM:g} km por considerarse valores atípicos.  
         Los umbrales de validez territorial son: ≤ 0.5 km (urbano), ≤ 2 km (andino), ≤ 5 km (amazónico).*
         </p>
         """,
         unsafe_allow_html=True
     )
 
+    resumen_excl = cargar_resumen_exclusiones()
+    if not resumen_excl.empty:
+        with st.expander("🚫 Registros excluidos por motivo"):
+            tabla_excl = (
+                resumen_excl.groupby("MOTIVO")["REGISTROS"].sum()
+                .rename(index=ETIQUETAS_MOTIVO)
+                .rename_axis("Motivo").reset_index(name="Registros")
+            )
+            st.table(tabla_excl.style.format({"Registros": "{:,.0f}"}))
+
     # ======================================================
     # 📅 GRÁFICO DE TENDENCIA MENSUAL 
     # ======================================================
@@ -153,34 +260,7 @@ with tabs[0]:
     unsafe_allow_html=True
     )
 
-    resumen_pct = calcular_resumen_mensual(df_distancia)
-    fig3, ax3 = plt.subplots(figsize=(9, 4))
-
-    ax3.plot(
-        resumen_pct.index, 
-        resumen_pct['INCONSISTENTE'], 
-        marker='o', linewidth=3, 
-        color='#E74C3C', label='Visitas fuera del rango'
-    )
-
-    ax3.fill_between(
-        resumen_pct.index,
-        resumen_pct['INCONSISTENTE'],
-        color='#E74C3C', alpha=0.15
-    )
-
-    for x, y in zip(resumen_pct.index, resumen_pct['INCONSISTENTE']):
-        ax3.text(x, y + 0.15, f"{y:.1f}%", color='#C0392B', fontsize=9, ha='center', fontweight='bold')
-
-    y_min = max(0, resumen_pct['INCONSISTENTE'].min() - 1.5)
-    y_max = resumen_pct['INCONSISTENTE'].max() + 1
-    ax3.set_ylim(y_min, y_max)
-    ax3.set_ylabel('% de visitas fuera del rango', fontsize=11, color='#555')
-    ax3.set_xlabel('Mes', fontsize=11, color='#555')
-    ax3.grid(alpha=0.3)
-    ax3.spines['top'].set_visible(False)
-    ax3.spines['right'].set_visible(False)
-    st.pyplot(fig3)
+    st.image(grafico_tendencia_mensual(VERSION_DATOS), width="stretch")
 
     st.markdown(
         """
@@ -193,47 +273,23 @@ with tabs[0]:
 # ======================================================
 # 🏙️ TAB 2 – DISTRIBUCIÓN POR UT
 # ======================================================
-with tabs[1]:
-    st.markdown("""
+if seccion == SECCIONES[1]:
+    mes_priorizadas = UT_PRIORIZADAS.get("month", "2025-09")
+    st.markdown(f"""
     <h3 style='line-height:1.1; margin-bottom:0;'>
     Porcentaje de visitas fuera del rango de ubicación del hogar,<br>
-    según UT priorizadas (Septiembre 2025)
+    según UT priorizadas ({nombre_mes(mes_priorizadas)})
     </h3>
     """, unsafe_allow_html=True)            
 
-    df_sep = df_distancia[df_distancia['MES'] == '2025-09']
-    df_sep = df_sep[df_sep['DISTANCIA_KM'] <= 50]
-    ut_priorizadas = [
-        "CAJAMARCA", "HUANUCO", "LORETO - IQUITOS", "PUNO",
-        "JUNIN", "LORETO - YURIMAGUAS", "AMAZONAS - CONDORCANQUI", "ICA"
-    ]
-
-    df_sep = df_sep[df_sep['UT'].isin(ut_priorizadas)]
-    resumen_ut = df_sep.groupby(['UT', 'VALIDA_BASE']).size().unstack(fill_value=0)
-    resumen_ut_pct = resumen_ut.div(resumen_ut.sum(axis=1), axis=0) * 100
-    resumen_ut_pct = resumen_ut_pct.rename(columns={
-        'VALIDA': 'Válida',
-        'INCONSISTENTE': 'Fuera del rango'
-    })[['Válida', 'Fuera del rango']]
-
-    resumen_ut_pct = resumen_ut_pct.sort_values('Fuera del rango', ascending=True)
-    fig2, ax2 = plt.subplots(figsize=(10, 6))
-    resumen_ut_pct.plot(kind='barh', stacked=True, ax=ax2, color=['#2E86C1', '#E74C3C'], edgecolor='white')
-
-    for i, (valida, inconsistente) in enumerate(zip(resumen_ut_pct['Válida'], resumen_ut_pct['Fuera del rango'])):
-        ax2.text(valida / 2, i, f"{valida:.1f}%", color='white', va='center', ha='center', fontsize=9)
-        ax2.text(valida + inconsistente / 2, i, f"{inconsistente:.1f}%", color='black', va='center', ha='center', fontsize=9)
-
-    ax2.set_xlabel("Porcentaje de visitas (%)")
-    ax2.set_ylabel("Unidad Territorial (UT)")
-    ax2.legend(title="Categoría de visita", loc='upper center', bbox_to_anchor=(0.5, 1.13), ncol=2)
-    ax2.grid(axis='x', alpha=0.3)
-    st.pyplot(fig2)
+    # Lista y mes en config.yaml (priority_uts)
+    ut_priorizadas = tuple(UT_PRIORIZADAS.get("uts", []))
+    st.image(grafico_ut_priorizadas(VERSION_DATOS, mes_priorizadas, ut_priorizadas), width="stretch")
 
     st.markdown(
-        """
+        f"""
         <p style='font-size:12px;color:gray;'>
-        Nota: Se excluyen registros con distancia mayor a 50 km (valores atípicos). 
+        Nota: Se excluyen registros con coordenadas inválidas y con distancia mayor a {UMBRAL_ATIPICO_KM:g} km (valores atípicos). 
         </p>
         """,
         unsafe_allow_html=True
@@ -242,33 +298,17 @@ with tabs[1]:
 # ======================================================
 # 🗺️ TAB 3 – MAPA NACIONAL 
 # ======================================================
-with tabs[2]:
+if seccion == SECCIONES[2]:
     st.markdown("### Porcentaje de hogares con visitas domiciliarias fuera del rango, según departamentos- 2025")
+    folium = importar("folium")
+    linear = importar("branca.colormap").linear
+    st_folium = importar("streamlit_folium").st_folium
 
     def limpiar_nombre(dep):
         return dep.strip().upper().replace("Á","A").replace("É","E").replace("Í","I").replace("Ó","O").replace("Ú","U")
 
-    df_distancia['DEPARTAMENTO'] = df_distancia['DEPARTAMENTO'].apply(limpiar_nombre)
-    gdf['NOMBDEP'] = gdf['NOMBDEP'].apply(limpiar_nombre)
-
-    df_small = df_distancia[df_distancia['DISTANCIA_KM'] <= 50][['CO_HOGAR','DEPARTAMENTO','VALIDA_BASE']]
-
-    pct_incons_por_hogar = (
-        df_small.groupby('CO_HOGAR')['VALIDA_BASE']
-        .apply(lambda x: (x == 'INCONSISTENTE').mean() * 100)
-        .reset_index()
-        .rename(columns={'VALIDA_BASE': 'PctInconsistente'})
-    )
-
-    hogares_problematicos = pct_incons_por_hogar.copy()
-    hogares_problematicos['EsProblematico'] = hogares_problematicos['PctInconsistente'] >= 50
-
-    df_hogar_depto = df_small[['CO_HOGAR','DEPARTAMENTO']].drop_duplicates()
-    df_merge = df_hogar_depto.merge(hogares_problematicos[['CO_HOGAR','EsProblematico']], on='CO_HOGAR')
-
-    pct_hogar_problema_depto = (
-        df_merge.groupby('DEPARTAMENTO')['EsProblematico'].mean() * 100
-    ).reset_index().rename(columns={'EsProblematico':'PctHogaresProblematicos'})
+    limites = cargar_limites()
+    pct_hogar_problema_depto = consultar("hogares_problematicos_depto", VERSION_DATOS)
 
     promedio_nacional = pct_hogar_problema_depto['PctHogaresProblematicos'].mean()
     top5 = pct_hogar_problema_depto.sort_values('PctHogaresProblematicos', ascending=False).head(7)
@@ -278,10 +318,17 @@ with tabs[2]:
         pct_hogar_problema_depto['PctHogaresProblematicos'] >= p90
     ]['DEPARTAMENTO'].tolist()
 
-    gdf_merged = gdf.merge(pct_hogar_problema_depto, left_on='NOMBDEP', right_on='DEPARTAMENTO', how='left')
-    gdf_merged['PctHogaresProblematicos_fmt'] = gdf_merged['PctHogaresProblematicos'].apply(
-        lambda x: f"{x:.1f}%" if pd.notnull(x) else "Sin dato"
-    )
+    # Copia del GeoJSON con el % de cada departamento en sus propiedades
+    pct_por_depto = pct_hogar_problema_depto.set_index('DEPARTAMENTO')['PctHogaresProblematicos'].to_dict()
+    limites_pct = {**limites, "features": []}
+    for feat in limites["features"]:
+        nombre = limpiar_nombre(feat["properties"]["NOMBDEP"])
+        pct = pct_por_depto.get(nombre)
+        limites_pct["features"].append({**feat, "properties": {
+            "NOMBDEP": nombre,
+            "PctHogaresProblematicos": pct,
+            "PctHogaresProblematicos_fmt": f"{pct:.1f}%" if pct is not None else "Sin dato",
+        }})
 
     m = folium.Map(
         location=[-9.19, -75.0152],
@@ -293,7 +340,7 @@ with tabs[2]:
     )
 
     folium.GeoJson(
-        gdf.boundary,
+        limites,
         name="Borde nacional",
         style_function=lambda x: {'color': 'black', 'weight': 1.2, 'fillOpacity': 0}
     ).add_to(m)
@@ -318,7 +365,7 @@ with tabs[2]:
     )
 
     folium.GeoJson(
-        gdf_merged,
+        limites_pct,
         name='Visitas inconsistentes',
         style_function=style_function,
         tooltip=tooltip,
@@ -330,7 +377,8 @@ with tabs[2]:
     col1, col2 = st.columns([3, 1])
 
     with col1:
-        st_folium(m, width=800, height=550)
+        with perfil.medir("folium (serialización del mapa)"):
+            st_folium(m, width=800, height=550)
 
     with col2:     
         st.markdown(
@@ -352,15 +400,16 @@ with tabs[2]:
         top5_display.index = top5_display.index + 1
         top5_display.index.name = "N°"
 
-        st.table(
-            top5_display.style
-                .format({'%': '{:.1f}%'})
-                .set_table_styles([
-                    {'selector': 'th', 'props' : [('text-align', 'center')]}
-                ])
-                .set_properties(subset=['%'], **{'text-align': 'center'})
-                .set_properties(subset=['DEPARTAMENTO'],**{'text-align': 'left'})
-        )
+        with perfil.medir("Styler top 7 departamentos"):
+            st.table(
+                top5_display.style
+                    .format({'%': '{:.1f}%'})
+                    .set_table_styles([
+                        {'selector': 'th', 'props' : [('text-align', 'center')]}
+                    ])
+                    .set_properties(subset=['%'], **{'text-align': 'center'})
+                    .set_properties(subset=['DEPARTAMENTO'],**{'text-align': 'left'})
+            )
 
     st.markdown(
         f"""
@@ -368,20 +417,79 @@ with tabs[2]:
         <b>Periodo analizado:</b> 2025 Acumulado anual.<br>
         <b>Promedio nacional:</b> {promedio_nacional:.1f}% de hogares con ≥50% de visitas inconsistentes.<br>
         <b>Interpretación:</b> Los tonos rojos representan mayor concentración de hogares con registros de visitas fuera del rango de validez territorial.<br>
-        <b>Nota metodológica:</b> Se excluyen del análisis los registros con distancias >50 km por considerarse valores atípicos.<br>
+        <b>Nota metodológica:</b> Se excluyen del análisis los registros con coordenadas inválidas y con distancias >{UMBRAL_ATIPICO_KM:g} km por considerarse valores atípicos.<br>
         Los umbrales de validez territorial son:  ≤ 0.5 km (urbano), ≤ 2 km (andino), ≤ 5 km (amazónico).
         </p>
         """,
         unsafe_allow_html=True
     )
+
+    # ======================================================
+    # 🔥 MAPA DE CALOR POR CELDAS (pre-agregado en el ETL)
+    # ======================================================
+    grilla = cargar_grilla()
+    if not grilla.empty:
+        pdk = importar("pydeck")
+        st.markdown("### Concentración de visitas fuera del rango dentro de cada UT")
+
+        resoluciones = sorted(grilla["RES_DEG"].unique(), reverse=True)  # de gruesa a fina
+        colm1, colm2 = st.columns(2)
+        with colm1:
+            zona_mapa = st.selectbox("Zona del mapa:", ["Nacional"] + sorted(grilla["UT"].unique()), key="zona_grilla")
+        with colm2:
+            idx_res = 0 if zona_mapa == "Nacional" else min(1, len(resoluciones) - 1)
+            res_sel = st.selectbox(
+                "Tamaño de celda:", resoluciones, index=idx_res, key=f"res_grilla_{idx_res}",
+                format_func=lambda r: f"~{r * 111:.0f} km" if r * 111 >= 1.5 else f"~{r * 111:.1f} km"
+            )
+
+        celdas = grilla[grilla["RES_DEG"] == res_sel]
+        if zona_mapa != "Nacional":
+            celdas = celdas[celdas["UT"] == zona_mapa]
+        celdas = (
+            celdas.groupby(["CELDA_LAT", "CELDA_LON", "LAT", "LON"], observed=True)[["TOTAL", "INCONSISTENTES"]]
+            .sum().reset_index()
+        )
+        celdas["PCT"] = (celdas["INCONSISTENTES"] / celdas["TOTAL"] * 100).round(1)
+        mitad = float(res_sel) / 2
+        celdas["poligono"] = [
+            [[lon - mitad, lat - mitad], [lon + mitad, lat - mitad], [lon + mitad, lat + mitad], [lon - mitad, lat + mitad]]
+            for lat, lon in zip(celdas["LAT"], celdas["LON"])
+        ]
+        # amarillo → rojo según % fuera de rango
+        celdas["color"] = [[231, int(200 - 1.5 * p), 60, 170] for p in celdas["PCT"].clip(0, 100)]
+
+        if zona_mapa == "Nacional":
+            vista = pdk.ViewState(latitude=-9.19, longitude=-75.0152, zoom=4.3)
+        else:
+            vista = pdk.ViewState(latitude=float(celdas["LAT"].mean()), longitude=float(celdas["LON"].mean()), zoom=7)
+
+        capa = pdk.Layer(
+            "PolygonLayer", celdas[["poligono", "color", "TOTAL", "INCONSISTENTES", "PCT"]],
+            get_polygon="poligono", get_fill_color="color", stroked=False, pickable=True
+        )
+        with perfil.medir("pydeck (serialización del mapa de calor)"):
+            st.pydeck_chart(pdk.Deck(
+                layers=[capa], initial_view_state=vista, map_style=None,
+                tooltip={"html": "<b>{PCT}%</b> fuera de rango<br>{INCONSISTENTES} de {TOTAL} visitas"}
+            ))
+        st.markdown(
+            """
+            <p style='font-size:12px;color:gray;'>
+            Cada celda resume las visitas registradas dentro de ella (sin mostrar puntos individuales).
+            El color va de amarillo (pocas visitas fuera de rango) a rojo (la mayoría fuera de rango).
+            </p>
+            """,
+            unsafe_allow_html=True
+        )
 # ======================================================
 # 👤 TAB 4 – GESTOR LOCAL (Versión compacta tipo Power BI)
 # ======================================================
 
 # ======================================================
-# 🧑‍💼 FUNCIÓN: mostrar_detalle_gestor(df)
+# 🧑‍💼 FUNCIÓN: mostrar_detalle_gestor()
 # ======================================================
-def mostrar_detalle_gestor(df):
+def mostrar_detalle_gestor():
     
     st.markdown("---")
     st.markdown("## 🧩 Detalle por Gestor Local")
@@ -390,14 +498,24 @@ def mostrar_detalle_gestor(df):
     dni_input = st.text_input("🔎 Ingrese DNI del Gestor Local:", "")
 
     if dni_input:
-        df_gestor = df[df["DNI_GEL"].astype(str) == str(dni_input)]
+        # Consultas al almacén de estadísticas (tramo del gestor, sin recorrer las visitas)
+        almacen = almacen_actual()
+        dni = pd.to_numeric(dni_input.strip(), errors="coerce")
+        if pd.isna(dni) or not almacen.disponible():
+            st.warning("⚠️ No se encontraron registros para el DNI ingresado.")
+            return
+        with perfil.medir("almacén: tramos del gestor"):
+            gestor = almacen.tramo("gestores", int(dni))
+            hogares = almacen.tramo("hogares", int(dni))
+            miembros = almacen.tramo("miembros", int(dni))
 
-        if df_gestor.empty:
+        if gestor.empty:
             st.warning("⚠️ No se encontraron registros para el DNI ingresado.")
             return
+        orden_periodos = ORDEN_PERIODOS
 
         # 2️⃣ Nombre del gestor
-        nombre = df_gestor["GEL"].iloc[0] if not df_gestor["GEL"].isna().all() else "No registrado"
+        nombre = gestor["GEL"].dropna().iloc[-1] if gestor["GEL"].notna().any() else "No registrado"
         st.markdown(f"### 👤 {nombre}")
 
         # ---------------------------
@@ -426,7 +544,7 @@ def mostrar_detalle_gestor(df):
             st.markdown(f"""
             <div style="background:linear-gradient(135deg, #CA6F1E, #D68910); {card_style_small}">
                 <h6 style="margin-bottom:-4px; font-size:15px; font-weight:600;">🏠 Hogares</h6>
-                <h2 style="margin:0; font-size:40px; font-weight:500; line-height:0.1;">{df_gestor["CO_HOGAR"].nunique():,}</h2>
+                <h2 style="margin:0; font-size:40px; font-weight:500; line-height:0.1;">{hogares["CO_HOGAR"].nunique():,}</h2>
             </div>
             """, unsafe_allow_html=True)
 
@@ -434,7 +552,7 @@ def mostrar_detalle_gestor(df):
             st.markdown(f"""
             <div style="background:linear-gradient(135deg, #B03A2E, #CD6155); {card_style_small}">
                 <h6 style="margin-bottom:-4px; font-size:15px; font-weight:600;">🤰 Gestantes</h6>
-                <h2 style="margin:0; font-size:40px; font-weight:500; line-height:0.1;">{df_gestor.loc[df_gestor["TIPO_MO"] == "GESTANTE", "DNI"].nunique():,}</h2>
+                <h2 style="margin:0; font-size:40px; font-weight:500; line-height:0.1;">{miembros.loc[miembros["TIPO_MO"] == "GESTANTE", "DNI"].nunique():,}</h2>
             </div>
             """, unsafe_allow_html=True)
 
@@ -442,7 +560,7 @@ def mostrar_detalle_gestor(df):
             st.markdown(f"""
             <div style="background:linear-gradient(135deg, #884EA0, #AF7AC5); {card_style_small}">
                 <h6 style="margin-bottom:-4px; font-size:15px; font-weight:600;">👶 Niños</h6>
-                <h2 style="margin:0; font-size:40px; font-weight:500; line-height:0.1;">{df_gestor.loc[df_gestor["TIPO_MO"] == "NIÑO", "DNI"].nunique():,}</h2>
+                <h2 style="margin:0; font-size:40px; font-weight:500; line-height:0.1;">{miembros.loc[miembros["TIPO_MO"] == "NIÑO", "DNI"].nunique():,}</h2>
             </div>
             """, unsafe_allow_html=True)
 
@@ -450,7 +568,7 @@ def mostrar_detalle_gestor(df):
             st.markdown(f"""
             <div style="background:linear-gradient(135deg, #2471A3, #5499C7); {card_style_small}">
                 <h6 style="margin-bottom:-4px; font-size:15px; font-weight:600;">🧒 Adolescentes</h6>
-                <h2 style="margin:0; font-size:40px; font-weight:500; line-height:0.1;">{df_gestor.loc[df_gestor["TIPO_MO"] == "ADOLESCENTE", "DNI"].nunique():,}</h2>
+                <h2 style="margin:0; font-size:40px; font-weight:500; line-height:0.1;">{miembros.loc[miembros["TIPO_MO"] == "ADOLESCENTE", "DNI"].nunique():,}</h2>
             </div>
             """, unsafe_allow_html=True)
 
@@ -463,14 +581,13 @@ def mostrar_detalle_gestor(df):
             st.markdown("#### 📅 Visitas fuera de rango por periodo operativo")
 
             visitas_periodo = (
-                df_gestor.groupby("MES")["VALIDA_BASE"]
-                .agg(
-                    Total="count",
-                    Validas=lambda x: (x == "VALIDA").sum(),
-                    Inconsistentes=lambda x: (x == "INCONSISTENTE").sum()
-                )
+                gestor.groupby("PERIODO")[["VALIDAS", "INCONSISTENTES"]].sum()
+                .reindex([p for p in orden_periodos if p in set(gestor["PERIODO"].dropna())])
+                .rename(columns={"VALIDAS": "Validas", "INCONSISTENTES": "Inconsistentes"})
+                .rename_axis("PERIODO")
                 .reset_index()
             )
+            visitas_periodo["Total"] = visitas_periodo["Validas"] + visitas_periodo["Inconsistentes"]
 
             visitas_periodo["% Válidas"] = (
                 visitas_periodo["Validas"] / visitas_periodo["Total"] * 100
@@ -478,7 +595,7 @@ def mostrar_detalle_gestor(df):
             visitas_periodo["% Inconsistentes"] = (
                 visitas_periodo["Inconsistentes"] / visitas_periodo["Total"] * 100
             ).round(1)
-            visitas_periodo = visitas_periodo.rename(columns={"MES": "Periodo"})
+            visitas_periodo = visitas_periodo.rename(columns={"PERIODO": "Periodo"})
 
             visitas_periodo["Visitas válidas"] = visitas_periodo["Validas"]
             visitas_periodo["Visitas fuera de rango"] = visitas_periodo["Inconsistentes"]
@@ -502,55 +619,29 @@ def mostrar_detalle_gestor(df):
         with col_der:
             st.markdown("#### 📈 Tendencia de % visitas fuera de rango")
 
-            df_trend = visitas_periodo.copy()
-            df_trend["Periodo"] = df_trend["Periodo"].astype(str)
-
-            fig, ax = plt.subplots(figsize=(7, 3.3))
-            ax.plot(
-                df_trend["Periodo"],
-                df_trend["% Inconsistentes"],
-                marker='o', linewidth=3, color='#E74C3C', label='% fuera de rango'
-            )
-
-            ax.fill_between(
-                df_trend["Periodo"],
-                df_trend["% Inconsistentes"],
-                color='#E74C3C',
-                alpha=0.15
-            )
-
-            for x, y in zip(df_trend["Periodo"], df_trend["% Inconsistentes"]):
-                ax.text(x, y + 0.3, f"{y:.1f}%", color='#C0392B', fontsize=9, ha='center', fontweight='bold')
-
-            ax.set_ylabel('% de visitas fuera de rango', fontsize=11, color='#555')
-            ax.set_xlabel('Periodo (MES)', fontsize=11, color='#555')
-            ax.grid(alpha=0.3)
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            plt.xticks(rotation=45, ha='right')
-            ax.legend()
-
-            st.pyplot(fig)
+            st.image(grafico_tendencia_gestor(
+                tuple(visitas_periodo["Periodo"].astype(str)), tuple(visitas_periodo["% Inconsistentes"])
+            ), width="stretch")
 
         # ---------------------------
         # 🏠 Listado de hogares
         # ---------------------------
         st.markdown("#### 🏠 Hogares con mayor proporción de visitas fuera de rango")
 
-        periodos = sorted(df_gestor["MES"].astype(str).unique())
+        periodos = [p for p in orden_periodos if p in set(hogares["PERIODO"].dropna())]
         periodo_sel_hogar = st.selectbox("Selecciona un periodo:", ["-- Acumulado --"] + periodos)
 
-        df_filtrado = df_gestor.copy()
+        df_filtrado = hogares
         if periodo_sel_hogar != "-- Acumulado --":
-            df_filtrado = df_filtrado[df_filtrado["MES"].astype(str) == periodo_sel_hogar]
+            df_filtrado = df_filtrado[df_filtrado["PERIODO"] == periodo_sel_hogar]
 
         resumen_hogar = (
             df_filtrado.groupby("CO_HOGAR")
             .agg(
-                Tipo_MO=("TIPO_MO", lambda x: ", ".join(sorted(set(x)))),
-                Escala=("ESCALA_PRIORIZACION", lambda x: ", ".join(map(str, sorted(set(x))))),
-                Visitas_validas=("VALIDA_BASE", lambda x: (x == "VALIDA").sum()),
-                Visitas_inconsistentes=("VALIDA_BASE", lambda x: (x == "INCONSISTENTE").sum())
+                Tipo_MO=("TIPO_MO", lambda x: ", ".join(sorted(set(x.dropna())))),
+                Escala=("ESCALA_PRIORIZACION", lambda x: ", ".join(map(str, sorted(set(x.dropna()))))),
+                Visitas_validas=("VALIDAS", "sum"),
+                Visitas_inconsistentes=("INCONSISTENTES", "sum")
             )
             .reset_index()
         )
@@ -595,7 +686,7 @@ def mostrar_detalle_gestor(df):
 
         # 💾 Botón de descarga Excel
         towrite = io.BytesIO()
-        with pd.ExcelWriter(towrite, engine="xlsxwriter") as writer:
+        with perfil.medir("Excel de hogares"), pd.ExcelWriter(towrite, engine="xlsxwriter") as writer:
             resumen_hogar.to_excel(writer, index=False, sheet_name="Hogares")
         towrite.seek(0)
         b64 = base64.b64encode(towrite.read()).decode()
@@ -605,39 +696,25 @@ def mostrar_detalle_gestor(df):
 # ======================================================
 # BLOQUE PRINCIPAL DE LA PESTAÑA 4
 # ======================================================
-with tabs[3]:
+if seccion == SECCIONES[3]:
 
     # 1️⃣ Selectores de filtro
     colf1, colf2 = st.columns(2)
     with colf1:
         ut_sel = st.selectbox(
             "Selecciona una Unidad Territorial (UT):",
-            ["-- Selecciona --"] + sorted(df_distancia["UT"].unique()),
+            ["-- Selecciona --"] + consultar("uts", VERSION_DATOS)["UT"].tolist(),
             key="ut_select"
         )
     with colf2:
         periodo_sel = st.selectbox(
-            "Selecciona un periodo (MES):",
-            ["-- Acumulado --"] + sorted(df_distancia["MES"].astype(str).unique()),
+            "Selecciona un periodo operativo:",
+            ["-- Acumulado --"] + periodos_con_datos(VERSION_DATOS),
             key="period_select"
         )
 
-    @st.cache_data
-    def calcular_rankings(df, ut_sel, periodo_sel):
-        df_rank = df[df["UT"] == ut_sel].copy()
-        if periodo_sel != "-- Acumulado --":
-            df_rank = df_rank[df_rank["MES"].astype(str) == periodo_sel]
-
-        resumen = (
-            df_rank.groupby(["DNI_GEL", "GEL", "VALIDA_BASE"])
-            .size()
-            .unstack(fill_value=0)
-            .reset_index()
-        )
-
-        for c in ["VALIDA", "INCONSISTENTE"]:
-            if c not in resumen.columns:
-                resumen[c] = 0
+    def calcular_rankings(ut_sel, periodo_sel):
+        resumen = almacen_actual().ranking(ut_sel, None if periodo_sel == "-- Acumulado --" else periodo_sel)
 
         resumen["TOTAL"] = resumen["VALIDA"] + resumen["INCONSISTENTE"]
         resumen["%_Inconsistencia"] = (resumen["INCONSISTENTE"] / resumen["TOTAL"] * 100).round(1)
@@ -649,11 +726,8 @@ with tabs[3]:
         return top_incons
 
     if ut_sel != "-- Selecciona --":
-        df_ut = df_distancia[df_distancia["UT"] == ut_sel]
-        if periodo_sel != "-- Acumulado --":
-            df_ut = df_ut[df_ut["MES"].astype(str) == periodo_sel]
-
-        top_incons = calcular_rankings(df_distancia, ut_sel, periodo_sel)
+        with perfil.medir("calcular_rankings"):
+            top_incons = calcular_rankings(ut_sel, periodo_sel)
 
         st.markdown(f"### 🔴 Ranking de gestores con visitas fuera de rango ({ut_sel})")
 
@@ -668,20 +742,21 @@ with tabs[3]:
             .reset_index(drop=True)
         )
 
-        st.table(
-            tabla_rank
-            .head(10)
-            .style.format({
-                "%": "{:.1f}",
-                "Visitas válidas": "{:,.0f}",
-                "Visitas fuera de rango": "{:,.0f}",
-                "Total de visitas": "{:,.0f}"
-            })
-            .set_properties(subset=["%"], **{"text-align": "center"})
-        )
+        with perfil.medir("Styler del ranking"):
+            st.table(
+                tabla_rank
+                .head(10)
+                .style.format({
+                    "%": "{:.1f}",
+                    "Visitas válidas": "{:,.0f}",
+                    "Visitas fuera de rango": "{:,.0f}",
+                    "Total de visitas": "{:,.0f}"
+                })
+                .set_properties(subset=["%"], **{"text-align": "center"})
+            )
 
         towrite = io.BytesIO()
-        with pd.ExcelWriter(towrite, engine="xlsxwriter") as writer:
+        with perfil.medir("Excel del ranking"), pd.ExcelWriter(towrite, engine="xlsxwriter") as writer:
             tabla_rank.to_excel(writer, index=False, sheet_name="Ranking Gestores")
         towrite.seek(0)
         b64 = base64.b64encode(towrite.read()).decode()
@@ -691,4 +766,7 @@ with tabs[3]:
     else:
         st.info("Selecciona una Unidad Territorial para visualizar los rankings de gestores.")
 
-    mostrar_detalle_gestor(df_distancia)
\ No newline at end of file
+    perfil.seccion("Detalle por gestor")
+    mostrar_detalle_gestor()
+
+perfil.cerrar()
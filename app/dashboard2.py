@@ -8,6 +8,17 @@ import numpy as np
 import io
 import base64
 import os
+import sys
+import pydeck as pdk
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.limites import TeselasLimites
+from scripts.periodos import leer_periodos
+from scripts.exclusiones import MOTIVOS_DASHBOARD, etiquetas_motivo, leer_resumen_exclusiones
+from scripts.riesgo import leer_niveles, clasificar_riesgo
+from scripts.busqueda import IndiceCodigos
+from scripts.perfil_render import PerfilRender
 
 
 # ======================
@@ -18,48 +29,100 @@ st.set_page_config(page_title="Verificación Geográfica – UCC", layout="wide"
 COLOR_PRINCIPAL = "#004C97"
 COLOR_BORDE = "#E8EEF5"
 
+with open(os.path.join("pipeline", "config.yaml"), "r", encoding="utf-8") as f:
+    CONFIG = yaml.safe_load(f)
+
+# Niveles de riesgo de gestores (risk_levels en config.yaml)
+NIVELES_RIESGO, LIMITES_RIESGO, MIN_VISITAS = leer_niveles(CONFIG)
+EMOJI_RIESGO = {"bajo": "🟢", "medio": "🟡", "alto": "🟠", "critico": "🔴"}
+FONDO_RIESGO = {"bajo": "#E8F8F5", "medio": "#FCF3CF", "alto": "#FDEBD0", "critico": "#FADBD8"}
+ETIQUETA_RIESGO = {"bajo": "Bajo", "medio": "Medio", "alto": "Alto", "critico": "Crítico"}
+LIMITE_RIESGO = dict(zip(NIVELES_RIESGO, LIMITES_RIESGO))
+# Hogares distintos desde un mismo punto para marcar visitas co-ubicadas (colocation en config.yaml)
+MIN_HOGARES_COLOC = CONFIG.get("colocation", {}).get("min_households", 5)
+
+# Perfil opcional (UCC_PERFIL=1 o ?perfil=1): tiempos por sección y aciertos de caché
+perfil = PerfilRender("dashboard2", CONFIG)
+
 # ======================================================
 # 📂 CARGA DE DATOS (sin dependencias externas)
 # ======================================================
-@st.cache_data(show_spinner=True)
-def cargar_datos():
-    ruta_archivo = os.path.join("data", "processed", "df_seguro.csv.gz")
+RUTA_DATOS = os.path.join("data", "processed", "df_seguro.csv.gz")
 
-    if not os.path.exists(ruta_archivo):
+# persist="disk": la caché sobrevive reinicios y la llena scripts/precalentar.py;
+# `version` (mtime del archivo) separa cada publicación del ETL.
+@perfil.cache(st.cache_data(show_spinner=True, persist="disk"))
+def cargar_datos(version):
+    if not os.path.exists(RUTA_DATOS):
         st.error("❌ No se encontró el archivo 'df_seguro.csv.gz' en la carpeta 'data/processed'.")
         st.stop()
 
     with st.spinner("Cargando datos, por favor espera..."):
-        df = pd.read_csv(ruta_archivo, compression="gzip")
+        df = pd.read_csv(RUTA_DATOS, compression="gzip")
 
     # Limpieza básica
     df["CATEGORIA"] = df["CATEGORIA"].str.upper().str.strip()
     if not pd.api.types.is_datetime64_any_dtype(df["FECHA_REGISTRO_ATENCION"]):
         df["FECHA_REGISTRO_ATENCION"] = pd.to_datetime(df["FECHA_REGISTRO_ATENCION"], errors="coerce")
+    # Solo la visita canónica por hogar y fecha (el ETL ya resolvió duplicados)
+    if "ES_CANONICA" in df.columns:
+        df = df[df["ES_CANONICA"]].reset_index(drop=True)
+    # Ordenado por periodo: cada periodo queda como un tramo contiguo de filas
+    # (dentro del periodo se conserva el orden del ETL: DISTANCIA_KM descendente)
+    df["PERIODO"] = pd.Categorical(df["PERIODO"], categories=list(PERIODOS), ordered=True)
+    df = df.iloc[np.argsort(df["PERIODO"].cat.codes.to_numpy(), kind="stable")].reset_index(drop=True)
 
     st.caption(f"✅ Datos cargados correctamente: {len(df):,} registros.")
     return df
 
-df = cargar_datos()
+@perfil.cache(st.cache_data(show_spinner=False))
+def cargar_resumen_exclusiones():
+    """Exclusiones del ETL, solo con los motivos que este dashboard descarta."""
+    return leer_resumen_exclusiones(CONFIG["audit"].get("out_dir", "audit"), MOTIVOS_DASHBOARD["dashboard2"])
+
+ETIQUETAS_MOTIVO = etiquetas_motivo(CONFIG)
 
 # ======================================================
 # 📅 PERIODOS OPERATIVOS
 # ======================================================
-PERIODOS = {
-    "DICIEMBRE_2024": ("2024-12-18", "2025-01-15"),
-    "ENERO_2025": ("2025-01-16", "2025-02-12"),
-    "FEBRERO_2025": ("2025-02-13", "2025-03-19"),
-    "MARZO_2025": ("2025-03-20", "2025-04-15"),
-    "ABRIL_2025": ("2025-04-16", "2025-05-14"),
-    "MAYO_2025": ("2025-05-15", "2025-06-11"),
-    "JUNIO_2025": ("2025-06-12", "2025-07-07"),
-    "JULIO_2025": ("2025-07-08", "2025-08-12"),
-    "AGOSTO_2025": ("2025-08-13", "2025-09-16"),
-}
+# Definidos en pipeline/config.yaml; el ETL ya asigna la columna PERIODO
+PERIODOS = {nombre: (inicio.strftime("%Y-%m-%d"), fin.strftime("%Y-%m-%d"))
+            for nombre, inicio, fin in leer_periodos(CONFIG)}
+
+perfil.seccion("Carga de datos")
+VERSION_DATOS = os.path.getmtime(RUTA_DATOS) if os.path.exists(RUTA_DATOS) else 0
+df = cargar_datos(VERSION_DATOS)
+
+
+def rango_periodo(df, periodo):
+    """Posiciones [inicio, fin) del periodo (búsqueda binaria sobre los códigos ordenados)."""
+    codigo = list(PERIODOS).index(periodo)
+    return np.searchsorted(df["PERIODO"].cat.codes.to_numpy(), [codigo, codigo + 1])
+
+
+def filas_periodo(df, periodo):
+    inicio, fin = rango_periodo(df, periodo)
+    return df.iloc[inicio:fin]
+
+
+@perfil.cache(st.cache_resource(show_spinner=False))
+def orden_distancia(_df, version):
+    """Todo el año por DISTANCIA_KM descendente: (posiciones, rango de cada posición)."""
+    orden = np.argsort(-_df["DISTANCIA_KM"].fillna(-np.inf).to_numpy(), kind="stable")
+    rango = np.empty_like(orden)
+    rango[orden] = np.arange(len(orden))
+    return orden, rango
+
+
+@perfil.cache(st.cache_resource(show_spinner=False))
+def indice_hogares(_df, version):
+    """Índice de CO_HOGAR sobre el df cargado; `version` (mtime del archivo) invalida la caché."""
+    return IndiceCodigos(_df["CO_HOGAR"].to_numpy())
 
 # ======================================================
 # 🎛️ ENCABEZADO Y FILTROS
 # ======================================================
+perfil.seccion("Encabezado y filtros")
 st.markdown(f"""
 <h1 style="text-align:center;color:{COLOR_PRINCIPAL};margin-bottom:6px;">
 Verificación Geográfica de Visitas Domiciliarias (prioridad 4 y 5)
@@ -86,6 +149,7 @@ with colf3:
 
 if periodo_sel == "-- Selecciona --":
     st.info("Selecciona un periodo operativo para visualizar los resultados.")
+    perfil.cerrar()
     st.stop()
 
 fecha_inicio_str, fecha_fin_str = PERIODOS[periodo_sel]
@@ -95,20 +159,18 @@ fecha_fin = pd.to_datetime(fecha_fin_str)
 # ======================================================
 # 🧮 FILTRADO BASE
 # ======================================================
-@st.cache_data(show_spinner=False)
-def filtrar_periodo_prioridad(df, fi, ff, ut, dist):
-    dfp = df[
-        (df["FECHA_REGISTRO_ATENCION"] >= fi)
-        & (df["FECHA_REGISTRO_ATENCION"] <= ff)
-        & (df["ESCALA_PRIORIZACION"].isin([4, 5]))
-    ].copy()
+def filtrar_periodo_prioridad(df, periodo, ut, dist):
+    dfp = filas_periodo(df, periodo)
+    dfp = dfp[dfp["ESCALA_PRIORIZACION"].isin([4, 5])].copy()
     if ut != "-- Todas --":
         dfp = dfp[dfp["UT"] == ut]
     if dist != "-- Todos --":
         dfp = dfp[dfp["DISTRITO"] == dist]
     return dfp
 
-df_periodo = filtrar_periodo_prioridad(df, fecha_inicio, fecha_fin, ut_sel, dist_sel)
+perfil.seccion("Filtrado base")
+with perfil.medir("filtrar_periodo_prioridad"):
+    df_periodo = filtrar_periodo_prioridad(df, periodo_sel, ut_sel, dist_sel)
 
 # ======================================================
 # 🚨 VALIDACIÓN DE UBICACIÓN
@@ -117,6 +179,8 @@ def marcar_alerta(row):
     try:
         categoria = str(row["CATEGORIA"]).upper().strip()
         distancia = float(row["DISTANCIA_KM"])
+        if np.isnan(distancia):  # coordenadas no utilizables: igual que VALIDA_BASE
+            return "🔴 Ubicación no válida"
         if categoria == "URBANO" and distancia > 0.5:
             return "🔴 Ubicación no válida"
         elif categoria == "ANDINO" and distancia > 2:
@@ -128,13 +192,16 @@ def marcar_alerta(row):
     except Exception:
         return "❌ Error de datos"
 
+perfil.seccion("Validación de ubicación")
 df_periodo["DISTANCIA_KM"] = pd.to_numeric(df_periodo["DISTANCIA_KM"], errors="coerce")
-df_periodo["ALERTA"] = df_periodo.apply(marcar_alerta, axis=1).astype(str)
+with perfil.medir("marcar_alerta (apply)"):
+    df_periodo["ALERTA"] = df_periodo.apply(marcar_alerta, axis=1).astype(str)
 df_rojo = df_periodo[df_periodo["ALERTA"].str.contains("no válida", case=False, na=False)].copy()
 
 # ======================================================
 # 📢 RESUMEN DE VALIDACIÓN (coherente con la tabla)
 # ======================================================
+perfil.seccion("Resumen de validación")
 if len(df_periodo) > 0:
     total_visitas = len(df_periodo)
     porcentaje_fuera = round((len(df_rojo) / total_visitas * 100), 1)
@@ -147,12 +214,9 @@ if len(df_periodo) > 0:
     resumen["no_valida"] = resumen["no_valida"].astype(int)
     resumen["total"] = resumen["total"].astype(int)
 
-    # 🔧 Solo gestores con ≥5 visitas (mismo filtro que la tabla)
-    ranking_tmp = resumen[resumen["total"] >= 5].reset_index()
-
-    ranking_tmp["nivel"] = ranking_tmp["%"].apply(
-        lambda v: "critico" if v >= 70 else "alto" if v >= 50 else "medio" if v >= 30 else "bajo"
-    )
+    # 🔧 Solo gestores con el mínimo de visitas (mismo filtro que la tabla)
+    ranking_tmp = resumen[resumen["total"] >= MIN_VISITAS].reset_index()
+    ranking_tmp["nivel"] = clasificar_riesgo(ranking_tmp["%"], NIVELES_RIESGO, LIMITES_RIESGO)
 
     gestores_critico = ranking_tmp[ranking_tmp["nivel"] == "critico"]
     gestores_alto = ranking_tmp[ranking_tmp["nivel"] == "alto"]
@@ -173,13 +237,13 @@ if len(df_periodo) > 0:
 
     # Clasificación de riesgo
     if len(gestores_critico) > 0:
-        texto_riesgo = f"🔴 **{len(gestores_critico)} gestores locales** tienen más del **70 %** de sus visitas fuera del rango permitido (**riesgo crítico**)."
+        texto_riesgo = f"🔴 **{len(gestores_critico)} gestores locales** tienen más del **{LIMITE_RIESGO['critico']:g} %** de sus visitas fuera del rango permitido (**riesgo crítico**)."
         color_fondo = "#FDEDEC"; color_borde = "#E74C3C"
     elif len(gestores_alto) > 0:
-        texto_riesgo = f"🟠 **{len(gestores_alto)} gestores locales** tienen entre **50 % y 70 %** de sus visitas fuera del rango permitido (**riesgo alto**)."
+        texto_riesgo = f"🟠 **{len(gestores_alto)} gestores locales** tienen entre **{LIMITE_RIESGO['alto']:g} % y {LIMITE_RIESGO['critico']:g} %** de sus visitas fuera del rango permitido (**riesgo alto**)."
         color_fondo = "#FEF5E7"; color_borde = "#F39C12"
     elif len(gestores_medio) > 0:
-        texto_riesgo = f"🟡 **{len(gestores_medio)} gestores locales** tienen entre **30 % y 50 %** de sus visitas fuera del rango permitido (**riesgo medio**)."
+        texto_riesgo = f"🟡 **{len(gestores_medio)} gestores locales** tienen entre **{LIMITE_RIESGO['medio']:g} % y {LIMITE_RIESGO['alto']:g} %** de sus visitas fuera del rango permitido (**riesgo medio**)."
         color_fondo = "#FCF3CF"; color_borde = "#F1C40F"
     else:
         texto_riesgo = "🟢 No se registran gestores con niveles altos o críticos. La mayoría presenta un **nivel de riesgo bajo**."
@@ -205,6 +269,7 @@ else:
 # ======================================================
 # 🎯 TARJETAS KPI (actualizado)
 # ======================================================
+perfil.seccion("Tarjetas KPI")
 st.markdown("---")
 st.subheader("📍 Indicadores principales")
 
@@ -238,10 +303,75 @@ with c2:
     st.markdown(kpi_html("🟢", "Visitas con ubicación válida", total_valida, "#1E8449"), unsafe_allow_html=True)
 with c3:
     st.markdown(kpi_html("👥", "Gestores evaluados (prioridad 4 y 5)", gestores_evaluados, "#2E4053"), unsafe_allow_html=True)
+
+resumen_excl = cargar_resumen_exclusiones()
+if ut_sel != "-- Todas --":
+    resumen_excl = resumen_excl[resumen_excl["UT"] == ut_sel]
+if not resumen_excl.empty:
+    with st.expander("🚫 Registros excluidos por motivo (acumulado del año)"):
+        tabla_excl = (
+            resumen_excl.groupby("MOTIVO")["REGISTROS"].sum()
+            .rename(index=ETIQUETAS_MOTIVO)
+            .rename_axis("Motivo").reset_index(name="Registros")
+        )
+        st.table(tabla_excl.style.format({"Registros": "{:,.0f}"}))
     
+# ======================================================
+# 🗺️ MAPA DEL ÁMBITO SELECCIONADO (límites simplificados)
+# ======================================================
+perfil.seccion("Mapa del ámbito")
+
+@perfil.cache(st.cache_resource)
+def cargar_teselas(nivel):
+    return TeselasLimites(os.path.join("data", "processed", "limites"), nivel)
+
+@perfil.cache(st.cache_data(show_spinner=False))
+def geometria_ambito(ut, dist, deptos):
+    """Solo se leen las geometrías del ámbito elegido, a la tolerancia de su zoom."""
+    t_dist, t_dep = cargar_teselas("distrito"), cargar_teselas("departamento")
+    if dist != "-- Todos --" and t_dist.disponible():
+        return t_dist.geojson(zoom=10, nombres=[dist], padres=deptos), 10
+    if ut != "-- Todas --" and t_dep.disponible():
+        return t_dep.geojson(zoom=6.5, nombres=deptos), 6.5
+    if t_dep.disponible():
+        return t_dep.geojson(zoom=4.5), 4.5
+    return None, None
+
+deptos_ambito = tuple(sorted(df.loc[df["UT"] == ut_sel, "DEPARTAMENTO"].dropna().astype(str).unique())) \
+    if ut_sel != "-- Todas --" and "DEPARTAMENTO" in df.columns else ()
+geo_ambito, zoom_ambito = geometria_ambito(ut_sel, dist_sel, deptos_ambito)
+
+if geo_ambito is not None and geo_ambito["features"]:
+    st.markdown("---")
+    st.subheader("🗺️ Ámbito seleccionado")
+    coords = np.array([
+        xy for f in geo_ambito["features"] for pol in f["geometry"]["coordinates"] for xy in pol[0]
+    ])
+    capas = [pdk.Layer(
+        "GeoJsonLayer", geo_ambito, stroked=True, filled=True,
+        get_fill_color=[0, 76, 151, 25], get_line_color=[0, 76, 151, 200], line_width_min_pixels=1
+    )]
+    # Con un distrito elegido, las visitas del periodo son pocas: se muestran como puntos
+    if dist_sel != "-- Todos --" and len(df_periodo) > 0:
+        puntos = df_periodo[["LATITUD", "LONGITUD", "CO_HOGAR", "ALERTA"]].dropna(subset=["LATITUD", "LONGITUD"]).copy()
+        puntos["color"] = [[192, 57, 43, 200] if "no válida" in a else [30, 132, 73, 200] for a in puntos["ALERTA"]]
+        capas.append(pdk.Layer(
+            "ScatterplotLayer", puntos, get_position=["LONGITUD", "LATITUD"],
+            get_fill_color="color", get_radius=40, radius_min_pixels=3, pickable=True
+        ))
+    with perfil.medir("pydeck (serialización del mapa)"):
+        st.pydeck_chart(pdk.Deck(
+            layers=capas, map_style=None,
+            initial_view_state=pdk.ViewState(
+                latitude=float(coords[:, 1].mean()), longitude=float(coords[:, 0].mean()), zoom=zoom_ambito
+            ),
+            tooltip={"text": "{CO_HOGAR}\n{ALERTA}"} if len(capas) > 1 else None
+        ))
+
 # ======================================================
 # 👥 GESTORES CON MAYOR INCIDENCIA
 # ======================================================
+perfil.seccion("Gestores con mayor incidencia")
 st.markdown("---")
 st.subheader("👥 Gestores con mayor proporción de visitas fuera de ubicación")
 st.caption("ℹ️ Muestra los gestores con mayor incidencia de registros fuera del rango territorial permitido, para prioridad 4 y 5.")
@@ -256,10 +386,15 @@ if len(df_periodo) > 0:
     resumen["no_valida"] = resumen["no_valida"].astype(int)
     resumen["total"] = resumen["total"].astype(int)
 
-    ut_modal = df_periodo.groupby("GEL")["UT"].agg(lambda x: x.mode().iat[0] if not x.mode().empty else "")
-    dist_modal = df_periodo.groupby("GEL")["DISTRITO"].agg(lambda x: x.mode().iat[0] if not x.mode().empty else "")
+    # 📌 Señal adicional: visitas registradas desde un mismo punto para varios hogares
+    if "COLOCALIZADA" in df_periodo.columns:
+        resumen["co_ubicadas"] = df_periodo.groupby("GEL")["COLOCALIZADA"].sum().astype(int)
+
+    with perfil.medir("moda de UT y distrito por gestor"):
+        ut_modal = df_periodo.groupby("GEL")["UT"].agg(lambda x: x.mode().iat[0] if not x.mode().empty else "")
+        dist_modal = df_periodo.groupby("GEL")["DISTRITO"].agg(lambda x: x.mode().iat[0] if not x.mode().empty else "")
     resumen = resumen.join(ut_modal, on="GEL").join(dist_modal, on="GEL")
-    resumen = resumen[resumen["total"] >= 5].sort_values(by=["%", "no_valida"], ascending=[False, False]).reset_index()
+    resumen = resumen[resumen["total"] >= MIN_VISITAS].sort_values(by=["%", "no_valida"], ascending=[False, False]).reset_index()
 
     ranking = resumen.rename(columns={
         "GEL": "Gestor Local",
@@ -267,52 +402,57 @@ if len(df_periodo) > 0:
         "DISTRITO": "Distrito",
         "total": "Total visitas (pri 4-5)",
         "no_valida": "Visitas fuera de ubicación",
-        "%": "% fuera de ubicación"
+        "%": "% fuera de ubicación",
+        "co_ubicadas": "Visitas co-ubicadas"
     })
 
-    ranking["nivel"] = ranking["% fuera de ubicación"].apply(
-        lambda v: "critico" if v >= 70 else "alto" if v >= 50 else "medio" if v >= 30 else "bajo"
-    )
-
-    def color_riesgo(val):
-        if val >= 70: return f"🔴 {val:.1f}"
-        elif val >= 50: return f"🟠 {val:.1f}"
-        elif val >= 30: return f"🟡 {val:.1f}"
-        else: return f"🟢 {val:.1f}"
-
-    ranking["% fuera de ubicación"] = ranking["% fuera de ubicación"].apply(color_riesgo)
-
-    def color_fila(row):
-        pct = float(row["% fuera de ubicación"][2:]) if len(row["% fuera de ubicación"]) > 2 else 0
-        if pct >= 70: return ['background-color: #FADBD8'] * len(row)
-        elif pct >= 50: return ['background-color: #FDEBD0'] * len(row)
-        elif pct >= 30: return ['background-color: #FCF3CF'] * len(row)
-        else: return ['background-color: #E8F8F5'] * len(row)
+    # Nivel de riesgo: los códigos indexan directamente íconos y colores de fila
+    ranking["nivel"] = clasificar_riesgo(ranking["% fuera de ubicación"], NIVELES_RIESGO, LIMITES_RIESGO)
+    codigos = ranking["nivel"].cat.codes.to_numpy()
+    emojis = np.array([EMOJI_RIESGO.get(n, "") for n in NIVELES_RIESGO], dtype=object)
+    fondos = np.array([f"background-color: {FONDO_RIESGO.get(n, '#FFFFFF')}" for n in NIVELES_RIESGO], dtype=object)
+    ranking["% fuera de ubicación"] = emojis[codigos] + " " + ranking["% fuera de ubicación"].round(1).astype(str)
 
     # 🧩 Aplicar formato visual limpio (sin decimales en totales)
-    st.dataframe(
-        ranking[["Gestor Local", "UT", "Distrito",
-                "Total visitas (pri 4-5)",
-                "Visitas fuera de ubicación", "% fuera de ubicación"]]
-        .style.apply(color_fila, axis=1)
-        .format({"Total visitas (pri 4-5)": "{:,.0f}",
-                 "Visitas fuera de ubicación": "{:,.0f}"}),
-        use_container_width=True
+    columnas_ranking = ["Gestor Local", "UT", "Distrito",
+                        "Total visitas (pri 4-5)",
+                        "Visitas fuera de ubicación", "% fuera de ubicación"]
+    if "Visitas co-ubicadas" in ranking.columns:
+        columnas_ranking.append("Visitas co-ubicadas")
+
+    estilos = pd.DataFrame(
+        np.repeat(fondos[codigos][:, None], len(columnas_ranking), axis=1),
+        index=ranking.index, columns=columnas_ranking,
     )
+    with perfil.medir("Styler del ranking"):
+        st.dataframe(
+            ranking[columnas_ranking]
+            .style.apply(lambda _: estilos, axis=None)
+            .format({c: "{:,.0f}" for c in columnas_ranking if c.startswith(("Total", "Visitas"))}),
+            use_container_width=True
+        )
 
     # 🧭 Leyenda de clasificación (solo si hay registros)
     if not ranking.empty:
-        st.markdown("""
+        rangos = []
+        for i, nombre in enumerate(NIVELES_RIESGO):
+            if i == len(NIVELES_RIESGO) - 1:
+                rango = f"≥ {LIMITES_RIESGO[i]:g}%"
+            elif i == 0:
+                rango = f"&lt; {LIMITES_RIESGO[1]:g}%"
+            else:
+                rango = f"{LIMITES_RIESGO[i]:g}–{LIMITES_RIESGO[i + 1] - 1:g}%"
+            rangos.append(f"{EMOJI_RIESGO.get(nombre, '')} <b>{ETIQUETA_RIESGO.get(nombre, nombre)}</b> {rango}")
+        leyenda_niveles = " &nbsp;&nbsp;|&nbsp;&nbsp;\n".join(reversed(rangos))
+        st.markdown(f"""
         <div style='border:1px solid #D6DBDF;border-radius:6px;
                     padding:8px 12px;margin-top:6px;
                     font-size:12.8px;line-height:1.5;
                     background-color:#F8F9F9;width:98%;'>
             <b>Leyenda de clasificación:</b><br>
-            🔴 <b>Crítico</b> ≥ 70% &nbsp;&nbsp;|&nbsp;&nbsp;
-            🟠 <b>Alto</b> 50–69% &nbsp;&nbsp;|&nbsp;&nbsp;
-            🟡 <b>Medio</b> 30–49% &nbsp;&nbsp;|&nbsp;&nbsp;
-            🟢 <b>Bajo</b> &lt; 30%<br>
-            <span style='color:gray;'>Clasificación basada en el porcentaje de visitas registradas fuera del rango territorial permitido.</span>
+            {leyenda_niveles}<br>
+            <span style='color:gray;'>Clasificación basada en el porcentaje de visitas registradas fuera del rango territorial permitido (gestores con {MIN_VISITAS} o más visitas).
+            <b>Visitas co-ubicadas</b>: registradas por el gestor el mismo día desde un mismo punto para {MIN_HOGARES_COLOC} o más hogares distintos.</span>
         </div>
         """, unsafe_allow_html=True)
 
@@ -323,6 +463,7 @@ else:
 # ======================================================
 # 🏠 REGISTROS DE VISITAS
 # ======================================================
+perfil.seccion("Registros de visitas")
 st.markdown("---")
 st.subheader("🏠 Registros de visitas domiciliarias")
 st.caption("ℹ️ Muestra el detalle de las visitas domiciliarias, correspondiente a los hogares con prioridad 4 y 5.")
@@ -364,16 +505,22 @@ else:
     # ======================================================
     # 🔎 Base inicial según selección de periodo (abajo)
     # ======================================================
-    if periodo_tabla == "Ver todas las visitas del año":
-        df_filtrado = df[df["ESCALA_PRIORIZACION"].isin([4, 5])].copy()
+    version = VERSION_DATOS
+    todo_el_anio = periodo_tabla == "Ver todas las visitas del año"
+    inicio, fin = (0, len(df)) if todo_el_anio else rango_periodo(df, periodo_tabla)
+
+    # Filtro por hogar: búsqueda en el índice y luego solo las filas encontradas.
+    # Las filas salen ya ordenadas por distancia descendente (sin ordenar en cada interacción).
+    if hogar_filter.strip():
+        indice = indice_hogares(df, version)
+        filas = indice.filas(indice.contiene(hogar_filter))
+        filas = filas[(filas >= inicio) & (filas < fin)]
+        if todo_el_anio:
+            filas = filas[np.argsort(orden_distancia(df, version)[1][filas])]
     else:
-        fi_str, ff_str = PERIODOS[periodo_tabla]
-        fi, ff = pd.to_datetime(fi_str), pd.to_datetime(ff_str)
-        df_filtrado = df[
-            (df["FECHA_REGISTRO_ATENCION"] >= fi)
-            & (df["FECHA_REGISTRO_ATENCION"] <= ff)
-            & (df["ESCALA_PRIORIZACION"].isin([4, 5]))
-        ].copy()
+        filas = orden_distancia(df, version)[0] if todo_el_anio else np.arange(inicio, fin)
+    df_filtrado = df.iloc[filas]
+    df_filtrado = df_filtrado[df_filtrado["ESCALA_PRIORIZACION"].isin([4, 5])].copy()
 
     # ======================================================
     # ⚙️ Filtros adicionales (UT/Distrito superiores, hogar, gestor, alerta)
@@ -381,7 +528,8 @@ else:
     # Asegurar columna ALERTA
     if "ALERTA" not in df_filtrado.columns:
         df_filtrado["DISTANCIA_KM"] = pd.to_numeric(df_filtrado["DISTANCIA_KM"], errors="coerce")
-        df_filtrado["ALERTA"] = df_filtrado.apply(marcar_alerta, axis=1).astype(str)
+        with perfil.medir("marcar_alerta (apply, tabla)"):
+            df_filtrado["ALERTA"] = df_filtrado.apply(marcar_alerta, axis=1).astype(str)
 
     # Filtrar por UT/Distrito seleccionados arriba
     if ut_sel != "-- Todas --":
@@ -389,12 +537,6 @@ else:
     if dist_sel != "-- Todos --":
         df_filtrado = df_filtrado[df_filtrado["DISTRITO"] == dist_sel]
 
-    # Filtro por hogar
-    if hogar_filter.strip():
-        df_filtrado = df_filtrado[
-            df_filtrado["CO_HOGAR"].astype(str).str.contains(hogar_filter.strip(), case=False, na=False)
-        ]
-
     # Filtro por tipo de visita
     if filtro_alerta == "Ubicación no válida":
         df_filtrado = df_filtrado[df_filtrado["ALERTA"].str.contains("no válida", case=False, na=False)]
@@ -411,9 +553,6 @@ else:
     # ======================================================
     # 🧹 Limpieza y formato
     # ======================================================
-    df_filtrado = df_filtrado.sort_values(by="DISTANCIA_KM", ascending=False)
-    df_filtrado = df_filtrado.drop_duplicates(subset=["CO_HOGAR", "FECHA_REGISTRO_ATENCION"], keep="first")
-
     df_vista = df_filtrado[[
         "CO_HOGAR", "GEL", "UT", "DISTRITO", "CENTRO_POBLADO",
         "FECHA_REGISTRO_ATENCION", "DISTANCIA_KM", "ALERTA"
@@ -432,15 +571,16 @@ else:
     st.markdown(f"🔹 <b>Total: {len(df_vista):,} registros filtrados</b>", unsafe_allow_html=True)
 
     # Mostrar tabla
-    st.dataframe(
-        df_vista.reset_index(drop=True)
-        .style.format({
-            "Distancia (km)": "{:.2f}",
-            "Fecha": lambda x: x.strftime("%d/%m/%Y") if pd.notnull(x) else ""
-        }),
-        use_container_width=True,
-        height=500
-    )
+    with perfil.medir("Styler de registros"):
+        st.dataframe(
+            df_vista.reset_index(drop=True)
+            .style.format({
+                "Distancia (km)": "{:.2f}",
+                "Fecha": lambda x: x.strftime("%d/%m/%Y") if pd.notnull(x) else ""
+            }),
+            use_container_width=True,
+            height=500
+        )
 
 # ======================================================
 # 🔁 Variables para exportación (coherentes con las tarjetas actuales)
@@ -512,6 +652,7 @@ else:
 # ======================================================
 # 📌 PIE DE NOTA INSTITUCIONAL
 # ======================================================
+perfil.seccion("Pie de nota")
 st.markdown(f"""
 <hr>
 <p style='font-size:12px;color:gray;margin-top:10px;text-align:center;'>
@@ -520,3 +661,5 @@ Umbrales de validez: ≤ 0.5 km (urbano), ≤ 2 km (andino), ≤ 5 km (amazónic
 Las visitas con <b>“Ubicación no válida”</b> superan el límite permitido para su categoría geográfica.
 </p>
 """, unsafe_allow_html=True)
+
+perfil.cerrar()
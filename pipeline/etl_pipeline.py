@@ -1,44 +1,316 @@
 # ===============================================
-# 🚀 Carga de datos y lectura desde YAML
+# 🚀 ETL de verificación geográfica (carga → unión → distancia → clasificación → escritura)
 # ===============================================
 
+import sys
+import subprocess
+import numpy as np
 import pandas as pd
 import yaml
 from pathlib import Path
 
 # === 1. Definir ruta base ===
 BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from scripts.utils import categoria_UT_vectorizada, clasificar_base_vectorizada
+from scripts.metricas import MedidorEtapas
+from scripts.huellas import actualizar_manifiesto
+from scripts.esquema import ErrorEsquema, aplicar_esquema, concatenar
+from scripts.geoverificacion import IndicePoligonos, verificar_departamento
+from scripts.vecinos import IndiceHogares, buscar_hogar_alternativo
+from scripts.colocalizacion import detectar_colocalizacion
+from scripts.rafagas import detectar_rafagas, resumen_rafagas
+from scripts.grilla import agregar_grilla
+from scripts.estadisticas import actualizar_estadisticas
+from scripts.consultas import guardar_visitas
+from scripts.periodos import leer_periodos, asignar_periodo
+from scripts.paralelo import distancia_paralela
+from scripts.coordenadas import UTILIZABLES, validar_coordenadas, resumen_calidad
+from scripts.exclusiones import mascaras_exclusion, construir_exclusiones, guardar_exclusiones
 
 # === 2. Cargar archivo de configuración ===
 with open(BASE_DIR / "pipeline" / "config.yaml", "r", encoding="utf-8") as f:
     config = yaml.safe_load(f)
 
-# === 3. Mostrar rutas de archivos detectadas ===
-print("📂 Archivos configurados en el YAML:")
-for k, v in config["paths"].items():
-    print(f" - {k}: {v}")
+CLAVE_MAESTRO = "maestro_hogares"
+
+
+# ===============================================
+# 📥 Etapa 1 – Carga
+# ===============================================
+def cargar_fuentes(config, huellas=None, reporte_esquema=None):
+    """Lee cada Excel configurado en `paths`; omite los que no existen.
+
+    Si se pasa `huellas` (ruta relativa → sha256) y ya existe la copia parquet
+    de esa misma versión del archivo, se reutiliza en lugar de volver a leer el Excel.
+    Cada archivo se convierte al esquema del YAML; si no lo cumple se detiene la carga.
+    """
+    print("📂 Archivos configurados en el YAML:")
+    for k, v in config["paths"].items():
+        print(f" - {k}: {v}")
+
+    huellas = huellas or {}
+    reporte_esquema = {} if reporte_esquema is None else reporte_esquema
+    cache_dir = BASE_DIR / config.get("audit", {}).get("cache_dir", "data/interim")
+    dataframes = {}
+    for key, path_str in config["paths"].items():
+        path = BASE_DIR / path_str
+        if path.exists():
+            digest = huellas.get(Path(path_str).as_posix())
+            cache = cache_dir / f"{key}_{digest[:16]}.parquet" if digest else None
+            try:
+                if cache is not None and cache.exists():
+                    df = pd.read_parquet(cache)
+                    print(f"♻️ {key} sin cambios (sha256 {digest[:12]}…): se reutiliza {cache.name}")
+                    df, _ = aplicar_esquema(df, config.get("schema", {}), key, tipo_fuente(key))
+                else:
+                    df = pd.read_excel(path)
+                    print(f"✅ {key} cargado correctamente con {len(df):,} filas y {len(df.columns)} columnas.")
+                    df, rep = aplicar_esquema(df, config.get("schema", {}), key, tipo_fuente(key))
+                    reporte_esquema[key] = rep
+                    print(f"🧬 {key}: {rep['mb_antes']:,} MB → {rep['mb_despues']:,} MB en memoria (-{rep['ahorro_%']}%)")
+                    if cache is not None:
+                        guardar_cache(df, cache, key)
+                dataframes[key] = df
+            except ErrorEsquema:
+                raise
+            except Exception as e:
+                print(f"❌ Error al leer {key}: {e}")
+        else:
+            print(f"⚠️ No se encontró el archivo: {path}")
+    return dataframes
+
+
+def tipo_fuente(key):
+    return CLAVE_MAESTRO if key == CLAVE_MAESTRO else "visitas"
+
+
+def guardar_cache(df, cache, key):
+    """Guarda la copia parquet de una entrada y borra las de versiones anteriores."""
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    for viejo in cache.parent.glob(f"{key}_*.parquet"):
+        viejo.unlink()
+    try:
+        df.to_parquet(cache, index=False)
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar la copia parquet de {key}: {e}")
+
+
+def registrar_huellas(rutas, config):
+    """Actualiza `hash_manifest.txt` con las rutas dadas y devuelve {ruta: sha256}."""
+    audit = config.get("audit", {})
+    entradas, cambiados = actualizar_manifiesto(
+        rutas, BASE_DIR / audit.get("out_dir", "audit") / "hash_manifest.txt", BASE_DIR,
+        max_workers=audit.get("hash_workers", 4),
+    )
+    for rel in sorted(cambiados):
+        print(f"🔏 Nueva huella: {rel} ({entradas[rel]['sha256'][:12]}…)")
+    return {rel: e["sha256"] for rel, e in entradas.items()}
+
+
+# ===============================================
+# 🔗 Etapa 2 – Unión visitas + maestro de hogares
+# ===============================================
+def unir_hogares(dataframes):
+    """Concatena las visitas y agrega las coordenadas del hogar (X_LATITUD, Y_LONGITUD)."""
+    visitas = [df for k, df in dataframes.items() if k != CLAVE_MAESTRO]
+    if not visitas:
+        raise FileNotFoundError("No se cargó ningún archivo de visitas.")
+    df = concatenar(visitas)
+
+    if CLAVE_MAESTRO in dataframes:
+        hogares = (
+            dataframes[CLAVE_MAESTRO][["CO_HOGAR", "X_LATITUD", "Y_LONGITUD"]]
+            .drop_duplicates(subset="CO_HOGAR")
+        )
+        df = df.drop(columns=["X_LATITUD", "Y_LONGITUD"], errors="ignore").merge(hogares, on="CO_HOGAR", how="left")
+    return df
+
+
+# ===============================================
+# 🧭 Etapa 3 – Calidad de coordenadas y distancia visita ↔ hogar
+# ===============================================
+def revisar_coordenadas(df, config):
+    """Código de calidad de las coordenadas de visita y de hogar; corrige lat/lon invertidas."""
+    cfg = config.get("coordinate_quality", {})
+    for col_lat, col_lon, col_calidad in (("LATITUD", "LONGITUD", "CALIDAD_GPS"),
+                                          ("X_LATITUD", "Y_LONGITUD", "CALIDAD_HOGAR")):
+        df = validar_coordenadas(df, col_lat, col_lon, col_calidad,
+                                 cfg.get("min_decimals", 4), cfg.get("fix_swapped", True))
+    resumen = resumen_calidad(df, ["CALIDAD_GPS", "CALIDAD_HOGAR"])
+    for fila in resumen[(resumen["CALIDAD"] != "OK") & (resumen["REGISTROS"] > 0)].itertuples():
+        print(f"🧭 {fila.CAMPO} {fila.CALIDAD}: {fila.REGISTROS:,} registros")
+    out_dir = BASE_DIR / config.get("audit", {}).get("out_dir", "audit")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    resumen.to_csv(out_dir / "calidad_coordenadas.csv", index=False)
+    return df
+
+
+def calcular_distancias(df, config):
+    """Distancia solo para pares de coordenadas utilizables; el resto queda en NaN."""
+    cfg = config.get("parallel", {})
+    distancia = distancia_paralela(
+        df["LATITUD"].to_numpy(), df["LONGITUD"].to_numpy(), df["X_LATITUD"].to_numpy(), df["Y_LONGITUD"].to_numpy(),
+        workers=cfg.get("distance_workers", 1), filas_tramo=cfg.get("chunk_rows", 1_000_000),
+    )
+    if "CALIDAD_GPS" in df.columns:
+        utilizable = (df["CALIDAD_GPS"].isin(UTILIZABLES) & df["CALIDAD_HOGAR"].isin(UTILIZABLES)).to_numpy()
+        distancia = np.where(utilizable, distancia, np.nan)
+    df["DISTANCIA_KM"] = distancia
+    return df
+
+
+# ===============================================
+# 🗺️ Etapa 3b – Verificación GPS vs departamento declarado
+# ===============================================
+def verificar_geografia(df, config):
+    geo = config["geo_verification"]
+    indice = IndicePoligonos.desde_geojson(
+        BASE_DIR / geo["boundaries"], geo.get("name_field", "NOMBDEP"), geo.get("band_deg", 0.05)
+    )
+    df = verificar_departamento(df, indice, geo.get("equivalences"))
+    for estado, n in df["GEO_ESTADO"].value_counts(sort=False).items():
+        print(f"🗺️ {estado}: {n:,} visitas")
+    return df
+
+
+# ===============================================
+# 🏷️ Etapa 4 – Clasificación territorial
+# ===============================================
+def clasificar(df, config):
+    reglas = config["territorial_rules"]
+    df["FECHA_REGISTRO_ATENCION"] = pd.to_datetime(df["FECHA_REGISTRO_ATENCION"], errors="coerce")
+    df["MES"] = df["FECHA_REGISTRO_ATENCION"].dt.to_period("M").astype(str)
+    if "operative_periods" in config:
+        df["PERIODO"] = asignar_periodo(df["FECHA_REGISTRO_ATENCION"], leer_periodos(config))
+    df["CATEGORIA"] = pd.Categorical(
+        categoria_UT_vectorizada(df["UT"], reglas["ut_category_map"]), categories=list(reglas["thresholds_km"])
+    )
+    df["VALIDA_BASE"] = clasificar_base_vectorizada(df["CATEGORIA"], df["DISTANCIA_KM"], reglas["thresholds_km"])
+    # Visitas que entran a los indicadores: coordenadas utilizables y distancia no atípica
+    df["EN_ANALISIS"] = (df["DISTANCIA_KM"] <= reglas.get("outlier_km", 50)).to_numpy()
+    return df
+
+
+def registrar_exclusiones(df, config, run_id):
+    """Guarda los registros que los dashboards descartan, con su motivo."""
+    reglas = config["territorial_rules"]
+    mascaras = mascaras_exclusion(df, reglas.get("outlier_km", 50), config.get("priority_levels", [4, 5]))
+    excl = construir_exclusiones(df, mascaras, run_id)
+    audit = config["audit"]
+    ruta, resumen = guardar_exclusiones(
+        excl, BASE_DIR / audit.get("out_dir", "audit"), run_id, audit.get("exclusions_keep", 10)
+    )
+    for motivo, n in resumen.groupby("MOTIVO", observed=True)["REGISTROS"].sum().items():
+        print(f"🚫 {motivo}: {n:,} registros excluidos")
+    print(f"📁 Exclusiones guardadas: {ruta.relative_to(BASE_DIR)}")
+    return excl
+
+
+# ===============================================
+# 🧹 Etapa 4a – Visita canónica por hogar y fecha
+# ===============================================
+def marcar_canonicas(df):
+    """Ordena por DISTANCIA_KM descendente y marca ES_CANONICA en la primera fila
+    de cada (CO_HOGAR, FECHA_REGISTRO_ATENCION): los dashboards solo leen esas."""
+    df = df.sort_values("DISTANCIA_KM", ascending=False, kind="stable", na_position="last", ignore_index=True)
+    df["ES_CANONICA"] = ~df.duplicated(subset=["CO_HOGAR", "FECHA_REGISTRO_ATENCION"], keep="first")
+    return df
+
+
+# ===============================================
+# 🏠 Etapa 4b – Hogares cercanos a visitas inconsistentes
+# ===============================================
+def buscar_hogares_cercanos(df, hogares, config):
+    """¿El gestor estuvo en otro lugar o registró la visita con el CO_HOGAR equivocado?"""
+    cfg = config.get("nearest_households", {})
+    hogares = hogares.drop_duplicates(subset="CO_HOGAR")
+    if "DISTRITO" not in hogares.columns:
+        distrito = df.drop_duplicates(subset="CO_HOGAR").set_index("CO_HOGAR")["DISTRITO"].astype(object)
+        hogares = hogares.assign(DISTRITO=hogares["CO_HOGAR"].map(distrito))
+    indice = IndiceHogares(hogares["CO_HOGAR"], hogares["X_LATITUD"], hogares["Y_LONGITUD"], hogares["DISTRITO"])
+    df = buscar_hogar_alternativo(
+        df, indice, config["territorial_rules"]["thresholds_km"],
+        k=cfg.get("k", 5), lote=cfg.get("batch_size", 200_000),
+    )
+    print(f"🏠 {int(df['OTRO_HOGAR_EN_RANGO'].sum()):,} visitas inconsistentes tienen otro hogar "
+          f"del mismo distrito dentro del umbral")
+    return df
+
+
+# ===============================================
+# 📌 Etapa 4c – Visitas co-ubicadas (mismo gestor, día y punto)
+# ===============================================
+def marcar_colocalizacion(df, config):
+    cfg = config.get("colocation", {})
+    df = detectar_colocalizacion(
+        df, radio_m=cfg.get("radius_m", 50), min_hogares=cfg.get("min_households", 5),
+        ref_lat=cfg.get("ref_lat", -9.19),
+    )
+    print(f"📌 {int(df['COLOCALIZADA'].sum()):,} visitas registradas desde un mismo punto para "
+          f"≥{cfg.get('min_households', 5)} hogares ({df.loc[df['COLOCALIZADA'], 'DNI_GEL'].nunique():,} gestores)")
+    return df
+
+
+# ===============================================
+# ⚡ Etapa 4d – Ráfagas: traslados imposibles entre visitas consecutivas
+# ===============================================
+def marcar_rafagas(df, config):
+    cfg = config.get("bursts", {})
+    df = detectar_rafagas(df, max_kmh=cfg.get("max_kmh", 120), min_km=cfg.get("min_km", 1.0))
+    resumen = resumen_rafagas(df)
+    print(f"⚡ {int(df['RAFAGA'].sum()):,} traslados imposibles "
+          f"({int((resumen['RAFAGAS'] > 0).sum()):,} gestores con al menos uno)")
+    return df, resumen
 
-# === 4. Intentar cargar cada dataset ===
-dataframes = {}
-for key, path_str in config["paths"].items():
-    path = BASE_DIR / path_str
-    if path.exists():
-        try:
-            df = pd.read_excel(path)
-            dataframes[key] = df
-            print(f"✅ {key} cargado correctamente con {len(df):,} filas y {len(df.columns)} columnas.")
-        except Exception as e:
-            print(f"❌ Error al leer {key}: {e}")
-    else:
-        print(f"⚠️ No se encontró el archivo: {path}")
 
-# === 5. Resumen final ===
-print("\nResumen de datasets cargados:")
-for k, df in dataframes.items():
-    print(f" - {k}: {df.shape[0]} filas × {df.shape[1]} columnas")
+# ===============================================
+# 🗃️ Etapa 4e – Almacén incremental de estadísticas por gestor y hogar
+# ===============================================
+def actualizar_almacen(df, config):
+    cfg = config.get("stats_store", {})
+    meses = actualizar_estadisticas(
+        df, BASE_DIR / cfg.get("out_dir", "data/processed/estadisticas"),
+        meses_recientes=cfg.get("recent_months", 1), recalcular="--recalcular" in sys.argv,
+    )
+    print(f"🗃️ Estadísticas actualizadas para {len(meses)} mes(es): {', '.join(meses) if meses else '—'}")
+    return meses
+
 
 # ===============================================
-# 📊 Reporte exploratorio 
+# 🦆 Etapa 4f – Almacén Parquet de visitas (consultas SQL)
+# ===============================================
+def guardar_almacen_visitas(df, config):
+    cfg = config.get("visit_store", {})
+    meses = guardar_visitas(
+        df, BASE_DIR / cfg.get("out_dir", "data/processed/visitas"),
+        meses_recientes=cfg.get("recent_months", 1), recalcular="--recalcular" in sys.argv,
+    )
+    print(f"🦆 Visitas guardadas en Parquet para {len(meses)} mes(es): {', '.join(meses) if meses else '—'}")
+    return meses
+
+
+# ===============================================
+# 💾 Etapa 5 – Escritura de salidas procesadas
+# ===============================================
+def escribir(df, config, tablas=None):
+    """Escribe las bases de los dashboards y las tablas derivadas (`tablas`: clave de `outputs` → df)."""
+    salidas = {k: BASE_DIR / v for k, v in config["outputs"].items()}
+    for ruta in salidas.values():
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(salidas["df_seguro"], index=False, compression="gzip")
+    escritas = {"df_seguro": salidas["df_seguro"]}
+    for k, tabla in (tablas or {}).items():
+        tabla.to_parquet(salidas[k], index=False)
+        escritas[k] = salidas[k]
+    for k, ruta in escritas.items():
+        print(f"📁 Exportado {k}: {ruta.relative_to(BASE_DIR)}")
+    return escritas
+
+
+# ===============================================
+# 📊 Reporte exploratorio
 # ===============================================
 
 def reporte_rapido(df_dict):
@@ -48,7 +320,7 @@ def reporte_rapido(df_dict):
         print("-" * 50)
         print(f"Filas: {len(df):,} | Columnas: {len(df.columns)}")
         print(f"Columnas: {list(df.columns)[:8]} ...")
-        
+
         # Buscar columna de fecha
         col_fecha = next((c for c in df.columns if "FECHA" in c.upper()), None)
         if col_fecha:
@@ -56,15 +328,124 @@ def reporte_rapido(df_dict):
             print(f"Rango de fechas ({col_fecha}): {df[col_fecha].min()} → {df[col_fecha].max()}")
         else:
             print("No se encontró columna de fecha.")
-        
+
         # Tipos de datos
         print("\nTipos de datos (primeras columnas):")
         print(df.dtypes.head(10))
-        
+
         # Primeras filas
         print("\nVista previa (head):")
         print(df.head(3))
         print("\n" + "=" * 80)
 
-# Ejecutar el reporte solo sobre los dataframes que ya cargaste
-reporte_rapido(dataframes)
\ No newline at end of file
+
+# ===============================================
+# ▶️ Ejecución
+# ===============================================
+def main(config=config):
+    audit = config.get("audit", {})
+    medidor = MedidorEtapas(BASE_DIR / audit.get("out_dir", "audit"),
+                            guardar_metricas=audit.get("save_metrics", False))
+
+    huellas = None
+    if audit.get("save_hashes", False):
+        with medidor.etapa("huellas_entrada") as reg:
+            huellas = registrar_huellas([BASE_DIR / p for p in config["paths"].values()], config)
+            reg["filas_salida"] = len(huellas)
+
+    reporte_esquema = {}
+    tablas = {}
+    with medidor.etapa("carga") as reg:
+        dataframes = cargar_fuentes(config, huellas, reporte_esquema)
+        reg["filas_salida"] = sum(len(d) for d in dataframes.values())
+
+    if "--reporte" in sys.argv:
+        reporte_rapido(dataframes)
+
+    with medidor.etapa("union", reg["filas_salida"]) as reg:
+        df = unir_hogares(dataframes)
+        reg["filas_salida"] = len(df)
+    hogares = dataframes.get(CLAVE_MAESTRO)
+    del dataframes
+
+    with medidor.etapa("coordenadas", len(df)) as reg:
+        df = revisar_coordenadas(df, config)
+        reg["filas_salida"] = int((df["CALIDAD_GPS"].isin(UTILIZABLES) & df["CALIDAD_HOGAR"].isin(UTILIZABLES)).sum())
+
+    with medidor.etapa("distancia", len(df)) as reg:
+        df = calcular_distancias(df, config)
+        reg["filas_salida"] = int(df["DISTANCIA_KM"].notna().sum())
+
+    if "geo_verification" in config and "DEPARTAMENTO" not in df.columns:
+        print("⚠️ Sin columna DEPARTAMENTO: se omite la verificación geográfica.")
+    elif "geo_verification" in config:
+        with medidor.etapa("geoverificacion", len(df)) as reg:
+            df = verificar_geografia(df, config)
+            reg["filas_salida"] = int((df["GEO_ESTADO"] == "OK").sum())
+
+    with medidor.etapa("clasificacion", len(df)) as reg:
+        df = clasificar(df, config)
+        reg["filas_salida"] = len(df)
+
+    with medidor.etapa("deduplicacion", len(df)) as reg:
+        df = marcar_canonicas(df)
+        reg["filas_salida"] = int(df["ES_CANONICA"].sum())
+
+    if audit.get("save_exclusions", False):
+        with medidor.etapa("exclusiones", len(df)) as reg:
+            excl = registrar_exclusiones(df, config, medidor.run_id)
+            reg["filas_salida"] = len(excl)
+
+    if hogares is not None:
+        with medidor.etapa("hogares_cercanos", int((df["VALIDA_BASE"] == "INCONSISTENTE").sum())) as reg:
+            df = buscar_hogares_cercanos(df, hogares, config)
+            reg["filas_salida"] = int(df["OTRO_HOGAR_EN_RANGO"].sum())
+        del hogares
+
+    with medidor.etapa("colocalizacion", len(df)) as reg:
+        df = marcar_colocalizacion(df, config)
+        reg["filas_salida"] = int(df["COLOCALIZADA"].sum())
+
+    with medidor.etapa("rafagas", len(df)) as reg:
+        df, tablas["rafagas_gestores"] = marcar_rafagas(df, config)
+        reg["filas_salida"] = int(df["RAFAGA"].sum())
+
+    with medidor.etapa("grilla", len(df)) as reg:
+        tablas["grilla_visitas"] = agregar_grilla(
+            df, config.get("heatmap", {}).get("resolutions_deg", [0.25, 0.05, 0.01]),
+            config["territorial_rules"].get("outlier_km", 50),
+        )
+        reg["filas_salida"] = len(tablas["grilla_visitas"])
+
+    if "stats_store" in config:
+        with medidor.etapa("estadisticas", len(df)) as reg:
+            reg["filas_salida"] = len(actualizar_almacen(df, config))
+
+    if "visit_store" in config:
+        with medidor.etapa("almacen_visitas", len(df)) as reg:
+            reg["filas_salida"] = len(guardar_almacen_visitas(df, config))
+
+    with medidor.etapa("escritura", len(df)) as reg:
+        salidas = escribir(df, config, tablas)
+        reg["filas_salida"] = len(df)
+
+    if audit.get("save_hashes", False):
+        with medidor.etapa("huellas_salida") as reg:
+            registrar_huellas(salidas.values(), config)
+            reg["filas_salida"] = len(salidas)
+
+    if config.get("warmup", {}).get("after_etl", True) or "--precalentar" in sys.argv:
+        with medidor.etapa("precalentamiento", len(df)) as reg:
+            # proceso aparte: los dashboards se ejecutan con su propio runtime de Streamlit
+            resultado = subprocess.run([sys.executable, str(BASE_DIR / "scripts" / "precalentar.py")], check=False)
+            if resultado.returncode != 0:
+                print("⚠️ El precalentamiento de dashboards falló; el ETL se publicó igual.")
+            reg["filas_salida"] = len(df)
+
+    medidor.guardar(filas_finales=len(df), memoria_esquema=reporte_esquema)
+    print("\n✅ ETL completo.")
+    return df
+
+
+if __name__ == "__main__":
+    main()
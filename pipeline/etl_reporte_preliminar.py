@@ -1,12 +1,18 @@
 # ===============================================================
-# 🧾 REPORTE EXPLORATORIO PREVIO A LIMPIEZA (v. final)
+# 🧾 REPORTE EXPLORATORIO PREVIO A LIMPIEZA (v. perfilador)
 # ===============================================================
+# Uso: python pipeline/etl_reporte_preliminar.py [--excel]
+#   --excel  además exporta los .xlsx y las muestras de 50 filas
 
+import sys
 import pandas as pd
 import yaml
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from scripts.perfilador import perfilar_fuentes
 
 # === Configurar visualización en consola ===
 pd.set_option('display.max_rows', None)
@@ -17,97 +23,92 @@ pd.set_option('display.width', None)
 with open(BASE_DIR / "pipeline" / "config.yaml", "r", encoding="utf-8") as f:
     config = yaml.safe_load(f)
 
-# === 2️⃣ Cargar datasets ===
-dataframes = {}
-for key, path_str in config["paths"].items():
-    path = BASE_DIR / path_str
-    try:
-        df = pd.read_excel(path)
-        dataframes[key] = df
-        print(f"✅ {key} cargado correctamente ({df.shape[0]:,} filas × {df.shape[1]} columnas)")
-    except Exception as e:
-        print(f"❌ Error al leer {key}: {e}")
-
-# ===============================================================
-# 1️⃣ Periodos de registros
-# ===============================================================
-print("\n📅 Periodos de registros (FECHA_REGISTRO_ATENCION):")
-for name, df in dataframes.items():
-    if "FECHA_REGISTRO_ATENCION" in df.columns:
-        df["FECHA_REGISTRO_ATENCION"] = pd.to_datetime(df["FECHA_REGISTRO_ATENCION"], errors="coerce")
-        print(f" - {name}: Min → {df['FECHA_REGISTRO_ATENCION'].min()} | Max → {df['FECHA_REGISTRO_ATENCION'].max()}")
-    else:
-        print(f" - {name}: (no tiene columna FECHA_REGISTRO_ATENCION)")
-
-# ===============================================================
-# 2️⃣ Resumen de forma
-# ===============================================================
-print("\n📏 Resumen de forma de cada DataFrame:")
-for name, df in dataframes.items():
-    print(f" - {name}: {df.shape[0]:,} filas × {df.shape[1]} columnas")
-
-# ===============================================================
-# 3️⃣ Comparación de tipos de datos
-# ===============================================================
-print("\n🧩 Comparación de tipos de datos entre DataFrames:")
-all_cols = sorted(set().union(*[df.columns for df in dataframes.values()]))
-
-comparacion = []
-for col in all_cols:
-    fila = {"columna": col}
-    for name, df in dataframes.items():
-        fila[f"{name}_dtype"] = str(df[col].dtype) if col in df.columns else "-"
-    comparacion.append(fila)
+OUT_DIR = BASE_DIR / "data/processed"
+COLS_CLAVE = ["TIPO_SEGUIMIENTO", "TIPO_MO", "TIPO_MO_1"]
 
-df_types = pd.DataFrame(comparacion)
-df_types.to_excel(BASE_DIR / "data/processed/resumen_tipos_columnas.xlsx", index=False)
-print("📁 Exportado: resumen_tipos_columnas.xlsx")
 
-# ===============================================================
-# 4️⃣ Diccionario de columnas
-# ===============================================================
-print("\n📖 Generando diccionario de columnas...")
-
-dict_frames = []
-for name, df in dataframes.items():
-    info = pd.DataFrame({
-        "columna": df.columns,
-        "dtype": df.dtypes.astype(str),
-        "%_nulos": (df.isna().sum() / len(df) * 100).round(2),
-        "valores_unicos": df.nunique()
-    })
-    info.insert(0, "dataframe", name)
-    dict_frames.append(info)
-
-df_diccionario = pd.concat(dict_frames, ignore_index=True)
-output_dict_path = BASE_DIR / "data/processed/diccionario_columnas.xlsx"
-df_diccionario.to_excel(output_dict_path, index=False)
-print(f"📁 Exportado: diccionario_columnas.xlsx")
-
-# ===============================================================
-# 5️⃣ Valores únicos en columnas clave
-# ===============================================================
-cols_clave = ["TIPO_SEGUIMIENTO", "TIPO_MO", "TIPO_MO_1"]
-for col in cols_clave:
-    print(f"\n🔍 Valores únicos en '{col}':")
-    for name, df in dataframes.items():
-        if col in df.columns:
-            uniques = df[col].dropna().unique()
-            print(f"  {name}: {uniques}")
+def main(exportar_excel=False):
+    # === 2️⃣ Perfilar datasets (uno por proceso, una sola pasada cada uno) ===
+    rutas = {}
+    for key, path_str in config["paths"].items():
+        path = BASE_DIR / path_str
+        if path.exists():
+            rutas[key] = path
         else:
-            print(f"  {name}: (no existe)")
-
-# ===============================================================
-# 6️⃣ Muestra visual (primeras 50 filas)
-# ===============================================================
-print("\n📘 Exportando muestras de las primeras 50 filas por DataFrame...")
-
-sample_dir = BASE_DIR / "data/processed/muestras"
-sample_dir.mkdir(parents=True, exist_ok=True)
-
-for name, df in dataframes.items():
-    sample_path = sample_dir / f"muestra_{name}.xlsx"
-    df.head(50).to_excel(sample_path, index=False)
-    print(f"📁 Guardado: {sample_path.name}")
-
-print("\n✅ Reporte exploratorio completo. Archivos generados en 'data/processed/' y 'data/processed/muestras/'")
\ No newline at end of file
+            print(f"❌ Error al leer {key}: no existe {path}")
+
+    perfil, muestras = perfilar_fuentes(rutas)
+    for name, grupo in perfil.groupby("dataframe", sort=False):
+        print(f"✅ {name} perfilado ({grupo['filas'].iat[0]:,} filas × {len(grupo)} columnas)")
+
+    # ===============================================================
+    # 1️⃣ Periodos de registros
+    # ===============================================================
+    print("\n📅 Periodos de registros (FECHA_REGISTRO_ATENCION):")
+    fechas = perfil[perfil["columna"] == "FECHA_REGISTRO_ATENCION"].set_index("dataframe")
+    for name in rutas:
+        if name in fechas.index:
+            print(f" - {name}: Min → {fechas.at[name, 'min']} | Max → {fechas.at[name, 'max']}")
+        else:
+            print(f" - {name}: (no tiene columna FECHA_REGISTRO_ATENCION)")
+
+    # ===============================================================
+    # 2️⃣ Resumen de forma
+    # ===============================================================
+    print("\n📏 Resumen de forma de cada DataFrame:")
+    for name, grupo in perfil.groupby("dataframe", sort=False):
+        print(f" - {name}: {grupo['filas'].iat[0]:,} filas × {len(grupo)} columnas")
+
+    # ===============================================================
+    # 3️⃣ Comparación de tipos de datos
+    # ===============================================================
+    print("\n🧩 Comparación de tipos de datos entre DataFrames:")
+    df_types = (
+        perfil.pivot(index="columna", columns="dataframe", values="dtype")
+        .reindex(columns=list(muestras))
+        .fillna("-")
+        .add_suffix("_dtype")
+        .reset_index()
+    )
+    df_types.columns.name = None
+
+    # ===============================================================
+    # 4️⃣ Diccionario de columnas (perfil completo)
+    # ===============================================================
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    df_types.to_parquet(OUT_DIR / "resumen_tipos_columnas.parquet", index=False)
+    perfil.to_parquet(OUT_DIR / "perfil_columnas.parquet", index=False)
+    perfil.to_json(OUT_DIR / "perfil_columnas.json", orient="records", force_ascii=False, indent=2)
+    print("📁 Exportado: resumen_tipos_columnas.parquet, perfil_columnas.parquet y perfil_columnas.json")
+
+    # ===============================================================
+    # 5️⃣ Valores más frecuentes en columnas clave
+    # ===============================================================
+    for col in COLS_CLAVE:
+        print(f"\n🔍 Valores frecuentes en '{col}':")
+        for name in rutas:
+            fila = perfil[(perfil["dataframe"] == name) & (perfil["columna"] == col)]
+            if fila.empty:
+                print(f"  {name}: (no existe)")
+            else:
+                top = fila["top_valores"].iat[0]
+                print(f"  {name}: {[t['valor'] for t in top]} (~{fila['valores_unicos_aprox'].iat[0]:,} distintos)")
+
+    # ===============================================================
+    # 6️⃣ Exportación Excel opcional (tipos, diccionario y muestras de 50 filas)
+    # ===============================================================
+    if exportar_excel:
+        df_types.to_excel(OUT_DIR / "resumen_tipos_columnas.xlsx", index=False)
+        perfil.drop(columns="top_valores").to_excel(OUT_DIR / "diccionario_columnas.xlsx", index=False)
+        sample_dir = OUT_DIR / "muestras"
+        sample_dir.mkdir(parents=True, exist_ok=True)
+        for name, muestra in muestras.items():
+            muestra.to_excel(sample_dir / f"muestra_{name}.xlsx", index=False)
+        print("📁 Exportado: resumen_tipos_columnas.xlsx, diccionario_columnas.xlsx y muestras/")
+
+    print("\n✅ Reporte exploratorio completo. Archivos generados en 'data/processed/'")
+    return perfil
+
+
+if __name__ == "__main__":
+    main(exportar_excel="--excel" in sys.argv)
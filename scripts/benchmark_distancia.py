@@ -0,0 +1,59 @@
+# ===============================================
+# ⏱️ Benchmark: distancias en serie vs. en paralelo (memoria compartida)
+# ===============================================
+# Uso: python scripts/benchmark_distancia.py --filas 20000000 --workers 1 2 4 8
+
+import sys
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from scripts.utils import PERU_BBOX, haversine_km
+from scripts.paralelo import distancia_paralela
+
+
+def coordenadas_sinteticas(n, semilla=0):
+    """Visitas y hogares aleatorios dentro de la caja de Perú (hogar a pocos km de la visita)."""
+    rng = np.random.default_rng(semilla)
+    lat_min, lat_max, lon_min, lon_max = PERU_BBOX
+    lat = rng.uniform(lat_min, lat_max, n)
+    lon = rng.uniform(lon_min, lon_max, n)
+    return lat, lon, lat + rng.normal(0, 0.02, n), lon + rng.normal(0, 0.02, n)
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Curva de escalamiento del cálculo de distancias")
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--filas-tramo", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    coords = coordenadas_sinteticas(args.filas)
+    base, referencia = medir(lambda: haversine_km(*coords), args.repeticiones)
+    print(f"📏 {args.filas:,} filas | serie (haversine_km): {base:.2f} s\n")
+    print(f"{'workers':>8} {'seg':>8} {'Mfilas/s':>10} {'aceleración':>12}")
+    for w in args.workers:
+        seg, resultado = medir(
+            lambda: distancia_paralela(*coords, workers=w, filas_tramo=args.filas_tramo), args.repeticiones
+        )
+        if not np.allclose(resultado, referencia, equal_nan=True):
+            raise AssertionError(f"Resultado distinto con {w} workers")
+        print(f"{w:>8} {seg:>8.2f} {args.filas / seg / 1e6:>10.1f} {base / seg:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
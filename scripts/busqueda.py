@@ -0,0 +1,93 @@
+# scripts/busqueda.py
+import numpy as np
+import pandas as pd
+
+
+def _codificar_trigramas(matriz):
+    """Empaqueta cada ventana de 3 caracteres (code points UCS-4) en un int64."""
+    m = matriz.astype(np.int64)
+    return (m[:, :-2] << 42) | (m[:, 1:-1] << 21) | m[:, 2:]
+
+
+def _matriz_caracteres(textos):
+    textos = np.asarray(textos, dtype=str)
+    ancho = max(int(np.char.str_len(textos).max(initial=0)), 1)
+    return textos.astype(f"U{ancho}").view(np.uint32).reshape(len(textos), ancho)
+
+
+class IndiceCodigos:
+    """Índice ordenado sobre los valores únicos de una columna de códigos (p. ej. CO_HOGAR).
+
+    Los códigos se convierten a texto una sola vez; las búsquedas exactas y por
+    prefijo son búsquedas binarias y la de subcadena usa un índice de
+    trigramas que se construye la primera vez que se pide. Los resultados se
+    devuelven como posiciones de fila del arreglo original.
+    """
+
+    def __init__(self, codigos):
+        inversa, valores = pd.factorize(pd.Series(codigos))  # nulos → -1
+        texto = np.char.upper(np.char.strip(np.asarray(valores).astype(str)))
+        orden_texto = np.argsort(texto, kind="stable")
+        self.unicos = texto[orden_texto]
+        rango = np.empty(len(orden_texto) + 1, dtype=np.int64)
+        rango[orden_texto] = np.arange(len(orden_texto))
+        rango[-1] = len(orden_texto)  # los nulos quedan al final, fuera de todo código
+        inversa = rango[inversa]
+        # filas agrupadas por código (formato CSR): orden[inicios[i]:inicios[i + 1]]
+        self.orden = np.argsort(inversa, kind="stable")
+        self.inicios = np.searchsorted(inversa[self.orden], np.arange(len(self.unicos) + 1))
+        self._trigramas = None
+
+    # ---------- búsquedas sobre códigos únicos ----------
+    def exacto(self, consulta):
+        consulta = consulta.strip().upper()
+        i = np.searchsorted(self.unicos, consulta)
+        return np.arange(i, i + 1) if i < len(self.unicos) and self.unicos[i] == consulta else np.arange(0)
+
+    def prefijo(self, consulta):
+        consulta = consulta.strip().upper()
+        inicio = np.searchsorted(self.unicos, consulta, side="left")
+        fin = np.searchsorted(self.unicos, consulta + "\U0010ffff", side="left")
+        return np.arange(inicio, fin)
+
+    def contiene(self, consulta):
+        consulta = consulta.strip().upper()
+        if len(consulta) < 3:
+            return np.flatnonzero(np.char.find(self.unicos, consulta) >= 0)
+        claves, ids = self._indice_trigramas()
+        candidatos = None
+        for clave in np.unique(_codificar_trigramas(_matriz_caracteres([consulta]))):
+            a, b = np.searchsorted(claves, clave, side="left"), np.searchsorted(claves, clave, side="right")
+            candidatos = ids[a:b] if candidatos is None else np.intersect1d(candidatos, ids[a:b], assume_unique=True)
+            if len(candidatos) == 0:
+                return candidatos
+        # los trigramas no garantizan contigüidad: se verifica solo sobre los candidatos
+        return candidatos[np.char.find(self.unicos[candidatos], consulta) >= 0]
+
+    def _indice_trigramas(self):
+        if self._trigramas is None:
+            matriz = _matriz_caracteres(self.unicos)
+            if matriz.shape[1] < 3:
+                self._trigramas = (np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+                return self._trigramas
+            claves = _codificar_trigramas(matriz)
+            # ventanas con relleno (carácter 0) no son trigramas reales
+            validas = (matriz[:, :-2] > 0) & (matriz[:, 1:-1] > 0) & (matriz[:, 2:] > 0)
+            ids = np.broadcast_to(np.arange(len(self.unicos))[:, None], claves.shape)[validas]
+            claves = claves[validas]
+            # pares (trigrama, código) únicos, ordenados por trigrama y luego por código
+            orden = np.argsort(claves, kind="stable")  # ids ya vienen crecientes
+            claves, ids = claves[orden], ids[orden]
+            nuevos = np.r_[True, (claves[1:] != claves[:-1]) | (ids[1:] != ids[:-1])]
+            self._trigramas = (claves[nuevos], ids[nuevos])
+        return self._trigramas
+
+    # ---------- de códigos a filas ----------
+    def filas(self, ids):
+        """Posiciones de fila (ordenadas) de los códigos únicos `ids`."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return np.arange(0)
+        largos = self.inicios[ids + 1] - self.inicios[ids]
+        desde = np.repeat(self.inicios[ids] - np.r_[0, np.cumsum(largos)[:-1]], largos)
+        return np.sort(self.orden[desde + np.arange(largos.sum())])
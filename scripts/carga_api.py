@@ -0,0 +1,73 @@
+# ===============================================
+# 🔨 Prueba de carga de la API JSON (app/api.py)
+# ===============================================
+# Uso: python scripts/carga_api.py --url http://127.0.0.1:8600 --peticiones 2000 --concurrencia 50 [--etag]
+#
+# Arma las URLs con los periodos y UT de /api/version, las pide con N
+# conexiones simultáneas y reporta peticiones/s, p50/p95 y códigos de respuesta.
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+import numpy as np
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+
+def urls_de_prueba(base, version):
+    datos = version["datos"]
+    urls = [f"{base}/api/tendencia_mensual", f"{base}/api/departamentos"]
+    for periodo in datos["periodos"]:
+        for ut in [None] + datos["uts"]:
+            q = urlencode({"periodo": periodo, **({"ut": ut} if ut else {})})
+            urls += [f"{base}/api/validacion?{q}", f"{base}/api/gestores?{q}", f"{base}/api/distritos?{q}"]
+    return urls
+
+
+async def correr(base, peticiones, concurrencia, usar_etag):
+    AsyncHTTPClient.configure(None, max_clients=concurrencia)
+    cliente = AsyncHTTPClient()
+    version = json.loads((await cliente.fetch(f"{base}/api/version")).body)
+    urls = itertools.cycle(urls_de_prueba(base, version))
+    etags, latencias, codigos = {}, [], Counter()
+
+    async def trabajador(n):
+        for _ in range(n):
+            url = next(urls)
+            cabeceras = {"If-None-Match": etags[url]} if usar_etag and url in etags else {}
+            t0 = time.perf_counter()
+            try:
+                resp = await cliente.fetch(url, headers=cabeceras, raise_error=False)
+                codigos[resp.code] += 1
+                if resp.code == 200 and "ETag" in resp.headers:
+                    etags[url] = resp.headers["ETag"]
+            except HTTPClientError as e:
+                codigos[e.code] += 1
+            latencias.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    por_trabajador = [peticiones // concurrencia + (i < peticiones % concurrencia) for i in range(concurrencia)]
+    await asyncio.gather(*(trabajador(n) for n in por_trabajador))
+    total = time.perf_counter() - t0
+    ms = np.array(latencias) * 1000
+    print(f"📊 {len(ms):,} peticiones en {total:.1f} s → {len(ms) / total:,.0f} pet/s")
+    print(f"   latencia p50 {np.percentile(ms, 50):.1f} ms | p95 {np.percentile(ms, 95):.1f} ms | máx {ms.max():.1f} ms")
+    print(f"   códigos: {dict(sorted(codigos.items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API JSON.")
+    parser.add_argument("--url", default="http://127.0.0.1:8600")
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--concurrencia", type=int, default=50)
+    parser.add_argument("--etag", action="store_true", help="reenviar If-None-Match (clientes que revalidan)")
+    args = parser.parse_args()
+    asyncio.run(correr(args.url.rstrip("/"), args.peticiones, args.concurrencia, args.etag))
+
+
+if __name__ == "__main__":
+    main()
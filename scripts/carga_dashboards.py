@@ -0,0 +1,208 @@
+# ===============================================
+# 🔨 Prueba de carga de los dashboards (sesiones simultáneas)
+# ===============================================
+# Uso: python scripts/carga_dashboards.py --app dashboard2 --sesiones 10 --interacciones 30
+#
+# Simula N analistas con streamlit.testing AppTest: cada sesión tiene su hilo y
+# su estado, y repite interacciones típicas (periodo, UT, distrito, gestor,
+# búsqueda de hogar o DNI, mapa). Las cachés de Streamlit son las del proceso,
+# compartidas entre sesiones como en el servidor real.
+#
+# AppTest usa un runtime global por proceso, así que las ejecuciones del script
+# se turnan con un candado: equivale al servidor de un solo proceso, donde las
+# reruns compiten por el GIL. Se reporta la latencia vista por el usuario
+# (espera + ejecución) y el tiempo de ejecución solo.
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from scripts.consultas import MotorConsultas
+from scripts.metricas import rss_actual_mb, rss_pico_mb
+
+
+def widget(at, tipo, etiqueta=None, key=None):
+    """Widget de la última ejecución por etiqueta o key (None si no está en pantalla)."""
+    for w in getattr(at, tipo):
+        if (key is not None and w.key == key) or (etiqueta is not None and w.label == etiqueta):
+            return w
+    return None
+
+
+def muestras(motor, consulta, n, semilla):
+    valores = motor.sql(consulta)["V"].dropna().astype(str).tolist()
+    return random.Random(semilla).sample(valores, min(n, len(valores))) if valores else []
+
+
+# ======================================================
+# 🎬 ESCENARIOS: interacción → función(at, azar, datos) que cambia un widget
+# ======================================================
+def elegir(w, azar, desde=1):
+    if w is not None and len(w.options) > desde:
+        w.set_value(azar.choice(w.options[desde:]))
+        return True
+    return False
+
+
+def escribir(w, texto):
+    if w is not None:
+        w.set_value(texto)
+    return w is not None
+
+
+ESCENARIO_DASHBOARD2 = {
+    "periodo": (4, lambda at, azar, d: elegir(widget(at, "selectbox", "📆 Periodo operativo"), azar)),
+    "ut": (3, lambda at, azar, d: elegir(widget(at, "selectbox", "🏙️ Unidad Territorial (UT)"), azar, 0)),
+    # con un distrito elegido se dibuja el mapa del ámbito con las visitas
+    "distrito_mapa": (3, lambda at, azar, d: elegir(widget(at, "selectbox", "📍 Distrito"), azar, 0)),
+    "gestor": (2, lambda at, azar, d: elegir(widget(at, "selectbox", "👤 Filtrar por Gestor Local"), azar, 0)),
+    "tipo_visita": (1, lambda at, azar, d: elegir(widget(at, "selectbox", "📍 Tipo de visita"), azar, 0)),
+    # prefijo de un CO_HOGAR real (o borrar la búsqueda)
+    "buscar_hogar": (3, lambda at, azar, d: escribir(
+        widget(at, "text_input", "🏠 Buscar por Código de Hogar:"),
+        azar.choice(d["hogares"])[: azar.randint(4, 8)] if azar.random() < 0.8 else "")),
+}
+
+ESCENARIO_DASHBOARD1 = {
+    "seccion": (3, lambda at, azar, d: elegir(widget(at, "radio", key="seccion"), azar, 0)),
+    "ut_ranking": (3, lambda at, azar, d: elegir(widget(at, "selectbox", key="ut_select"), azar, 0)),
+    "periodo": (2, lambda at, azar, d: elegir(widget(at, "selectbox", key="period_select"), azar, 0)),
+    "zona_mapa": (1, lambda at, azar, d: elegir(widget(at, "selectbox", key="zona_grilla"), azar, 0)),
+    "buscar_dni": (3, lambda at, azar, d: escribir(
+        widget(at, "text_input", "🔎 Ingrese DNI del Gestor Local:"), azar.choice(d["dnis"]))),
+}
+
+ESCENARIOS = {"dashboard1": ESCENARIO_DASHBOARD1, "dashboard2": ESCENARIO_DASHBOARD2}
+
+
+# ======================================================
+# 🧵 SESIONES
+# ======================================================
+class Prueba:
+    def __init__(self, app, timeout, pausa):
+        self.app = app
+        self.ruta = str(BASE_DIR / "app" / f"{app}.py")
+        self.timeout = timeout
+        self.pausa = pausa
+        self.candado = threading.Lock()
+        self.registros = []  # (sesión, interacción, espera_s, ejecución_s, error)
+        self.lock_registros = threading.Lock()
+
+    def ejecutar(self, at, sesion, interaccion):
+        t0 = time.perf_counter()
+        with self.candado:
+            t1 = time.perf_counter()
+            at.run()
+            t2 = time.perf_counter()
+        error = at.exception[0].message if at.exception else None
+        with self.lock_registros:
+            self.registros.append((sesion, interaccion, t1 - t0, t2 - t1, error))
+
+    def sesion(self, n, interacciones, datos, semilla):
+        from streamlit.testing.v1 import AppTest
+        azar = random.Random(semilla + n)
+        escenario = ESCENARIOS[self.app]
+        nombres = list(escenario)
+        pesos = [escenario[k][0] for k in nombres]
+        at = AppTest.from_file(self.ruta, default_timeout=self.timeout)
+        self.ejecutar(at, n, "inicio")
+        if self.app == "dashboard2":  # sin periodo elegido el dashboard se detiene
+            escenario["periodo"][1](at, azar, datos)
+            self.ejecutar(at, n, "periodo")
+        hechas = 0
+        while hechas < interacciones:
+            nombre = azar.choices(nombres, pesos)[0]
+            if not escenario[nombre][1](at, azar, datos):
+                continue  # el widget no está en pantalla en este estado
+            time.sleep(self.pausa)
+            self.ejecutar(at, n, nombre)
+            hechas += 1
+
+
+def resumen(registros):
+    df = pd.DataFrame(registros, columns=["SESION", "INTERACCION", "ESPERA_S", "EJECUCION_S", "ERROR"])
+    df["LATENCIA_MS"] = (df["ESPERA_S"] + df["EJECUCION_S"]) * 1000
+    df["EJECUCION_MS"] = df["EJECUCION_S"] * 1000
+    tabla = df.groupby("INTERACCION").agg(
+        N=("LATENCIA_MS", "size"),
+        P50_MS=("LATENCIA_MS", "median"),
+        P95_MS=("LATENCIA_MS", lambda x: np.percentile(x, 95)),
+        EJEC_P50_MS=("EJECUCION_MS", "median"),
+        EJEC_P95_MS=("EJECUCION_MS", lambda x: np.percentile(x, 95)),
+        ERRORES=("ERROR", "count"),
+    ).round(1)
+    return df, tabla
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de los dashboards con sesiones simultáneas.")
+    parser.add_argument("--app", choices=sorted(ESCENARIOS), default="dashboard2")
+    parser.add_argument("--sesiones", type=int, default=10)
+    parser.add_argument("--interacciones", type=int, default=30, help="interacciones por sesión")
+    parser.add_argument("--pausa", type=float, default=0.0, help="segundos de 'lectura' entre interacciones")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    os.chdir(BASE_DIR)  # los dashboards usan rutas relativas a la raíz del repo
+    motor = MotorConsultas(BASE_DIR / "data" / "processed")
+    datos = {
+        "hogares": muestras(motor, "SELECT DISTINCT CAST(CO_HOGAR AS VARCHAR) AS V FROM visitas", 500, args.semilla),
+        "dnis": muestras(motor, "SELECT DISTINCT CAST(DNI_GEL AS VARCHAR) AS V FROM visitas", 500, args.semilla),
+    }
+
+    prueba = Prueba(args.app, args.timeout, args.pausa)
+    rss_inicio = rss_actual_mb()
+    print(f"🔨 {args.app}: {args.sesiones} sesiones × {args.interacciones} interacciones")
+    t0 = time.perf_counter()
+    hilos = [threading.Thread(target=prueba.sesion, args=(n, args.interacciones, datos, args.semilla))
+             for n in range(args.sesiones)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    total = time.perf_counter() - t0
+
+    df, tabla = resumen(prueba.registros)
+    interaccion = df[df["INTERACCION"] != "inicio"]
+    with pd.option_context("display.width", 160):
+        print(tabla.to_string())
+    print(f"\n📊 {len(df):,} reruns en {total:.1f} s ({len(df) / total:.1f} reruns/s)")
+    print(f"   latencia (espera + ejecución) p50 {interaccion['LATENCIA_MS'].median():.0f} ms | "
+          f"p95 {np.percentile(interaccion['LATENCIA_MS'], 95):.0f} ms")
+    print(f"   ejecución sola p50 {interaccion['EJECUCION_MS'].median():.0f} ms | "
+          f"p95 {np.percentile(interaccion['EJECUCION_MS'], 95):.0f} ms")
+    print(f"   memoria RSS {rss_inicio:.0f} → {rss_actual_mb():.0f} MB (pico {rss_pico_mb():.0f} MB)")
+    errores = df["ERROR"].dropna()
+    if len(errores):
+        print(f"⚠️ {len(errores)} reruns con excepción, p. ej.: {errores.iloc[0]}")
+
+    out_dir = BASE_DIR / "audit"
+    out_dir.mkdir(exist_ok=True)
+    ruta = out_dir / f"carga_{args.app}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({
+            "app": args.app, "sesiones": args.sesiones, "interacciones": args.interacciones,
+            "pausa_s": args.pausa, "segundos": round(total, 2), "reruns": len(df),
+            "p50_ms": round(float(interaccion["LATENCIA_MS"].median()), 1),
+            "p95_ms": round(float(np.percentile(interaccion["LATENCIA_MS"], 95)), 1),
+            "rss_mb": rss_actual_mb(), "rss_pico_mb": rss_pico_mb(), "errores": int(len(errores)),
+            "por_interaccion": tabla.reset_index().to_dict(orient="records"),
+        }, f, ensure_ascii=False, indent=2)
+    print(f"📁 Resultado guardado: {ruta.relative_to(BASE_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# scripts/colocalizacion.py
+import numpy as np
+import pandas as pd
+
+from scripts.utils import PERU_BBOX, dentro_de_peru
+
+METROS_POR_GRADO = 111_320
+LAT_MIN, _, LON_MIN, _ = PERU_BBOX
+
+
+def claves_celda(lat, lon, grupo, radio_m, ref_lat, desfase=0.0):
+    """Id denso de la celda (grupo, celda_lat, celda_lon) de una grilla de ~radio_m metros.
+
+    Los tres componentes se ordenan con lexsort en vez de empaquetarse en un
+    solo entero, así no hay colisiones ni desbordes para ningún radio o número
+    de grupos. `desfase` (fracción de celda) permite una segunda grilla corrida
+    media celda para no partir los grupos que caen justo en un borde. Devuelve
+    -1 si la coordenada está fuera de la caja de Perú.
+    """
+    dlat = radio_m / METROS_POR_GRADO
+    dlon = dlat / np.cos(np.radians(ref_lat))
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    grupo = np.asarray(grupo, dtype=np.int64)
+    validos = dentro_de_peru(lat, lon)  # fuera de la caja (p. ej. 0,0) no se calcula celda
+    clat = np.floor((np.where(validos, lat, LAT_MIN) - LAT_MIN) / dlat + desfase).astype(np.int64)
+    clon = np.floor((np.where(validos, lon, LON_MIN) - LON_MIN) / dlon + desfase).astype(np.int64)
+    orden = np.lexsort((clon, clat, grupo))
+    g, a, b = grupo[orden], clat[orden], clon[orden]
+    nueva = np.r_[True, (g[1:] != g[:-1]) | (a[1:] != a[:-1]) | (b[1:] != b[:-1])]
+    clave = np.empty(len(orden), dtype=np.int64)
+    clave[orden] = np.cumsum(nueva) - 1
+    return np.where(validos, clave, -1)
+
+
+def hogares_por_celda(claves, co_hogar):
+    """Cantidad de CO_HOGAR distintos en la celda de cada fila (0 si la clave es -1).
+
+    Un CO_HOGAR -1 (visita sin hogar) no cuenta como hogar.
+    """
+    orden = np.lexsort((co_hogar, claves))
+    k, h = claves[orden], co_hogar[orden]
+    nueva_celda = np.r_[True, k[1:] != k[:-1]]
+    nuevo_hogar = (nueva_celda | np.r_[True, h[1:] != h[:-1]]) & (h >= 0)
+    id_celda = np.cumsum(nueva_celda) - 1
+    distintos = np.bincount(id_celda, weights=nuevo_hogar).astype(np.int64)
+    resultado = np.empty(len(claves), dtype=np.int64)
+    resultado[orden] = distintos[id_celda]
+    return np.where(claves >= 0, resultado, 0)
+
+
+def detectar_colocalizacion(df, radio_m=50, min_hogares=5, ref_lat=-9.19):
+    """Marca visitas de un mismo gestor y día registradas desde un mismo punto para muchos hogares.
+
+    Agrega COLOC_HOGARES (hogares distintos en la celda, máximo entre las dos
+    grillas) y COLOCALIZADA (COLOC_HOGARES >= min_hogares).
+    """
+    con_fecha = df["FECHA_REGISTRO_ATENCION"].notna().to_numpy()
+    dia = df["FECHA_REGISTRO_ATENCION"].to_numpy("datetime64[D]").astype(np.int64)
+    dia = np.where(con_fecha, dia - (dia[con_fecha].min() if con_fecha.any() else 0), 0)
+    dni = pd.to_numeric(df["DNI_GEL"], errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+    grupo, _ = pd.factorize(dni * 100_000 + dia)  # (gestor, día) → id denso
+    co_hogar = pd.to_numeric(df["CO_HOGAR"], errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+    n_hogares = np.zeros(len(df), dtype=np.int64)
+    for desfase in (0.0, 0.5):
+        claves = claves_celda(df["LATITUD"], df["LONGITUD"], grupo, radio_m, ref_lat, desfase)
+        claves = np.where((dni >= 0) & con_fecha, claves, -1)
+        n_hogares = np.maximum(n_hogares, hogares_por_celda(claves, co_hogar))
+    df["COLOC_HOGARES"] = n_hogares.astype(np.int32)
+    df["COLOCALIZADA"] = n_hogares >= min_hogares
+    return df
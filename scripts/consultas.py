@@ -0,0 +1,182 @@
+# scripts/consultas.py
+# Uso (consultas ad-hoc desde la raíz del repo):
+#   python scripts/consultas.py "SELECT UT, count(*) FROM visitas WHERE MES >= '2025-06' GROUP BY UT"
+#   python scripts/consultas.py --nombre ut_priorizadas -p mes=2025-09 -p "uts=[PUNO, ICA]" --csv salida.csv
+import argparse
+import sys
+import pandas as pd
+import yaml
+from pathlib import Path
+
+import duckdb
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from scripts.estadisticas import _escribir_atomico
+
+# vista → archivos Parquet (relativos a data/processed) que la componen
+VISTAS = {
+    "visitas": "visitas/MES=*.parquet",
+    "gestores": "estadisticas/gestores/MES=*.parquet",
+    "hogares": "estadisticas/hogares/MES=*.parquet",
+    "miembros": "estadisticas/miembros/MES=*.parquet",
+    "grilla": "grilla_visitas.parquet",
+    "rafagas": "rafagas_gestores.parquet",
+}
+
+# Consultas de los dashboards: solo visitas canónicas; los parámetros van como $nombre
+CONSULTAS = {
+    "uts": """
+        SELECT DISTINCT UT FROM visitas WHERE ES_CANONICA AND UT IS NOT NULL ORDER BY UT
+    """,
+    "periodos": """
+        SELECT PERIODO FROM visitas WHERE ES_CANONICA AND PERIODO IS NOT NULL
+        GROUP BY PERIODO ORDER BY min(FECHA_REGISTRO_ATENCION)
+    """,
+    "resumen_mensual": """
+        SELECT MES,
+               100.0 * avg((VALIDA_BASE = 'VALIDA')::INT) AS VALIDA,
+               100.0 * avg((VALIDA_BASE = 'INCONSISTENTE')::INT) AS INCONSISTENTE
+        FROM visitas
+        WHERE ES_CANONICA AND EN_ANALISIS
+        GROUP BY MES ORDER BY MES
+    """,
+    "ut_priorizadas": """
+        SELECT UT,
+               100.0 * avg((VALIDA_BASE = 'VALIDA')::INT) AS VALIDA,
+               100.0 * avg((VALIDA_BASE = 'INCONSISTENTE')::INT) AS INCONSISTENTE
+        FROM visitas
+        WHERE ES_CANONICA AND EN_ANALISIS AND MES = $mes AND list_contains($uts, UT)
+        GROUP BY UT ORDER BY INCONSISTENTE
+    """,
+    # dashboard2: visitas de prioridad 4 y 5 del periodo; $ut y $distrito NULL = todos
+    "validacion": """
+        SELECT count(*) AS VISITAS,
+               count(*) FILTER (WHERE VALIDA_BASE = 'VALIDA') AS VALIDAS,
+               count(*) FILTER (WHERE VALIDA_BASE <> 'VALIDA') AS NO_VALIDAS,
+               round(100.0 * avg((VALIDA_BASE <> 'VALIDA')::INT), 1) AS PCT_NO_VALIDAS,
+               count(DISTINCT GEL) AS GESTORES
+        FROM visitas
+        WHERE ES_CANONICA AND PERIODO = $periodo AND ESCALA_PRIORIZACION IN (4, 5)
+          AND ($ut IS NULL OR UT = $ut) AND ($distrito IS NULL OR DISTRITO = $distrito)
+    """,
+    "ranking_gestores": """
+        SELECT GEL, any_value(DNI_GEL) AS DNI_GEL, mode(UT) AS UT, mode(DISTRITO) AS DISTRITO,
+               count(*) AS TOTAL, count(*) FILTER (WHERE VALIDA_BASE <> 'VALIDA') AS NO_VALIDAS,
+               round(100.0 * avg((VALIDA_BASE <> 'VALIDA')::INT), 1) AS PCT_NO_VALIDAS
+        FROM visitas
+        WHERE ES_CANONICA AND PERIODO = $periodo AND ESCALA_PRIORIZACION IN (4, 5)
+          AND ($ut IS NULL OR UT = $ut) AND ($distrito IS NULL OR DISTRITO = $distrito)
+        GROUP BY GEL HAVING count(*) >= $min_visitas
+        ORDER BY PCT_NO_VALIDAS DESC, NO_VALIDAS DESC
+    """,
+    "distritos": """
+        SELECT UT, DISTRITO, count(*) AS TOTAL,
+               count(*) FILTER (WHERE VALIDA_BASE <> 'VALIDA') AS NO_VALIDAS,
+               round(100.0 * avg((VALIDA_BASE <> 'VALIDA')::INT), 1) AS PCT_NO_VALIDAS
+        FROM visitas
+        WHERE ES_CANONICA AND PERIODO = $periodo AND ESCALA_PRIORIZACION IN (4, 5)
+          AND ($ut IS NULL OR UT = $ut)
+        GROUP BY UT, DISTRITO ORDER BY PCT_NO_VALIDAS DESC, TOTAL DESC
+    """,
+    # % de hogares con al menos la mitad de sus visitas fuera de rango, por departamento
+    "hogares_problematicos_depto": """
+        WITH base AS (
+            SELECT CO_HOGAR, upper(trim(strip_accents(DEPARTAMENTO))) AS DEPARTAMENTO, VALIDA_BASE
+            FROM visitas WHERE ES_CANONICA AND EN_ANALISIS
+        ),
+        hogares AS (
+            SELECT CO_HOGAR, avg((VALIDA_BASE = 'INCONSISTENTE')::INT) >= 0.5 AS PROBLEMATICO
+            FROM base GROUP BY CO_HOGAR
+        )
+        SELECT DEPARTAMENTO, 100.0 * avg(PROBLEMATICO::INT) AS PctHogaresProblematicos
+        FROM (SELECT DISTINCT CO_HOGAR, DEPARTAMENTO FROM base) JOIN hogares USING (CO_HOGAR)
+        GROUP BY DEPARTAMENTO
+    """,
+}
+
+
+# ===============================================
+# 📦 Escritura: un Parquet por mes
+# ===============================================
+def guardar_visitas(df, out_dir, meses_recientes=1, recalcular=False):
+    """Guarda las visitas en `out_dir/MES=YYYY-MM.parquet` (mismo criterio que el almacén de estadísticas).
+
+    Solo se reescriben los meses nuevos y los `meses_recientes` últimos; los
+    meses de corridas anteriores (otros años) se conservan. Devuelve los meses escritos.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    guardados = {p.stem.split("=", 1)[1] for p in out_dir.glob("MES=*.parquet")}
+    mes = df["MES"].astype(str)
+    meses = sorted(mes.unique())
+    recientes = set(meses[-meses_recientes:]) if meses_recientes > 0 else set()
+    pendientes = [m for m in meses if recalcular or m not in guardados or m in recientes]
+    for m in pendientes:
+        _escribir_atomico(df[(mes == m).to_numpy()].reset_index(drop=True), out_dir / f"MES={m}.parquet")
+    return pendientes
+
+
+# ===============================================
+# 🦆 Motor SQL en proceso (DuckDB)
+# ===============================================
+class MotorConsultas:
+    """DuckDB en memoria con una vista por cada tabla Parquet de `data/processed`.
+
+    Las vistas leen los archivos al consultar: DuckDB lee solo las columnas
+    usadas y descarta por estadísticas los meses que el WHERE excluye.
+    """
+
+    def __init__(self, processed_dir):
+        self.processed_dir = Path(processed_dir)
+        self.con = duckdb.connect()
+        self.vistas = []
+        for vista, patron in VISTAS.items():
+            if not any(self.processed_dir.glob(patron)):
+                continue
+            ruta = str(self.processed_dir / patron).replace("'", "''")
+            self.con.execute(
+                f"CREATE VIEW {vista} AS SELECT * FROM read_parquet('{ruta}', union_by_name = true)"
+            )
+            self.vistas.append(vista)
+
+    def disponible(self):
+        return "visitas" in self.vistas
+
+    def sql(self, consulta, parametros=None):
+        """Ejecuta SQL con parámetros `$nombre`; un cursor por llamada (seguro entre hilos)."""
+        with self.con.cursor() as cur:
+            return cur.execute(consulta, parametros or {}).df()
+
+    def consultar(self, nombre, **parametros):
+        return self.sql(CONSULTAS[nombre], parametros)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas SQL sobre el almacén Parquet de visitas.")
+    parser.add_argument("sql", nargs="?", help="consulta SQL (vistas: " + ", ".join(VISTAS) + ")")
+    parser.add_argument("--nombre", choices=sorted(CONSULTAS), help="consulta predefinida de los dashboards")
+    parser.add_argument("-p", "--param", action="append", default=[], help="parámetro clave=valor (valor en YAML)")
+    parser.add_argument("--csv", help="guardar el resultado en este CSV")
+    parser.add_argument("--dir", default=str(BASE_DIR / "data" / "processed"), help="carpeta data/processed")
+    args = parser.parse_args()
+    if bool(args.sql) == bool(args.nombre):
+        parser.error("indique una consulta SQL o --nombre")
+
+    motor = MotorConsultas(args.dir)
+    parametros = {}
+    for par in args.param:
+        clave, _, valor = par.partition("=")
+        parametros[clave] = yaml.safe_load(valor)
+    resultado = motor.sql(args.sql or CONSULTAS[args.nombre], parametros)
+    if args.csv:
+        resultado.to_csv(args.csv, index=False)
+        print(f"📁 {len(resultado):,} filas guardadas en {args.csv}")
+    else:
+        with pd.option_context("display.max_rows", 200, "display.width", 200):
+            print(resultado)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# scripts/coordenadas.py
+import numpy as np
+import pandas as pd
+
+from scripts.utils import dentro_de_peru
+
+CALIDADES = ["OK", "INVERTIDA", "BAJA_PRECISION", "SIN_COORDENADAS", "CERO", "FUERA_PERU"]
+UTILIZABLES = ["OK", "INVERTIDA", "BAJA_PRECISION"]
+
+_TOL_DECIMALES = 5e-6  # error de redondeo de float32 para |x| < 90
+
+
+def _pocos_decimales(x, decimales_min):
+    return np.abs(x - np.round(x, decimales_min - 1)) < _TOL_DECIMALES
+
+
+def evaluar_coordenadas(lat, lon, decimales_min=4, corregir_invertidas=True):
+    """Clasifica cada par (lat, lon) en una sola pasada.
+
+    Devuelve `(codigos, lat, lon)`: códigos int8 que indexan CALIDADES y las
+    coordenadas con las inversiones lat/lon corregidas. INVERTIDA es un par
+    fuera de Perú que cae dentro al intercambiarlo; BAJA_PRECISION, un par con
+    menos de `decimales_min` decimales en ambos ejes (GPS truncado).
+    """
+    lat = np.array(lat, dtype="float64")
+    lon = np.array(lon, dtype="float64")
+    nulo = np.isnan(lat) | np.isnan(lon)
+    cero = (lat == 0) & (lon == 0)
+    dentro = dentro_de_peru(lat, lon)
+    invertida = ~dentro & dentro_de_peru(lon, lat) & corregir_invertidas
+    lat[invertida], lon[invertida] = lon[invertida], lat[invertida]
+    truncada = (dentro | invertida) & _pocos_decimales(lat, decimales_min) & _pocos_decimales(lon, decimales_min)
+
+    codigos = np.select(
+        [nulo, cero, truncada, invertida, dentro],
+        [CALIDADES.index(c) for c in ("SIN_COORDENADAS", "CERO", "BAJA_PRECISION", "INVERTIDA", "OK")],
+        default=CALIDADES.index("FUERA_PERU"),
+    ).astype(np.int8)
+    return codigos, lat, lon
+
+
+def validar_coordenadas(df, col_lat, col_lon, col_calidad, decimales_min=4, corregir_invertidas=True):
+    """Agrega `col_calidad` (categórico) y corrige en el df las coordenadas invertidas."""
+    codigos, lat, lon = evaluar_coordenadas(df[col_lat], df[col_lon], decimales_min, corregir_invertidas)
+    df[col_lat] = lat.astype(df[col_lat].dtype, copy=False)
+    df[col_lon] = lon.astype(df[col_lon].dtype, copy=False)
+    df[col_calidad] = pd.Categorical.from_codes(codigos, categories=CALIDADES)
+    return df
+
+
+def resumen_calidad(df, columnas):
+    """Conteo por campo y código de calidad (incluye códigos sin registros)."""
+    partes = [
+        df[c].value_counts(sort=False).rename("REGISTROS").rename_axis("CALIDAD").reset_index().assign(CAMPO=c)
+        for c in columnas if c in df.columns
+    ]
+    return pd.concat(partes, ignore_index=True)[["CAMPO", "CALIDAD", "REGISTROS"]]
@@ -0,0 +1,20 @@
+# scripts/diferido.py
+import importlib
+import sys
+import time
+
+# Segundos que tomó cada importación diferida en este proceso (módulo → segundos)
+TIEMPOS_IMPORTACION = {}
+
+
+def importar(nombre):
+    """Importa `nombre` la primera vez que se usa y registra cuánto tardó.
+
+    Para las librerías pesadas de los dashboards (matplotlib, folium, pydeck…):
+    el módulo queda en `sys.modules`, así que las siguientes llamadas no cuestan.
+    """
+    if nombre not in sys.modules:
+        t0 = time.perf_counter()
+        importlib.import_module(nombre)
+        TIEMPOS_IMPORTACION[nombre] = time.perf_counter() - t0
+    return sys.modules[nombre]
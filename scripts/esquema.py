@@ -0,0 +1,123 @@
+# scripts/esquema.py
+import numpy as np
+import pandas as pd
+
+ENTEROS = {"int8", "int16", "int32", "int64", "uint8", "uint16", "uint32", "uint64"}
+
+
+class ErrorEsquema(ValueError):
+    """Un archivo no cumple el esquema declarado en `config.yaml`."""
+
+
+def _spec(valor):
+    """Normaliza `dtype` o `{dtype: ..., ...}` a dict."""
+    return {"dtype": valor} if isinstance(valor, str) else dict(valor)
+
+
+def normalizar_codigo(s, ancho):
+    """Códigos numéricos de ancho fijo (DNI) como texto con ceros a la izquierda.
+
+    Acepta texto o números (Excel suele perder el cero inicial o dejar "1234567.0").
+    Devuelve `(serie, inválidos)`: no numéricos o con más de `ancho` dígitos.
+    """
+    texto = s.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    invalidos = texto.notna() & ~texto.str.fullmatch(rf"\d{{1,{ancho}}}").fillna(False)
+    return texto.str.zfill(ancho), int(invalidos.sum())
+
+
+def convertir_columna(s, spec):
+    """Convierte una serie al tipo del esquema; devuelve `(serie, errores)`."""
+    dtype = spec["dtype"]
+    errores = []
+    nulos_antes = s.isna()
+
+    if dtype == "category":
+        if "zfill" in spec:
+            s, invalidos = normalizar_codigo(s, spec["zfill"])
+            if invalidos:
+                errores.append(f"{invalidos:,} códigos no numéricos o de más de {spec['zfill']} dígitos")
+                return s, errores
+        s = s.astype("category")
+        if "values" in spec:
+            fuera = set(s.cat.categories) - set(spec["values"])
+            if fuera:
+                errores.append(f"valores no permitidos {sorted(map(str, fuera))[:5]}")
+    elif dtype == "datetime":
+        s = pd.to_datetime(s, errors="coerce", format=spec.get("format"))
+    elif dtype in ENTEROS:
+        num = pd.to_numeric(s, errors="coerce")
+        if (num.notna() & (num % 1 != 0)).any():
+            errores.append("tiene decimales")
+        info = np.iinfo(dtype)
+        if num.notna().any() and (num.min() < info.min or num.max() > info.max):
+            errores.append(f"fuera de rango para {dtype} [{num.min()}, {num.max()}]")
+        if errores:
+            return s, errores
+        # con nulos se usa el entero nullable de pandas (Int8, UInt32, ...)
+        s = num.astype(dtype.capitalize().replace("Uint", "UInt") if num.isna().any() else dtype)
+    elif dtype.startswith("float"):
+        num = pd.to_numeric(s, errors="coerce")
+        tolerancia = spec.get("tolerance")
+        compacto = num.astype(dtype)
+        if tolerancia is not None and (compacto.astype("float64") - num).abs().max() > tolerancia:
+            compacto = num  # la precisión no alcanza: se mantiene float64
+        s = compacto
+    else:
+        s = s.astype(dtype)
+
+    no_convertidos = int((s.isna() & ~nulos_antes).sum())
+    if no_convertidos:
+        errores.append(f"{no_convertidos:,} valores no convertibles a {dtype}")
+    if not spec.get("nullable", True) and s.isna().any():
+        errores.append("tiene nulos y no es nullable")
+    return s, errores
+
+
+def aplicar_esquema(df, esquema, nombre, tipo=None):
+    """Aplica `schema.columns` al df y valida `schema.required[tipo]`.
+
+    Lanza `ErrorEsquema` con todas las violaciones juntas; si todo está bien
+    devuelve `(df, reporte)` con la memoria antes/después en MB.
+    """
+    antes = df.memory_usage(deep=True).sum()
+    violaciones = []
+
+    faltantes = [c for c in esquema.get("required", {}).get(tipo, []) if c not in df.columns]
+    if faltantes:
+        violaciones.append(f"faltan columnas {faltantes}")
+
+    for col, valor in esquema.get("columns", {}).items():
+        if col not in df.columns:
+            continue
+        serie, errores = convertir_columna(df[col], _spec(valor))
+        if errores:
+            violaciones.extend(f"{col}: {e}" for e in errores)
+        else:
+            df[col] = serie
+
+    if violaciones:
+        raise ErrorEsquema(f"{nombre} no cumple el esquema:\n - " + "\n - ".join(violaciones))
+
+    despues = df.memory_usage(deep=True).sum()
+    reporte = {
+        "mb_antes": round(antes / 1024 ** 2, 2),
+        "mb_despues": round(despues / 1024 ** 2, 2),
+        "ahorro_%": round((1 - despues / antes) * 100, 1) if antes else 0.0,
+    }
+    return df, reporte
+
+
+def concatenar(dfs):
+    """pd.concat que conserva las columnas category (une sus categorías)."""
+    dfs = list(dfs)
+    categoricas = {
+        c for d in dfs for c in d.columns if isinstance(d[c].dtype, pd.CategoricalDtype)
+    }
+    for col in categoricas:
+        union = pd.api.types.union_categoricals(
+            [d[col].astype("category") for d in dfs if col in d.columns], ignore_order=True
+        ).categories
+        for d in dfs:
+            if col in d.columns:
+                d[col] = d[col].astype("category").cat.set_categories(union)
+    return pd.concat(dfs, ignore_index=True)
@@ -0,0 +1,133 @@
+# scripts/estadisticas.py
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from scripts.esquema import normalizar_codigo
+
+# tabla → (claves, métricas); todas las métricas son sumables y las claves
+# incluyen MES, así cada mes es una partición independiente del almacén.
+TABLAS = {
+    "gestores": (["DNI_GEL", "UT", "MES", "PERIODO"], ["VALIDAS", "INCONSISTENTES"]),
+    "hogares": (["DNI_GEL", "CO_HOGAR", "MES", "PERIODO", "TIPO_MO", "ESCALA_PRIORIZACION"],
+                ["VALIDAS", "INCONSISTENTES"]),
+    "miembros": (["DNI_GEL", "TIPO_MO", "DNI", "MES"], []),  # conjunto exacto de integrantes
+}
+ANCHO_DNI = 8  # DNI peruano: 8 dígitos, se guarda como texto con el cero inicial
+
+
+def agregar(df):
+    """Agrega las visitas canónicas a las tablas del almacén (una fila por clave)."""
+    base = df[df["ES_CANONICA"]] if "ES_CANONICA" in df.columns else df
+    base = pd.DataFrame({
+        "DNI_GEL": base["DNI_GEL"].to_numpy(),
+        "GEL": base["GEL"].astype(object).to_numpy(),
+        "UT": base["UT"].astype(object).to_numpy(),
+        "CO_HOGAR": base["CO_HOGAR"].to_numpy(),
+        "DNI": base["DNI"].to_numpy(),
+        "TIPO_MO": base["TIPO_MO"].astype(object).to_numpy(),
+        "ESCALA_PRIORIZACION": base["ESCALA_PRIORIZACION"].to_numpy(),
+        "MES": base["MES"].astype(str).to_numpy(),
+        "PERIODO": base["PERIODO"].astype(object).to_numpy(),
+        "VALIDAS": (base["VALIDA_BASE"] == "VALIDA").to_numpy(np.int32),
+        "INCONSISTENTES": (base["VALIDA_BASE"] == "INCONSISTENTE").to_numpy(np.int32),
+    })
+    tablas = {}
+    for nombre, (claves, metricas) in TABLAS.items():
+        agg = {m: (m, "sum") for m in metricas}
+        if nombre == "gestores":
+            agg["GEL"] = ("GEL", "last")
+        if agg:
+            tabla = base.groupby(claves, dropna=False, sort=False).agg(**agg).reset_index()
+        else:
+            tabla = base[claves].drop_duplicates(ignore_index=True)
+        tablas[nombre] = tabla
+    return tablas
+
+
+def _escribir_atomico(tabla, ruta):
+    fd, tmp = tempfile.mkstemp(dir=ruta.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        tabla.to_parquet(tmp, index=False)
+        os.replace(tmp, ruta)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def actualizar_estadisticas(df, out_dir, meses_recientes=1, recalcular=False):
+    """Actualiza el almacén por mes: agrega solo los meses nuevos y los `meses_recientes` últimos.
+
+    Los meses ya guardados y más antiguos se conservan tal cual (sus visitas ya
+    no cambian). Devuelve la lista de meses recalculados.
+    """
+    out_dir = Path(out_dir)
+    for nombre in TABLAS:
+        (out_dir / nombre).mkdir(parents=True, exist_ok=True)
+    guardados = {p.stem.split("=", 1)[1] for p in (out_dir / "gestores").glob("MES=*.parquet")}
+    meses = sorted(df["MES"].astype(str).unique())
+    recientes = set(meses[-meses_recientes:]) if meses_recientes > 0 else set()
+    pendientes = [m for m in meses if recalcular or m not in guardados or m in recientes]
+    if not pendientes:
+        return []
+
+    tablas = agregar(df[df["MES"].astype(str).isin(pendientes)])
+    for nombre, tabla in tablas.items():
+        for mes, parte in tabla.groupby("MES", sort=False):
+            _escribir_atomico(parte.reset_index(drop=True), out_dir / nombre / f"MES={mes}.parquet")
+    return pendientes
+
+
+def _clave_dni(s):
+    return pd.to_numeric(s.astype(str), errors="coerce").fillna(-1).astype(np.int64)
+
+
+def _leer_particion(ruta):
+    parte = pd.read_parquet(ruta)
+    for col in ("DNI_GEL", "DNI"):
+        # meses escritos cuando el DNI se guardaba como entero: se recupera el cero inicial
+        if col in parte.columns and pd.api.types.is_integer_dtype(parte[col]):
+            parte[col] = normalizar_codigo(parte[col], ANCHO_DNI)[0].astype(object)
+    return parte
+
+
+def leer_tabla(out_dir, nombre):
+    """Une todas las particiones mensuales de una tabla, ordenada por DNI_GEL."""
+    rutas = sorted((Path(out_dir) / nombre).glob("MES=*.parquet"))
+    if not rutas:
+        claves, metricas = TABLAS[nombre]
+        return pd.DataFrame(columns=claves + metricas)
+    tabla = pd.concat([_leer_particion(r) for r in rutas], ignore_index=True)
+    # orden numérico (el mismo que usa `tramo`), válido aunque haya meses con DNI_GEL entero y otros texto
+    return tabla.sort_values("DNI_GEL", kind="stable", ignore_index=True, key=_clave_dni)
+
+
+class AlmacenEstadisticas:
+    """Consultas por gestor sobre el almacén: cada gestor es un tramo contiguo de filas."""
+
+    def __init__(self, out_dir):
+        self.tablas = {nombre: leer_tabla(out_dir, nombre) for nombre in TABLAS}
+        self._dni = {
+            n: _clave_dni(t["DNI_GEL"]).to_numpy() for n, t in self.tablas.items()
+        }
+
+    def disponible(self):
+        return not self.tablas["gestores"].empty
+
+    def tramo(self, nombre, dni):
+        """Filas de `nombre` del gestor `dni` (búsqueda binaria sobre DNI_GEL ordenado)."""
+        inicio, fin = np.searchsorted(self._dni[nombre], [dni, dni + 1])
+        return self.tablas[nombre].iloc[inicio:fin]
+
+    def ranking(self, ut, periodo=None):
+        """Visitas válidas e inconsistentes por gestor en una UT (y periodo, si se indica)."""
+        g = self.tablas["gestores"]
+        g = g[g["UT"] == ut]
+        if periodo is not None:
+            g = g[g["PERIODO"] == periodo]
+        return g.groupby("DNI_GEL", sort=False).agg(
+            GEL=("GEL", "last"), VALIDA=("VALIDAS", "sum"), INCONSISTENTE=("INCONSISTENTES", "sum")
+        ).reset_index()
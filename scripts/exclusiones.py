@@ -0,0 +1,104 @@
+# scripts/exclusiones.py
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+MOTIVOS = ["SIN_COORDENADAS", "DISTANCIA_ATIPICA", "PRIORIDAD_FUERA", "DUPLICADA"]
+
+# Motivos que cada dashboard descarta de verdad: dashboard1 analiza todas las
+# prioridades (EN_ANALISIS); dashboard2 solo prioridad 4 y 5, y cuenta las
+# visitas sin coordenadas o atípicas como "ubicación no válida".
+MOTIVOS_DASHBOARD = {
+    "dashboard1": ["SIN_COORDENADAS", "DISTANCIA_ATIPICA", "DUPLICADA"],
+    "dashboard2": ["PRIORIDAD_FUERA", "DUPLICADA"],
+}
+
+COLUMNAS_EXCLUSION = [
+    "CO_HOGAR", "DNI_GEL", "UT", "DISTRITO", "FECHA_REGISTRO_ATENCION",
+    "MES", "ESCALA_PRIORIZACION", "DISTANCIA_KM",
+]
+
+
+def mascaras_exclusion(df, outlier_km, prioridades):
+    """Devuelve {motivo: máscara booleana} con los registros que los dashboards descartan."""
+    mascaras = {
+        "SIN_COORDENADAS": df["DISTANCIA_KM"].isna().to_numpy(),
+        "DISTANCIA_ATIPICA": (df["DISTANCIA_KM"] > outlier_km).to_numpy(),
+        "PRIORIDAD_FUERA": ~df["ESCALA_PRIORIZACION"].isin(prioridades).to_numpy(),
+    }
+    if "ES_CANONICA" in df.columns:
+        mascaras["DUPLICADA"] = ~df["ES_CANONICA"].to_numpy()
+    return mascaras
+
+
+def construir_exclusiones(df, mascaras, run_id):
+    """Arma la tabla larga (una fila por registro y motivo) con columnas mínimas."""
+    cols = [c for c in COLUMNAS_EXCLUSION if c in df.columns]
+    partes = []
+    for motivo, mascara in mascaras.items():
+        idx = np.flatnonzero(mascara)
+        if len(idx) == 0:
+            continue
+        parte = df.iloc[idx][cols].copy()
+        parte.insert(0, "FILA", idx.astype("int64"))
+        parte.insert(0, "MOTIVO", motivo)
+        partes.append(parte)
+    if not partes:
+        return pd.DataFrame(columns=["RUN_ID", "MOTIVO", "FILA"] + cols)
+    excl = pd.concat(partes, ignore_index=True)
+    excl["MOTIVO"] = pd.Categorical(excl["MOTIVO"], categories=MOTIVOS)
+    excl.insert(0, "RUN_ID", run_id)
+    return excl
+
+
+def resumir_exclusiones(excl):
+    """Conteo por MES, UT y MOTIVO (resumen pequeño para los dashboards)."""
+    claves = [c for c in ["MES", "UT", "MOTIVO"] if c in excl.columns]
+    return excl.groupby(claves, observed=True).size().rename("REGISTROS").reset_index()
+
+
+def guardar_exclusiones(excl, out_dir, run_id, conservar=10):
+    """Guarda la foto completa de la corrida (zstd), reescribe el resumen y aplica la retención.
+
+    Cada archivo tiene todas las exclusiones de su corrida (no solo las nuevas),
+    así cada uno se audita por separado; se conservan las `conservar` corridas
+    más recientes y las anteriores se borran (0 = conservar todas).
+    """
+    out_dir = Path(out_dir)
+    carpeta = out_dir / "exclusiones"
+    carpeta.mkdir(parents=True, exist_ok=True)
+    ruta = carpeta / f"exclusiones_{run_id}.parquet"
+    excl.to_parquet(ruta, index=False, compression="zstd")
+    resumen = resumir_exclusiones(excl)
+    resumen.to_csv(out_dir / "exclusiones_resumen.csv", index=False)
+    if conservar > 0:
+        for antigua in sorted(carpeta.glob("exclusiones_*.parquet"))[:-conservar]:
+            antigua.unlink()
+    return ruta, resumen
+
+
+# ===============================================
+# 📋 Lectura para los dashboards
+# ===============================================
+def etiquetas_motivo(config):
+    """Texto de cada motivo con los umbrales de `config.yaml`."""
+    outlier_km = config.get("territorial_rules", {}).get("outlier_km", 50)
+    prioridades = [str(p) for p in config.get("priority_levels", [4, 5])]
+    lista = " y ".join([", ".join(prioridades[:-1]), prioridades[-1]]) if len(prioridades) > 1 else prioridades[0]
+    return {
+        "SIN_COORDENADAS": "Sin coordenadas válidas de visita u hogar",
+        "DISTANCIA_ATIPICA": f"Distancia mayor a {outlier_km:g} km (atípico)",
+        "PRIORIDAD_FUERA": f"Prioridad distinta de {lista}",
+        "DUPLICADA": "Visita duplicada (mismo hogar y fecha)",
+    }
+
+
+def leer_resumen_exclusiones(audit_dir, motivos=None):
+    """Resumen por MES, UT y MOTIVO que escribe el ETL (vacío si aún no existe), solo con `motivos`."""
+    ruta = Path(audit_dir) / "exclusiones_resumen.csv"
+    if not ruta.exists():
+        return pd.DataFrame(columns=["MES", "UT", "MOTIVO", "REGISTROS"])
+    resumen = pd.read_csv(ruta)
+    if motivos is not None:
+        resumen = resumen[resumen["MOTIVO"].isin(motivos)].reset_index(drop=True)
+    return resumen
@@ -0,0 +1,122 @@
+# scripts/geoverificacion.py
+import json
+import unicodedata
+import numpy as np
+import pandas as pd
+
+ESTADOS_GEO = ["OK", "OTRO_DEPARTAMENTO", "FUERA_PERU", "SIN_COORDENADAS", "SIN_DEPARTAMENTO"]
+
+
+def normalizar_nombre(nombre):
+    """Mayúsculas, sin tildes y sin espacios extremos (igual que `limpiar_nombre` del dashboard)."""
+    if not isinstance(nombre, str):
+        return nombre
+    sin_tildes = unicodedata.normalize("NFKD", nombre).encode("ascii", "ignore").decode("ascii")
+    return sin_tildes.strip().upper()
+
+
+def leer_poligonos(ruta, campo_nombre="NOMBDEP"):
+    """Lee un GeoJSON con `json` (sin geopandas): devuelve nombres y lista de anillos por polígono."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        geo = json.load(f)
+    nombres, anillos = [], []
+    for feat in geo["features"]:
+        geom = feat["geometry"]
+        partes = [geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"]
+        nombres.append(normalizar_nombre(feat["properties"][campo_nombre]))
+        anillos.append([np.asarray(anillo, dtype="float64")[:, :2] for parte in partes for anillo in parte])
+    return nombres, anillos
+
+
+class IndicePoligonos:
+    """Índice por bandas de latitud para punto-en-polígono vectorizado.
+
+    Cada arista se registra en las bandas horizontales que atraviesa; un punto
+    solo se prueba (ray casting, regla par-impar) contra las aristas de su banda,
+    así que el costo es ~N × aristas_por_banda en vez de N × aristas_totales.
+    """
+
+    def __init__(self, nombres, anillos, banda_deg=0.05):
+        self.nombres = list(nombres)
+        self.banda = banda_deg
+        x1, y1, x2, y2, pid = [], [], [], [], []
+        for i, rings in enumerate(anillos):
+            for r in rings:
+                a, b = r, np.roll(r, -1, axis=0)
+                x1.append(a[:, 0]); y1.append(a[:, 1]); x2.append(b[:, 0]); y2.append(b[:, 1])
+                pid.append(np.full(len(r), i))
+        x1, y1, x2, y2, pid = (np.concatenate(v) for v in (x1, y1, x2, y2, pid))
+        no_horizontal = y1 != y2  # las aristas horizontales nunca cruzan el rayo
+        self.x1, self.y1, self.x2, self.y2, self.pid = (
+            v[no_horizontal] for v in (x1, y1, x2, y2, pid)
+        )
+        self.pendiente = (self.x2 - self.x1) / (self.y2 - self.y1)
+
+        ys = np.concatenate([self.y1, self.y2])
+        self.y0 = ys.min()
+        self.n_bandas = int(np.floor((ys.max() - self.y0) / banda_deg)) + 1
+        b_lo = np.floor((np.minimum(self.y1, self.y2) - self.y0) / banda_deg).astype(np.int64)
+        b_hi = np.floor((np.maximum(self.y1, self.y2) - self.y0) / banda_deg).astype(np.int64)
+        repeticiones = b_hi - b_lo + 1
+        aristas = np.repeat(np.arange(len(self.x1)), repeticiones)
+        desplaz = np.arange(repeticiones.sum()) - np.repeat(np.cumsum(repeticiones) - repeticiones, repeticiones)
+        bandas = np.repeat(b_lo, repeticiones) + desplaz
+        orden = np.argsort(bandas, kind="stable")
+        self.aristas_banda = aristas[orden]
+        self.inicio_banda = np.searchsorted(bandas[orden], np.arange(self.n_bandas + 1))
+        self.one_hot = np.eye(len(self.nombres), dtype=np.float32)[self.pid]
+
+    @classmethod
+    def desde_geojson(cls, ruta, campo_nombre="NOMBDEP", banda_deg=0.05):
+        return cls(*leer_poligonos(ruta, campo_nombre), banda_deg=banda_deg)
+
+    def localizar(self, lat, lon, bloque=50_000):
+        """Índice del polígono que contiene cada punto (-1 si no cae en ninguno)."""
+        lat = np.asarray(lat, dtype="float64")
+        lon = np.asarray(lon, dtype="float64")
+        resultado = np.full(len(lat), -1, dtype=np.int32)
+        banda = np.floor((lat - self.y0) / self.banda)
+        validos = np.flatnonzero(np.isfinite(banda) & np.isfinite(lon) & (banda >= 0) & (banda < self.n_bandas))
+        if len(validos) == 0:
+            return resultado
+        banda = banda[validos].astype(np.int64)
+        orden = np.argsort(banda, kind="stable")
+        validos, banda = validos[orden], banda[orden]
+        cortes = np.flatnonzero(np.diff(banda)) + 1
+        for grupo in np.split(np.arange(len(validos)), cortes):
+            b = banda[grupo[0]]
+            e = self.aristas_banda[self.inicio_banda[b]:self.inicio_banda[b + 1]]
+            if len(e) == 0:
+                continue
+            ex1, ey1, ey2, m = self.x1[e], self.y1[e], self.y2[e], self.pendiente[e]
+            for i in range(0, len(grupo), bloque):
+                idx = validos[grupo[i:i + bloque]]
+                py, px = lat[idx, None], lon[idx, None]
+                cruza = ((ey1 > py) != (ey2 > py)) & (px < ex1 + (py - ey1) * m)
+                paridad = (cruza.astype(np.float32) @ self.one_hot[e]) % 2 == 1
+                resultado[idx] = np.where(paridad.any(axis=1), paridad.argmax(axis=1), -1)
+        return resultado
+
+
+def verificar_departamento(df, indice, equivalencias=None):
+    """Agrega DEPTO_GPS y GEO_ESTADO comparando la ubicación GPS con el DEPARTAMENTO declarado.
+
+    Sin DEPARTAMENTO declarado no hay con qué comparar: SIN_DEPARTAMENTO.
+    """
+    equivalencias = {normalizar_nombre(k): normalizar_nombre(v) for k, v in (equivalencias or {}).items()}
+    poligono = indice.localizar(df["LATITUD"], df["LONGITUD"])
+    nombres = np.array(indice.nombres + [None], dtype=object)
+    depto_gps = pd.Series(nombres[poligono], index=df.index)  # -1 → None
+
+    declarado = df["DEPARTAMENTO"].astype(object).map(normalizar_nombre).replace(equivalencias)
+    gps_equiv = depto_gps.replace(equivalencias)
+
+    sin_coord = df["LATITUD"].isna() | df["LONGITUD"].isna()
+    estado = np.select(
+        [sin_coord.to_numpy(), (poligono < 0), declarado.isna().to_numpy(), (gps_equiv != declarado).to_numpy()],
+        ["SIN_COORDENADAS", "FUERA_PERU", "SIN_DEPARTAMENTO", "OTRO_DEPARTAMENTO"],
+        default="OK",
+    )
+    df["DEPTO_GPS"] = depto_gps.astype("category")
+    df["GEO_ESTADO"] = pd.Categorical(estado, categories=ESTADOS_GEO)
+    return df
@@ -0,0 +1,82 @@
+# scripts/graficos.py
+import io
+
+from matplotlib.figure import Figure
+
+ROJO = "#E74C3C"
+ROJO_OSCURO = "#C0392B"
+AZUL = "#2E86C1"
+
+
+# ===============================================
+# 🖼️ Render a PNG
+# ===============================================
+def a_png(fig, dpi=200):
+    """Serializa la figura como st.pyplot (bbox ajustado, 200 dpi) y libera sus recursos.
+
+    Se usa `matplotlib.figure.Figure` sin pyplot: la figura no queda registrada en
+    ningún gestor global, así que no se acumula entre interacciones del servidor.
+    """
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+def _ejes_limpios(ax, xlabel, ylabel):
+    ax.set_ylabel(ylabel, fontsize=11, color="#555")
+    ax.set_xlabel(xlabel, fontsize=11, color="#555")
+    ax.grid(alpha=0.3)
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+
+
+# ===============================================
+# 📈 Gráficos de los dashboards
+# ===============================================
+def tendencia_mensual(meses, pct):
+    """Línea del % de visitas fuera de rango por mes (Resumen General)."""
+    fig = Figure(figsize=(9, 4))
+    ax = fig.subplots()
+    ax.plot(meses, pct, marker="o", linewidth=3, color=ROJO, label="Visitas fuera del rango")
+    ax.fill_between(meses, pct, color=ROJO, alpha=0.15)
+    for x, y in zip(meses, pct):
+        ax.text(x, y + 0.15, f"{y:.1f}%", color=ROJO_OSCURO, fontsize=9, ha="center", fontweight="bold")
+    if len(pct):
+        ax.set_ylim(max(0, min(pct) - 1.5), max(pct) + 1)
+    _ejes_limpios(ax, "Mes", "% de visitas fuera del rango")
+    return a_png(fig)
+
+
+def barras_ut(uts, validas, fuera):
+    """Barras horizontales apiladas (% válidas / % fuera del rango) por UT."""
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.barh(uts, validas, height=0.5, color=AZUL, edgecolor="white", label="Válida")
+    ax.barh(uts, fuera, left=validas, height=0.5, color=ROJO, edgecolor="white", label="Fuera del rango")
+    for i, (valida, inconsistente) in enumerate(zip(validas, fuera)):
+        ax.text(valida / 2, i, f"{valida:.1f}%", color="white", va="center", ha="center", fontsize=9)
+        ax.text(valida + inconsistente / 2, i, f"{inconsistente:.1f}%", color="black", va="center", ha="center", fontsize=9)
+    ax.set_xlabel("Porcentaje de visitas (%)")
+    ax.set_ylabel("Unidad Territorial (UT)")
+    ax.legend(title="Categoría de visita", loc="upper center", bbox_to_anchor=(0.5, 1.13), ncol=2)
+    ax.grid(axis="x", alpha=0.3)
+    return a_png(fig)
+
+
+def tendencia_gestor(periodos, pct):
+    """Línea del % fuera de rango de un gestor por periodo operativo."""
+    fig = Figure(figsize=(7, 3.3))
+    ax = fig.subplots()
+    ax.plot(periodos, pct, marker="o", linewidth=3, color=ROJO, label="% fuera de rango")
+    ax.fill_between(periodos, pct, color=ROJO, alpha=0.15)
+    for x, y in zip(periodos, pct):
+        ax.text(x, y + 0.3, f"{y:.1f}%", color=ROJO_OSCURO, fontsize=9, ha="center", fontweight="bold")
+    _ejes_limpios(ax, "Periodo operativo", "% de visitas fuera de rango")
+    ax.tick_params(axis="x", labelrotation=45)
+    for etiqueta in ax.get_xticklabels():
+        etiqueta.set_horizontalalignment("right")
+    ax.legend()
+    return a_png(fig)
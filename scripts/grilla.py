@@ -0,0 +1,43 @@
+# scripts/grilla.py
+import numpy as np
+import pandas as pd
+
+from scripts.utils import dentro_de_peru
+
+
+def agregar_grilla(df, resoluciones_deg, outlier_km=50):
+    """Cuenta visitas totales e inconsistentes por celda cuadrada, para cada resolución y UT.
+
+    Devuelve una tabla pequeña (RES_DEG, UT, CELDA_LAT, CELDA_LON, LAT, LON,
+    TOTAL, INCONSISTENTES) lista para el mapa: los puntos crudos nunca salen del ETL.
+    """
+    validas = dentro_de_peru(df["LATITUD"], df["LONGITUD"]) & (df["DISTANCIA_KM"] <= outlier_km).to_numpy()
+    if "ES_CANONICA" in df.columns:  # mismas visitas que cuentan los dashboards
+        validas &= df["ES_CANONICA"].to_numpy()
+    base = df[validas]
+    lat = base["LATITUD"].to_numpy(dtype="float64")
+    lon = base["LONGITUD"].to_numpy(dtype="float64")
+    incons = (base["VALIDA_BASE"] == "INCONSISTENTE").to_numpy()
+    ut = base["UT"].astype(str).to_numpy()
+
+    partes = []
+    for res in resoluciones_deg:
+        celdas = pd.DataFrame({
+            "UT": ut,
+            "CELDA_LAT": np.floor(lat / res).astype(np.int32),
+            "CELDA_LON": np.floor(lon / res).astype(np.int32),
+            "INCONSISTENTES": incons,
+        })
+        agg = celdas.groupby(["UT", "CELDA_LAT", "CELDA_LON"], sort=False).agg(
+            TOTAL=("INCONSISTENTES", "size"), INCONSISTENTES=("INCONSISTENTES", "sum")
+        ).reset_index()
+        agg.insert(0, "RES_DEG", np.float32(res))
+        agg["LAT"] = ((agg["CELDA_LAT"] + 0.5) * res).astype(np.float32)
+        agg["LON"] = ((agg["CELDA_LON"] + 0.5) * res).astype(np.float32)
+        partes.append(agg)
+
+    grilla = pd.concat(partes, ignore_index=True)
+    grilla["UT"] = grilla["UT"].astype("category")
+    grilla["TOTAL"] = grilla["TOTAL"].astype(np.int32)
+    grilla["INCONSISTENTES"] = grilla["INCONSISTENTES"].astype(np.int32)
+    return grilla
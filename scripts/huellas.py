@@ -0,0 +1,84 @@
+# scripts/huellas.py
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+TAM_BLOQUE = 1024 * 1024  # 1 MB por lectura
+
+
+def sha256_archivo(ruta, tam_bloque=TAM_BLOQUE):
+    """SHA-256 de un archivo leído por bloques (memoria constante)."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def leer_manifiesto(ruta_manifiesto):
+    """Lee el manifiesto `sha256  tamaño  mtime_ns  ruta` como dict por ruta."""
+    entradas = {}
+    ruta_manifiesto = Path(ruta_manifiesto)
+    if not ruta_manifiesto.exists():
+        return entradas
+    with open(ruta_manifiesto, "r", encoding="utf-8") as f:
+        for linea in f:
+            partes = linea.rstrip("\n").split("  ", 3)
+            if len(partes) != 4 or linea.startswith("#"):
+                continue
+            digest, tam, mtime, ruta = partes
+            entradas[ruta] = {"sha256": digest, "tamano": int(tam), "mtime_ns": int(mtime)}
+    return entradas
+
+
+def escribir_manifiesto(ruta_manifiesto, entradas):
+    """Escribe el manifiesto de forma atómica (archivo temporal + os.replace)."""
+    ruta_manifiesto = Path(ruta_manifiesto)
+    ruta_manifiesto.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=ruta_manifiesto.parent, prefix=".manifest_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("# sha256  tamano_bytes  mtime_ns  ruta\n")
+            for ruta in sorted(entradas):
+                e = entradas[ruta]
+                f.write(f"{e['sha256']}  {e['tamano']}  {e['mtime_ns']}  {ruta}\n")
+        os.replace(tmp, ruta_manifiesto)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def actualizar_manifiesto(rutas, ruta_manifiesto, base_dir, max_workers=4):
+    """Calcula (o reutiliza) la huella de cada archivo y actualiza el manifiesto.
+
+    Solo se vuelve a leer un archivo si cambió su tamaño o mtime respecto del
+    manifiesto previo; el resto se calcula en paralelo (hashlib libera el GIL).
+    Devuelve `(entradas, cambiados)` con las rutas relativas a `base_dir`.
+    """
+    base_dir = Path(base_dir)
+    entradas = leer_manifiesto(ruta_manifiesto)
+    pendientes = {}
+    for ruta in rutas:
+        ruta = Path(ruta)
+        if not ruta.exists():
+            continue
+        rel = ruta.resolve().relative_to(base_dir.resolve()).as_posix()
+        st = ruta.stat()
+        previa = entradas.get(rel)
+        if previa and previa["tamano"] == st.st_size and previa["mtime_ns"] == st.st_mtime_ns:
+            continue
+        pendientes[rel] = (ruta, st)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        digests = dict(zip(pendientes, pool.map(sha256_archivo, [r for r, _ in pendientes.values()])))
+
+    cambiados = set()
+    for rel, (ruta, st) in pendientes.items():
+        if entradas.get(rel, {}).get("sha256") != digests[rel]:
+            cambiados.add(rel)
+        entradas[rel] = {"sha256": digests[rel], "tamano": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    escribir_manifiesto(ruta_manifiesto, entradas)
+    return entradas, cambiados
@@ -0,0 +1,162 @@
+# scripts/limites.py
+import json
+import numpy as np
+from pathlib import Path
+
+from scripts.geoverificacion import normalizar_nombre
+
+ESCALA = 100_000  # cuantización: 1e-5 grados (~1.1 m)
+
+
+# ===============================================
+# ✂️ Simplificación (Douglas-Peucker)
+# ===============================================
+def simplificar_anillo(puntos, tolerancia):
+    """Douglas-Peucker iterativo; conserva al menos 4 vértices (anillo cerrado válido)."""
+    n = len(puntos)
+    if n <= 4:
+        return puntos
+    conservar = np.zeros(n, dtype=bool)
+    conservar[[0, n - 1]] = True
+    pila = [(0, n - 1)]
+    while pila:
+        i, j = pila.pop()
+        if j - i < 2:
+            continue
+        a, b = puntos[i], puntos[j]
+        tramo = puntos[i + 1:j]
+        ab = b - a
+        largo = np.hypot(*ab)
+        if largo == 0:
+            dist = np.hypot(*(tramo - a).T)
+        else:
+            dist = np.abs(ab[0] * (tramo[:, 1] - a[1]) - ab[1] * (tramo[:, 0] - a[0])) / largo
+        k = int(np.argmax(dist))
+        if dist[k] > tolerancia:
+            m = i + 1 + k
+            conservar[m] = True
+            pila.extend([(i, m), (m, j)])
+    if conservar.sum() < 4:
+        conservar[np.linspace(0, n - 1, 4).astype(int)] = True
+    return puntos[conservar]
+
+
+# ===============================================
+# 📦 Escritura: índice JSON + coordenadas int32 cuantizadas
+# ===============================================
+def leer_features(ruta, campo_nombre, campo_padre=None):
+    with open(ruta, "r", encoding="utf-8") as f:
+        geo = json.load(f)
+    for feat in geo["features"]:
+        geom = feat["geometry"]
+        poligonos = [geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"]
+        props = feat["properties"]
+        yield (
+            normalizar_nombre(props[campo_nombre]),
+            normalizar_nombre(props[campo_padre]) if campo_padre else None,
+            [[np.asarray(anillo, dtype="float64")[:, :2] for anillo in pol] for pol in poligonos],
+        )
+
+
+def construir_teselas(ruta_geojson, out_dir, nivel, campo_nombre, tolerancias, campo_padre=None):
+    """Genera, por cada tolerancia, `<nivel>_<tol>.bin` (int32) y `<nivel>_<tol>.json` (índice).
+
+    El índice guarda una entrada por feature (nombre, padre, desplazamiento en
+    el .bin y largos de cada anillo), para leer solo las geometrías que se pidan.
+    Es una lista y no un dict por nombre: hay distritos homónimos (SANTA ROSA,
+    SAN JUAN…) que se distinguen por su padre.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    features = list(leer_features(ruta_geojson, campo_nombre, campo_padre))
+    resumen = {}
+    for tol in tolerancias:
+        sufijo = f"{nivel}_{tol:g}"
+        indice = {"nivel": nivel, "tolerancia": tol, "escala": ESCALA, "features": []}
+        offset = 0
+        with open(out_dir / f"{sufijo}.bin", "wb") as f:
+            for nombre, padre, poligonos in features:
+                anillos = []
+                for pol in poligonos:
+                    largos = []
+                    for anillo in pol:
+                        q = np.round(simplificar_anillo(anillo, tol) * ESCALA).astype(np.int32)
+                        f.write(q.tobytes())
+                        largos.append(len(q))
+                    anillos.append(largos)
+                n = sum(map(sum, anillos))
+                indice["features"].append(
+                    {"nombre": nombre, "padre": padre, "offset": offset, "vertices": n, "anillos": anillos}
+                )
+                offset += n
+        with open(out_dir / f"{sufijo}.json", "w", encoding="utf-8") as f:
+            json.dump(indice, f, ensure_ascii=False)
+        resumen[tol] = offset
+    return resumen
+
+
+# ===============================================
+# 📥 Lectura selectiva
+# ===============================================
+def tolerancia_para_zoom(tolerancias, zoom):
+    """Tolerancia más gruesa que no se note a ese zoom (≈ 1 píxel de 256 px por tesela)."""
+    grados_por_pixel = 360 / (256 * 2 ** zoom)
+    aptas = [t for t in tolerancias if t <= grados_por_pixel]
+    return max(aptas) if aptas else min(tolerancias)
+
+
+class TeselasLimites:
+    """Lee geometrías simplificadas de un nivel sin cargar el archivo completo."""
+
+    def __init__(self, out_dir, nivel):
+        self.out_dir = Path(out_dir)
+        self.nivel = nivel
+        self.tolerancias = sorted(
+            float(p.stem.split("_", 1)[1]) for p in self.out_dir.glob(f"{nivel}_*.json")
+        )
+        self._indices = {}
+
+    def disponible(self):
+        return bool(self.tolerancias)
+
+    def indice(self, tol):
+        if tol not in self._indices:
+            with open(self.out_dir / f"{self.nivel}_{tol:g}.json", "r", encoding="utf-8") as f:
+                indice = json.load(f)
+            if isinstance(indice["features"], dict):  # índice anterior (por nombre): hasta regenerar
+                indice["features"] = [{"nombre": k, **v} for k, v in indice["features"].items()]
+            self._indices[tol] = indice
+        return self._indices[tol]
+
+    def geojson(self, zoom, nombres=None, padres=None):
+        """FeatureCollection con las features pedidas a la tolerancia del zoom.
+
+        Una feature entra si su nombre está en `nombres` y su padre en `padres`
+        (cada filtro solo se aplica si se indica).
+        """
+        tol = tolerancia_para_zoom(self.tolerancias, zoom)
+        idx = self.indice(tol)
+        nombres = {normalizar_nombre(n) for n in nombres} if nombres else None
+        padres = {normalizar_nombre(p) for p in padres} if padres else None
+        ruta_bin = self.out_dir / f"{self.nivel}_{tol:g}.bin"
+        features = []
+        for info in idx["features"]:
+            nombre = info["nombre"]
+            if (nombres and nombre not in nombres) or (padres and info["padre"] not in padres):
+                continue
+            q = np.fromfile(ruta_bin, dtype=np.int32, count=info["vertices"] * 2,
+                            offset=info["offset"] * 8).reshape(-1, 2)
+            coords = q / idx["escala"]
+            poligonos, i = [], 0
+            for largos in info["anillos"]:
+                pol = []
+                for n in largos:
+                    pol.append(coords[i:i + n].tolist())
+                    i += n
+                poligonos.append(pol)
+            features.append({
+                "type": "Feature",
+                "properties": {"NOMBRE": nombre, "PADRE": info["padre"]},
+                "geometry": {"type": "MultiPolygon", "coordinates": poligonos},
+            })
+        return {"type": "FeatureCollection", "features": features}
@@ -0,0 +1,114 @@
+# scripts/metricas.py
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource  # solo Unix
+except ImportError:
+    resource = None
+
+
+def rss_pico_mb():
+    """Pico de memoria residente de toda la vida del proceso en MB (None si no se puede medir)."""
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB y macOS bytes
+        return round(pico / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / 1024 ** 2, 1)
+    except (ImportError, AttributeError):
+        return None
+
+
+def rss_actual_mb():
+    """Memoria residente actual del proceso en MB (None si no se puede medir)."""
+    try:
+        with open("/proc/self/statm") as f:  # Linux
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2, 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / 1024 ** 2, 1)
+    except ImportError:
+        return None
+
+
+class MedidorEtapas:
+    """Mide tiempo, filas y memoria de cada etapa del ETL.
+
+    La memoria de la etapa es la RSS actual al entrar y al salir (y su
+    diferencia); el pico de `ru_maxrss` es de toda la vida del proceso, así que
+    solo se anota si la etapa lo elevó (`eleva_pico`).
+
+    Cada etapa se agrega como línea JSON a `run_log.txt` y, al cerrar la
+    corrida, se escribe `metricas_<run_id>.json` con el resumen completo.
+    """
+
+    def __init__(self, out_dir, guardar_metricas=True):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.guardar_metricas = guardar_metricas
+        self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.inicio = time.perf_counter()
+        self.etapas = []
+
+    @contextmanager
+    def etapa(self, nombre, filas_entrada=None):
+        """Mide el bloque; el llamador puede fijar `registro["filas_salida"]`."""
+        registro = {"run_id": self.run_id, "etapa": nombre,
+                    "inicio": datetime.now().isoformat(timespec="seconds"),
+                    "filas_entrada": filas_entrada, "filas_salida": None}
+        rss_inicio, pico_inicio = rss_actual_mb(), rss_pico_mb()
+        t0 = time.perf_counter()
+        estado = "ok"
+        try:
+            yield registro
+        except Exception:
+            estado = "error"
+            raise
+        finally:
+            segundos = time.perf_counter() - t0
+            filas = registro["filas_entrada"] or registro["filas_salida"]
+            rss_fin, pico_fin = rss_actual_mb(), rss_pico_mb()
+            delta = round(rss_fin - rss_inicio, 1) if rss_inicio is not None and rss_fin is not None else None
+            registro.update({
+                "estado": estado,
+                "segundos": round(segundos, 3),
+                "filas_por_seg": round(filas / segundos, 1) if filas and segundos > 0 else None,
+                "rss_inicio_mb": rss_inicio,
+                "rss_fin_mb": rss_fin,
+                "rss_delta_mb": delta,
+                "rss_pico_proceso_mb": pico_fin,
+                "eleva_pico": pico_fin is not None and pico_inicio is not None and pico_fin > pico_inicio,
+            })
+            self.etapas.append(registro)
+            self._log(registro)
+            memoria = f" | RSS {rss_inicio} → {rss_fin} MB" if delta is not None else ""
+            print(f"⏱️ {nombre}: {segundos:,.2f} s | filas {registro['filas_entrada']} → {registro['filas_salida']}{memoria}")
+
+    def _log(self, registro):
+        with open(self.out_dir / "run_log.txt", "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+
+    def guardar(self, **extra):
+        """Escribe el resumen de la corrida en `metricas_<run_id>.json`."""
+        resumen = {
+            "run_id": self.run_id,
+            "segundos_total": round(time.perf_counter() - self.inicio, 3),
+            "rss_pico_proceso_mb": rss_pico_mb(),
+            "etapas": self.etapas,
+            **extra,
+        }
+        if self.guardar_metricas:
+            ruta = self.out_dir / f"metricas_{self.run_id}.json"
+            with open(ruta, "w", encoding="utf-8") as f:
+                json.dump(resumen, f, ensure_ascii=False, indent=2, default=str)
+            print(f"📁 Métricas guardadas: {ruta.name}")
+        return resumen
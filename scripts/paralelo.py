@@ -0,0 +1,52 @@
+# scripts/paralelo.py
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from scripts.utils import haversine_km
+
+SUBBLOQUE = 65_536  # filas por operación vectorizada dentro de cada tramo (temporales caben en caché)
+
+
+def _distancia_tramo(args):
+    """Calcula la distancia de las filas [inicio, fin) directamente sobre la memoria compartida."""
+    nombre, n, inicio, fin = args
+    shm = shared_memory.SharedMemory(name=nombre)
+    try:
+        m = np.ndarray((5, n), dtype="float64", buffer=shm.buf)  # lat1, lon1, lat2, lon2, salida
+        for a in range(inicio, fin, SUBBLOQUE):
+            b = min(a + SUBBLOQUE, fin)
+            m[4, a:b] = haversine_km(m[0, a:b], m[1, a:b], m[2, a:b], m[3, a:b])
+        del m
+    finally:
+        shm.close()
+    return fin - inicio
+
+
+def distancia_paralela(lat1, lon1, lat2, lon2, workers=1, filas_tramo=1_000_000):
+    """Haversine en KM repartida en tramos entre `workers` procesos.
+
+    Las coordenadas se copian una vez a un bloque de memoria compartida; cada
+    proceso lee su tramo y escribe el resultado en el mismo bloque, sin
+    serializar arreglos. Con `workers <= 1` o pocas filas se calcula en serie.
+    """
+    n = len(lat1)
+    if workers is None or workers <= 1 or n <= filas_tramo:
+        return haversine_km(lat1, lon1, lat2, lon2)
+
+    shm = shared_memory.SharedMemory(create=True, size=5 * n * 8)
+    try:
+        m = np.ndarray((5, n), dtype="float64", buffer=shm.buf)
+        for i, col in enumerate((lat1, lon1, lat2, lon2)):
+            m[i] = np.asarray(col, dtype="float64")
+        tramos = [(shm.name, n, a, min(a + filas_tramo, n)) for a in range(0, n, filas_tramo)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            procesadas = sum(pool.map(_distancia_tramo, tramos))
+        if procesadas != n:
+            raise RuntimeError(f"Cálculo paralelo incompleto: {procesadas:,} de {n:,} filas procesadas")
+        distancia = m[4].copy()
+        del m
+    finally:
+        shm.close()
+        shm.unlink()
+    return distancia
@@ -0,0 +1,185 @@
+# scripts/perfil_render.py
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from scripts.diferido import TIEMPOS_IMPORTACION
+from scripts.metricas import rss_pico_mb
+
+VALORES_SI = {"1", "true", "si", "sí", "yes"}
+
+# Pila por hilo (cada sesión corre en su hilo): una marca por llamada a función
+# en caché; el cuerpo real solo corre cuando la caché falla y entonces la marca.
+_pilas = threading.local()
+_candado_log = threading.Lock()
+
+
+def perfil_activo(config):
+    """Perfil activado por UCC_PERFIL=1, por `?perfil=1` en la URL o por render_profile.enabled."""
+    if os.environ.get("UCC_PERFIL", "").strip().lower() in VALORES_SI:
+        return True
+    if st.query_params.get("perfil", "").strip().lower() in VALORES_SI:
+        return True
+    return bool(config.get("render_profile", {}).get("enabled", False))
+
+
+def _pila():
+    if not hasattr(_pilas, "marcas"):
+        _pilas.marcas = []
+    return _pilas.marcas
+
+
+# ===============================================
+# ⏱️ Perfil de una ejecución del dashboard
+# ===============================================
+class PerfilRender:
+    """Tiempos de una ejecución (rerun) del dashboard: secciones, pasos y funciones en caché.
+
+    Inactivo no mide nada y `cache` devuelve el decorador de Streamlit tal cual.
+    Activo, `cerrar` muestra el desglose en la barra lateral y agrega una línea
+    JSON al log de auditoría.
+    """
+
+    def __init__(self, app, config):
+        cfg = config.get("render_profile", {})
+        self.app = app
+        self.activo = perfil_activo(config)
+        self.log = Path(cfg.get("log_file", os.path.join("audit", "perfil_dashboards.jsonl")))
+        self.inicio = time.perf_counter()
+        self.importaciones_previas = set(TIEMPOS_IMPORTACION)
+        self.registros = []  # dicts: tipo, seccion, nombre, ms, cache
+        self.seccion_actual = None
+        self.inicio_seccion = None
+        self.cerrado = False
+
+    def _registrar(self, tipo, nombre, segundos, cache=None):
+        self.registros.append({
+            "tipo": tipo, "seccion": self.seccion_actual, "nombre": nombre,
+            "ms": round(segundos * 1000, 1), "cache": cache,
+        })
+
+    def _cerrar_seccion(self):
+        if self.seccion_actual is not None:
+            segundos = time.perf_counter() - self.inicio_seccion
+            nombre, self.seccion_actual = self.seccion_actual, None
+            self._registrar("seccion", nombre, segundos)
+
+    def seccion(self, nombre):
+        """Cierra la sección en curso y abre `nombre` (el script corre de arriba abajo)."""
+        if not self.activo:
+            return
+        self._cerrar_seccion()
+        self.seccion_actual = nombre
+        self.inicio_seccion = time.perf_counter()
+
+    @contextmanager
+    def medir(self, nombre):
+        """Mide un paso dentro de la sección en curso."""
+        if not self.activo:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._registrar("paso", nombre, time.perf_counter() - t0)
+
+    def cache(self, decorador):
+        """Envuelve `@st.cache_data(...)` / `@st.cache_resource(...)` para medir cada llamada y si acertó.
+
+        El cuerpo original se marca antes de pasarlo a Streamlit: `functools.wraps`
+        conserva nombre, firma y código fuente, así que la clave de caché (y la
+        caché en disco) es la misma con el perfil activo o no.
+        """
+        if not self.activo:
+            return decorador
+
+        def aplicar(funcion):
+            @functools.wraps(funcion)
+            def cuerpo(*args, **kwargs):
+                pila = _pila()
+                if pila:
+                    pila[-1] = True
+                return funcion(*args, **kwargs)
+
+            cacheada = decorador(cuerpo)
+
+            @functools.wraps(funcion)
+            def llamada(*args, **kwargs):
+                pila = _pila()
+                pila.append(False)
+                t0 = time.perf_counter()
+                try:
+                    return cacheada(*args, **kwargs)
+                finally:
+                    calculo = pila.pop()
+                    self._registrar("cache", funcion.__name__, time.perf_counter() - t0,
+                                    "miss" if calculo else "hit")
+
+            llamada.clear = cacheada.clear
+            return llamada
+
+        return aplicar
+
+    def cerrar(self):
+        """Cierra la última sección, muestra el desglose y lo agrega al log (una vez por ejecución)."""
+        if not self.activo or self.cerrado:
+            return
+        self.cerrado = True
+        self._cerrar_seccion()
+        total_ms = round((time.perf_counter() - self.inicio) * 1000, 1)
+        importaciones = {m: round(s * 1000, 1) for m, s in TIEMPOS_IMPORTACION.items()
+                         if m not in self.importaciones_previas}
+        self._mostrar(total_ms, importaciones)
+        self._guardar(total_ms, importaciones)
+
+    def _mostrar(self, total_ms, importaciones):
+        tabla = pd.DataFrame(self.registros, columns=["tipo", "seccion", "nombre", "ms", "cache"])
+        secciones = tabla[tabla["tipo"] == "seccion"]
+        detalle = tabla[tabla["tipo"] != "seccion"]
+        aciertos = int((detalle["cache"] == "hit").sum())
+        fallos = int((detalle["cache"] == "miss").sum())
+
+        with st.sidebar.expander(f"⏱️ Perfil de la ejecución: {total_ms:,.0f} ms", expanded=True):
+            st.caption(f"Caché: {aciertos} aciertos · {fallos} fallos · RSS pico {rss_pico_mb()} MB")
+            st.markdown("**Secciones**")
+            st.dataframe(
+                secciones.assign(pct=(secciones["ms"] / total_ms * 100).round(1))
+                [["nombre", "ms", "pct"]].rename(columns={"nombre": "Sección", "pct": "% del total"}),
+                hide_index=True, width="stretch",
+            )
+            if not detalle.empty:
+                st.markdown("**Pasos y funciones en caché**")
+                st.dataframe(
+                    detalle.sort_values("ms", ascending=False).fillna({"cache": ""})
+                    [["seccion", "nombre", "ms", "cache"]]
+                    .rename(columns={"seccion": "Sección", "nombre": "Paso / función", "cache": "Caché"}),
+                    hide_index=True, width="stretch",
+                )
+            if importaciones:
+                st.markdown("**Importaciones diferidas**")
+                st.dataframe(
+                    pd.DataFrame(list(importaciones.items()), columns=["Módulo", "ms"]),
+                    hide_index=True, width="stretch",
+                )
+
+    def _guardar(self, total_ms, importaciones):
+        registro = {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "app": self.app,
+            "total_ms": total_ms,
+            "rss_pico_mb": rss_pico_mb(),
+            "registros": self.registros,
+            "importaciones_ms": importaciones,
+        }
+        self.log.parent.mkdir(parents=True, exist_ok=True)
+        with _candado_log, open(self.log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
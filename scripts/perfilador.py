@@ -0,0 +1,124 @@
+# scripts/perfilador.py
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+FILAS_BLOQUE = 200_000
+TOP_K = 10
+
+
+# ===============================================
+# 🔢 HyperLogLog (conteo aproximado de distintos)
+# ===============================================
+class HyperLogLog:
+    """Sketch HLL sobre hashes de 64 bits; error típico ≈ 1.04 / sqrt(2**p)."""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registros = np.zeros(self.m, dtype=np.uint8)
+
+    def agregar(self, serie):
+        valores = serie.dropna()
+        if valores.empty:
+            return
+        h = pd.util.hash_pandas_object(valores, index=False).to_numpy(dtype=np.uint64)
+        bits = 64 - self.p
+        idx = (h >> np.uint64(bits)).astype(np.int64)
+        resto = (h & np.uint64((1 << bits) - 1)).astype(np.float64)  # < 2**50, exacto en float64
+        rango = np.where(resto > 0, bits - np.floor(np.log2(np.maximum(resto, 1))), bits + 1)
+        np.maximum.at(self.registros, idx, rango.astype(np.uint8))
+
+    def unir(self, otro):
+        np.maximum(self.registros, otro.registros, out=self.registros)
+
+    def estimar(self):
+        alfa = 0.7213 / (1 + 1.079 / self.m)
+        estimado = alfa * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registros.astype(np.int64)))
+        ceros = int(np.count_nonzero(self.registros == 0))
+        if estimado <= 2.5 * self.m and ceros:
+            estimado = self.m * np.log(self.m / ceros)  # linear counting para cardinalidades bajas
+        return int(round(estimado))
+
+
+# ===============================================
+# 📋 Perfil de un DataFrame en una sola pasada
+# ===============================================
+class _PerfilColumna:
+    def __init__(self, p):
+        self.nulos = 0
+        self.minimo = None
+        self.maximo = None
+        self.dtype = None
+        self.conteos = pd.Series(dtype="int64")
+        self.hll = HyperLogLog(p)
+
+    def actualizar(self, s):
+        self.dtype = str(s.dtype)
+        self.nulos += int(s.isna().sum())
+        self.hll.agregar(s)
+        if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_any_dtype(s):
+            mn, mx = s.min(), s.max()
+            if pd.notna(mn):
+                self.minimo = mn if self.minimo is None else min(self.minimo, mn)
+                self.maximo = mx if self.maximo is None else max(self.maximo, mx)
+        # candidatos a top: se conservan los TOP_K * 10 más frecuentes entre bloques
+        vc = s.astype(str).where(s.notna()).value_counts()
+        self.conteos = self.conteos.add(vc, fill_value=0).nlargest(TOP_K * 10)
+
+
+def perfilar_dataframe(df, nombre, filas_bloque=FILAS_BLOQUE, p=14):
+    """Nulos, dtype, min/max, top valores y distintos (HLL) recorriendo el df una vez."""
+    perfiles = {c: _PerfilColumna(p) for c in df.columns}
+    for inicio in range(0, max(len(df), 1), filas_bloque):
+        bloque = df.iloc[inicio:inicio + filas_bloque]
+        for col, perfil in perfiles.items():
+            perfil.actualizar(bloque[col])
+
+    filas = []
+    total = len(df)
+    for col, perfil in perfiles.items():
+        top = perfil.conteos.nlargest(TOP_K)
+        filas.append({
+            "dataframe": nombre,
+            "columna": col,
+            "dtype": perfil.dtype,
+            "filas": total,
+            "%_nulos": round(perfil.nulos / total * 100, 2) if total else 0.0,
+            "valores_unicos_aprox": perfil.hll.estimar(),
+            "min": None if perfil.minimo is None else str(perfil.minimo),
+            "max": None if perfil.maximo is None else str(perfil.maximo),
+            "top_valores": [{"valor": v, "conteo": int(n)} for v, n in top.items()],
+        })
+    return filas
+
+
+def leer_fuente(ruta):
+    """Lee parquet o Excel; las columnas FECHA* se convierten a datetime."""
+    ruta = Path(ruta)
+    df = pd.read_parquet(ruta) if ruta.suffix == ".parquet" else pd.read_excel(ruta)
+    for col in df.columns:
+        if "FECHA" in str(col).upper():
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+def _perfilar_ruta(args):
+    nombre, ruta = args
+    df = leer_fuente(ruta)
+    return nombre, perfilar_dataframe(df, nombre), df.head(50)
+
+
+def perfilar_fuentes(rutas, max_workers=None):
+    """Perfila varios archivos en paralelo (un proceso por dataset).
+
+    Devuelve `(perfil, muestras)`: un DataFrame con una fila por columna y
+    un dict con las primeras 50 filas de cada dataset.
+    """
+    filas, muestras = [], {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for nombre, perfil, muestra in pool.map(_perfilar_ruta, rutas.items()):
+            filas.extend(perfil)
+            muestras[nombre] = muestra
+    return pd.DataFrame(filas), muestras
@@ -0,0 +1,28 @@
+# scripts/periodos.py
+import numpy as np
+import pandas as pd
+
+
+def leer_periodos(config):
+    """Lista ordenada de (nombre, inicio, fin) de `operative_periods` (fechas inclusivas)."""
+    periodos = [
+        (nombre, pd.Timestamp(inicio), pd.Timestamp(fin))
+        for nombre, (inicio, fin) in config["operative_periods"].items()
+    ]
+    return sorted(periodos, key=lambda p: p[1])
+
+
+def asignar_periodo(fechas, periodos):
+    """Etiqueta cada fecha con su periodo operativo mediante búsqueda binaria.
+
+    `periodos` viene de `leer_periodos`; el día de fin cuenta completo. Devuelve
+    un Categorical ordenado (NaN si la fecha no cae en ningún periodo).
+    """
+    nombres = [p[0] for p in periodos]
+    inicios = np.array([p[1] for p in periodos], dtype="datetime64[ns]")
+    fines = np.array([p[2] + pd.Timedelta(days=1) for p in periodos], dtype="datetime64[ns]")
+    t = pd.to_datetime(pd.Series(fechas)).to_numpy("datetime64[ns]")
+    idx = np.searchsorted(inicios, t, side="right") - 1
+    dentro = (idx >= 0) & ~np.isnat(t)
+    dentro[dentro] = t[dentro] < fines[idx[dentro]]
+    return pd.Categorical.from_codes(np.where(dentro, idx, -1), categories=nombres, ordered=True)
@@ -0,0 +1,94 @@
+# ===============================================
+# 🔥 Precalentamiento de cachés de los dashboards
+# ===============================================
+# Uso: python scripts/precalentar.py   (después del ETL o antes de `streamlit run`)
+#
+# Ejecuta cada dashboard en modo headless (streamlit.testing AppTest) recorriendo
+# las vistas por defecto. Las cachés en memoria de Streamlit son por proceso, así
+# que lo que se comparte con el servidor son las funciones con
+# `st.cache_data(persist="disk")`: quedan en ~/.streamlit/cache y el servidor
+# no las calcula para el primer usuario.
+
+import os
+import sys
+import time
+import yaml
+import pandas as pd
+from pathlib import Path
+from unittest import mock
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from scripts.periodos import leer_periodos
+
+with open(BASE_DIR / "pipeline" / "config.yaml", "r", encoding="utf-8") as f:
+    config = yaml.safe_load(f)
+
+
+def periodo_actual(periodos, hoy=None):
+    """Periodo que contiene `hoy`; si ninguno, el último que ya empezó (o el primero)."""
+    hoy = pd.Timestamp(hoy or pd.Timestamp.today()).normalize()
+    iniciados = [p for p in periodos if p[1] <= hoy]
+    for nombre, inicio, fin in iniciados:
+        if hoy <= fin:
+            return nombre
+    return (iniciados or periodos)[-1][0]
+
+
+def _ejecutar(at, etiqueta):
+    t0 = time.perf_counter()
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{etiqueta}: {at.exception[0].message}")
+    print(f"   {etiqueta}: {time.perf_counter() - t0:.1f} s")
+    return at
+
+
+def precalentar_dashboard1(timeout):
+    """Vista nacional (pestañas 1–3) y el ranking de gestores de cada UT."""
+    from streamlit.testing.v1 import AppTest
+    at = _ejecutar(AppTest.from_file(str(BASE_DIR / "app" / "dashboard1.py"), default_timeout=timeout), "resumen nacional")
+    for seccion in at.radio(key="seccion").options[1:]:
+        at.radio(key="seccion").set_value(seccion)
+        _ejecutar(at, seccion)
+    selector = at.selectbox(key="ut_select")
+    for ut in selector.options[1:]:
+        selector.select(ut)
+        _ejecutar(at, f"ranking {ut}")
+        selector = at.selectbox(key="ut_select")
+
+
+def precalentar_dashboard2(timeout):
+    """Periodo actual a nivel nacional y por UT."""
+    from streamlit.testing.v1 import AppTest
+    at = _ejecutar(AppTest.from_file(str(BASE_DIR / "app" / "dashboard2.py"), default_timeout=timeout), "carga")
+    periodo = periodo_actual(leer_periodos(config))
+    at.selectbox[0].select(periodo)
+    _ejecutar(at, f"{periodo} nacional")
+    for ut in at.selectbox[1].options[1:]:
+        at.selectbox[1].select(ut)
+        _ejecutar(at, f"{periodo} {ut}")
+
+
+def main():
+    from streamlit.runtime.caching.storage.local_disk_cache_storage import LocalDiskCacheStorageManager
+    cfg = config.get("warmup", {})
+    timeout = cfg.get("timeout_s", 600)
+    os.chdir(BASE_DIR)  # los dashboards usan rutas relativas a la raíz del repo
+    # Descarta versiones anteriores guardadas en disco (publicaciones previas del ETL)
+    LocalDiskCacheStorageManager().clear_all()
+    # AppTest usa por defecto un almacenamiento solo en memoria: se reemplaza por
+    # el de disco, el mismo que usa `streamlit run`
+    with mock.patch("streamlit.testing.v1.app_test.MemoryCacheStorageManager", LocalDiskCacheStorageManager):
+        for nombre, funcion in (("dashboard1", precalentar_dashboard1), ("dashboard2", precalentar_dashboard2)):
+            if nombre not in cfg.get("dashboards", ["dashboard1", "dashboard2"]):
+                continue
+            print(f"🔥 {nombre}")
+            t0 = time.perf_counter()
+            funcion(timeout)
+            print(f"✅ {nombre} precalentado en {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# ===============================================
+# 🗺️ Preparación de límites administrativos (teselas simplificadas)
+# ===============================================
+# Uso: python scripts/prepare_data.py
+
+import sys
+import yaml
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from scripts.limites import construir_teselas
+
+with open(BASE_DIR / "pipeline" / "config.yaml", "r", encoding="utf-8") as f:
+    config = yaml.safe_load(f)
+
+
+def main():
+    cfg = config["boundaries"]
+    out_dir = BASE_DIR / cfg["out_dir"]
+    for nivel, fuente in cfg["levels"].items():
+        ruta = BASE_DIR / fuente["path"]
+        if not ruta.exists():
+            print(f"⚠️ No se encontró el archivo de límites ({nivel}): {ruta}")
+            continue
+        vertices = construir_teselas(
+            ruta, out_dir, nivel, fuente["name_field"], cfg["tolerances_deg"], fuente.get("parent_field")
+        )
+        detalle = " | ".join(f"tol {t:g}: {v:,} vértices" for t, v in vertices.items())
+        print(f"✅ {nivel}: {detalle}")
+    print(f"\n📁 Teselas generadas en '{cfg['out_dir']}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# scripts/rafagas.py
+import numpy as np
+import pandas as pd
+
+from scripts.utils import dentro_de_peru, haversine_km
+
+
+def detectar_rafagas(df, max_kmh=120, min_km=1.0):
+    """Velocidad implícita entre visitas consecutivas de cada gestor.
+
+    Ordena una sola vez por DNI_GEL y FECHA_REGISTRO_ATENCION y compara cada
+    visita con la anterior del mismo gestor (solo visitas con coordenadas
+    válidas). Agrega SEG_DESDE_ANTERIOR, KM_DESDE_ANTERIOR, VELOCIDAD_KMH y
+    RAFAGA (traslado de más de `min_km` a más de `max_kmh`, o en 0 segundos).
+    """
+    n = len(df)
+    t = df["FECHA_REGISTRO_ATENCION"].to_numpy("datetime64[s]").astype(np.int64)
+    dni = pd.to_numeric(df["DNI_GEL"], errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+    validos = np.flatnonzero(
+        dentro_de_peru(df["LATITUD"], df["LONGITUD"])
+        & df["FECHA_REGISTRO_ATENCION"].notna().to_numpy()
+        & (dni >= 0)
+    )
+    orden = validos[np.lexsort((t[validos], dni[validos]))]
+    t, dni = t[orden], dni[orden]
+    lat = df["LATITUD"].to_numpy(dtype="float64")[orden]
+    lon = df["LONGITUD"].to_numpy(dtype="float64")[orden]
+
+    mismo = np.r_[False, dni[1:] == dni[:-1]]
+    seg = np.where(mismo, np.r_[0, np.diff(t)], -1).astype(np.float64)
+    km = np.where(mismo, np.r_[np.nan, haversine_km(lat[:-1], lon[:-1], lat[1:], lon[1:])], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kmh = np.where(seg > 0, km / (seg / 3600), np.where(km > 0, np.inf, np.nan))
+    rafaga = mismo & (km > min_km) & (kmh > max_kmh)
+
+    seg_col = np.full(n, np.nan)
+    km_col = np.full(n, np.nan)
+    kmh_col = np.full(n, np.nan)
+    rafaga_col = np.zeros(n, dtype=bool)
+    seg_col[orden] = np.where(mismo, seg, np.nan)
+    km_col[orden] = km
+    kmh_col[orden] = kmh
+    rafaga_col[orden] = rafaga
+
+    df["SEG_DESDE_ANTERIOR"] = seg_col
+    df["KM_DESDE_ANTERIOR"] = km_col.astype(np.float32)
+    df["VELOCIDAD_KMH"] = kmh_col.astype(np.float32)
+    df["RAFAGA"] = rafaga_col
+    return df
+
+
+def resumen_rafagas(df):
+    """Estadísticas por gestor: traslados evaluados, imposibles y velocidad máxima finita."""
+    evaluados = df["SEG_DESDE_ANTERIOR"].notna()
+    base = df.loc[evaluados, ["DNI_GEL", "GEL", "SEG_DESDE_ANTERIOR", "VELOCIDAD_KMH", "RAFAGA"]]
+    base = base.assign(VELOCIDAD_FINITA=base["VELOCIDAD_KMH"].where(np.isfinite(base["VELOCIDAD_KMH"])))
+    resumen = base.groupby("DNI_GEL", observed=True).agg(
+        GEL=("GEL", "first"),
+        TRASLADOS=("RAFAGA", "size"),
+        RAFAGAS=("RAFAGA", "sum"),
+        MEDIANA_SEG_ENTRE_VISITAS=("SEG_DESDE_ANTERIOR", "median"),
+        VELOCIDAD_MAX_KMH=("VELOCIDAD_FINITA", "max"),
+    ).reset_index()
+    resumen["%_RAFAGAS"] = (resumen["RAFAGAS"] / resumen["TRASLADOS"] * 100).round(1)
+    resumen["GEL"] = resumen["GEL"].astype(str)
+    return resumen.sort_values(["%_RAFAGAS", "RAFAGAS"], ascending=False, ignore_index=True)
@@ -0,0 +1,24 @@
+# scripts/riesgo.py
+import numpy as np
+import pandas as pd
+
+
+def leer_niveles(config):
+    """Niveles de `risk_levels` ordenados por su límite inferior.
+
+    Devuelve `(nombres, limites_inferiores, min_visitas)`.
+    """
+    reglas = dict(config["risk_levels"])
+    min_visitas = int(reglas.pop("min_visitas", 0))
+    niveles = sorted(reglas.items(), key=lambda kv: kv[1][0])
+    return [n for n, _ in niveles], np.array([r[0] for _, r in niveles], dtype="float64"), min_visitas
+
+
+def clasificar_riesgo(pct, nombres, limites):
+    """Nivel de riesgo de cada porcentaje como categórico ordenado (cortes cerrados a la izquierda).
+
+    Los `.cat.codes` resultantes indexan directamente listas de colores o
+    íconos alineadas con `nombres`.
+    """
+    bordes = np.r_[-np.inf, limites[1:], np.inf]
+    return pd.cut(pd.Series(pct), bins=bordes, labels=nombres, right=False, ordered=True)
@@ -3,6 +3,10 @@ from haversine import haversine, Unit
 import pandas as pd
 import numpy as np
 
+RADIO_TIERRA_KM = 6371.0088  # mismo radio medio que usa la librería haversine
+# caja de Perú con margen (lat_min, lat_max, lon_min, lon_max)
+PERU_BBOX = (-20.0, 2.0, -82.0, -68.0)
+
 def calcular_distancia(row):
     """Calcula distancia en KM entre visita y hogar."""
     if pd.isna(row["LATITUD"]) or pd.isna(row["LONGITUD"]) \
@@ -28,4 +32,27 @@ def clasificar_base(row):
     cat = row["CATEGORIA"]
     dist = row["DISTANCIA_KM"]
     umbrales = {"URBANO": 0.5, "ANDINO": 2, "AMAZONICO": 5}
-    return "VALIDA" if dist <= umbrales.get(cat, 5) else "INCONSISTENTE"
\ No newline at end of file
+    return "VALIDA" if dist <= umbrales.get(cat, 5) else "INCONSISTENTE"
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distancia haversine vectorizada en KM; NaN si falta alguna coordenada."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype="float64")) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(a))
+
+def dentro_de_peru(lat, lon):
+    """Máscara de coordenadas dentro de la caja de Perú (NaN y 0,0 quedan fuera)."""
+    lat_min, lat_max, lon_min, lon_max = PERU_BBOX
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    return (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+
+def categoria_UT_vectorizada(ut, ut_category_map):
+    """Clasifica una serie de UT según `territorial_rules.ut_category_map` del YAML."""
+    mapa = {u: cat for cat, uts in ut_category_map.items() for u in uts}
+    return pd.Series(ut).map(mapa).astype(object).fillna("AMAZONICO")
+
+def clasificar_base_vectorizada(categoria, distancia_km, thresholds_km):
+    """Versión vectorizada de `clasificar_base` (NaN cuenta como INCONSISTENTE)."""
+    umbral = pd.Series(categoria).map(thresholds_km).astype("float64").fillna(5).to_numpy()
+    return np.where(np.asarray(distancia_km, dtype="float64") <= umbral, "VALIDA", "INCONSISTENTE")
@@ -0,0 +1,86 @@
+# scripts/vecinos.py
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from scripts.utils import RADIO_TIERRA_KM
+
+
+def a_vectores_unitarios(lat, lon):
+    """Convierte lat/lon (grados) a vectores 3-D unitarios; la cuerda es monótona con la distancia."""
+    lat = np.radians(np.asarray(lat, dtype="float64"))
+    lon = np.radians(np.asarray(lon, dtype="float64"))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def km_a_cuerda(km):
+    return 2 * np.sin(np.asarray(km, dtype="float64") / (2 * RADIO_TIERRA_KM))
+
+
+def cuerda_a_km(cuerda):
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.clip(np.asarray(cuerda, dtype="float64") / 2, 0, 1))
+
+
+class IndiceHogares:
+    """KD-tree sobre las coordenadas de todos los hogares del maestro (HOGARESGEO)."""
+
+    def __init__(self, co_hogar, lat, lon, distrito):
+        validos = np.isfinite(np.asarray(lat, dtype="float64")) & np.isfinite(np.asarray(lon, dtype="float64"))
+        self.co_hogar = np.asarray(co_hogar)[validos]
+        self.distrito = np.asarray(distrito, dtype=object)[validos]
+        self.arbol = cKDTree(a_vectores_unitarios(np.asarray(lat)[validos], np.asarray(lon)[validos]))
+
+    def k_cercanos(self, lat, lon, k, max_km, workers=-1):
+        """Devuelve `(dist_km, posiciones)` de los k hogares más cercanos dentro de `max_km`.
+
+        Las posiciones sin vecino quedan en -1 y su distancia en NaN.
+        """
+        d, pos = self.arbol.query(
+            a_vectores_unitarios(lat, lon), k=k,
+            distance_upper_bound=float(km_a_cuerda(max_km)), workers=workers,
+        )
+        d, pos = d.reshape(len(d), -1), pos.reshape(len(pos), -1)
+        sin_vecino = ~np.isfinite(d)
+        pos = np.where(sin_vecino, -1, pos)
+        return np.where(sin_vecino, np.nan, cuerda_a_km(np.where(sin_vecino, 0, d))), pos
+
+
+def buscar_hogar_alternativo(df, indice, thresholds_km, k=5, lote=200_000):
+    """Para cada visita INCONSISTENTE busca otro hogar del mismo distrito dentro del umbral.
+
+    Agrega HOGAR_CERCANO y DIST_HOGAR_CERCANO_KM (el hogar distinto más cercano,
+    dentro del umbral máximo) y OTRO_HOGAR_EN_RANGO (hay otro hogar del mismo
+    distrito dentro del umbral de su categoría: posible CO_HOGAR mal registrado).
+    """
+    objetivo = np.flatnonzero(
+        (df["VALIDA_BASE"] == "INCONSISTENTE").to_numpy()
+        & df["LATITUD"].notna().to_numpy() & df["LONGITUD"].notna().to_numpy()
+    )
+    max_km = max(thresholds_km.values())
+    cercano = np.full(len(df), -1, dtype=np.int64)
+    dist_cercano = np.full(len(df), np.nan, dtype=np.float32)
+    en_rango = np.zeros(len(df), dtype=bool)
+
+    umbral = df["CATEGORIA"].map(thresholds_km).astype("float64").fillna(max_km).to_numpy()
+    propio = df["CO_HOGAR"].to_numpy()
+    distrito = df["DISTRITO"].astype(object).to_numpy()
+    for inicio in range(0, len(objetivo), lote):
+        filas = objetivo[inicio:inicio + lote]
+        # k + 1 porque el propio hogar suele estar entre los vecinos
+        d, pos = indice.k_cercanos(df["LATITUD"].to_numpy()[filas], df["LONGITUD"].to_numpy()[filas], k + 1, max_km)
+        hogar = np.where(pos >= 0, indice.co_hogar[np.maximum(pos, 0)], -1)
+        otro = (pos >= 0) & (hogar != propio[filas, None])
+
+        primero = np.where(otro.any(axis=1), otro.argmax(axis=1), -1)
+        tiene = primero >= 0
+        cercano[filas[tiene]] = hogar[tiene, primero[tiene]]
+        dist_cercano[filas[tiene]] = d[tiene, primero[tiene]]
+
+        mismo_distrito = indice.distrito[np.maximum(pos, 0)] == distrito[filas, None]
+        en_rango[filas] = (otro & mismo_distrito & (d <= umbral[filas, None])).any(axis=1)
+
+    df["HOGAR_CERCANO"] = pd.array(np.where(cercano >= 0, cercano, None), dtype="Int64")
+    df["DIST_HOGAR_CERCANO_KM"] = dist_cercano
+    df["OTRO_HOGAR_EN_RANGO"] = en_rango
+    return df